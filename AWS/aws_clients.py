@@ -0,0 +1,123 @@
+"""
+Registro de clientes de boto3 compartido por las funciones Lambda.
+
+Cada cliente o recurso se crea la primera vez que se pide y se reutiliza en las siguientes
+invocaciones del mismo contenedor, de modo que la resolución de credenciales, la preparación del
+endpoint y las conexiones TLS del grupo de conexiones solo se pagan una vez. Todos los clientes se
+crean desde una única sesión de boto3 (la sesión por defecto no es segura entre hilos) con una
+configuración de botocore ajustada para las funciones que lanzan llamadas en paralelo.
+
+El tiempo que tarda en crearse cada cliente se guarda y se muestra en los registros, para poder
+comparar los arranques en frío con las invocaciones en caliente.
+
+Variables de entorno:
+- AWS_MAX_POOL_CONNECTIONS: Conexiones máximas por cliente (por defecto 50).
+- AWS_CONNECT_TIMEOUT / AWS_READ_TIMEOUT: Tiempos de espera en segundos (por defecto 5 y 30).
+- AWS_MAX_ATTEMPTS: Intentos máximos con reintentos adaptativos (por defecto 5).
+
+Funciones:
+- client: Devuelve el cliente de boto3 de un servicio, creándolo si es necesario.
+- resource: Devuelve el recurso de boto3 de un servicio, creándolo si es necesario.
+- set_client: Sustituye el cliente o recurso de un servicio (por ejemplo, por uno falso en local).
+- creation_times: Devuelve el tiempo de creación de cada cliente y recurso.
+- reset: Descarta los clientes creados.
+"""
+import os
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50')),
+    tcp_keepalive=True,
+    connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT', '5')),
+    read_timeout=float(os.environ.get('AWS_READ_TIMEOUT', '30')),
+    retries={'mode': 'adaptive', 'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '5'))}
+)
+
+_lock = threading.Lock()
+_session = None
+_instances = {}
+_creation_seconds = {}
+
+
+def _get(kind, service_name):
+    global _session  # pylint: disable=global-statement
+    key = (kind, service_name)
+    instance = _instances.get(key)
+    if instance is not None:
+        return instance
+
+    with _lock:
+        instance = _instances.get(key)
+        if instance is None:
+            start = time.perf_counter()
+            if _session is None:
+                _session = boto3.session.Session()
+            factory = _session.client if kind == 'client' else _session.resource
+            instance = factory(service_name, config=CLIENT_CONFIG)
+            _creation_seconds[key] = time.perf_counter() - start
+            _instances[key] = instance
+            print(f"{kind} de {service_name} creado en {_creation_seconds[key] * 1000:.1f} ms")
+    return instance
+
+
+def client(service_name):
+    """
+    Devuelve el cliente de boto3 de un servicio, creándolo la primera vez.
+
+    Parámetros:
+    - service_name: Nombre del servicio, por ejemplo 's3' o 'textract'.
+
+    Retorna:
+    - El cliente compartido del servicio.
+    """
+    return _get('client', service_name)
+
+
+def resource(service_name):
+    """
+    Devuelve el recurso de boto3 de un servicio, creándolo la primera vez.
+
+    Parámetros:
+    - service_name: Nombre del servicio, por ejemplo 'dynamodb'.
+
+    Retorna:
+    - El recurso compartido del servicio.
+    """
+    return _get('resource', service_name)
+
+
+def set_client(service_name, instance, kind='client'):
+    """
+    Sustituye el cliente (o el recurso, con kind='resource') de un servicio.
+
+    Parámetros:
+    - service_name: Nombre del servicio.
+    - instance: Objeto que se devolverá en lugar del cliente de boto3.
+    - kind: 'client' o 'resource'.
+    """
+    with _lock:
+        _instances[(kind, service_name)] = instance
+        _creation_seconds[(kind, service_name)] = 0.0
+
+
+def creation_times():
+    """
+    Devuelve el tiempo de creación de cada cliente y recurso del contenedor.
+
+    Retorna:
+    - Diccionario 'tipo:servicio' -> segundos.
+    """
+    return {f"{kind}:{service_name}": seconds for (kind, service_name), seconds in _creation_seconds.items()}
+
+
+def reset():
+    """Descarta los clientes, los recursos y la sesión creados hasta ahora."""
+    global _session  # pylint: disable=global-statement
+    with _lock:
+        _session = None
+        _instances.clear()
+        _creation_seconds.clear()
@@ -0,0 +1,122 @@
+"""
+Reconstrucción del orden de lectura de las páginas que devuelve Textract.
+
+Para cada página se decide si el texto está en una o en dos columnas buscando una línea vertical
+que casi ninguna línea de texto atraviese y que deje suficientes líneas a cada lado. Si existe, las
+líneas se ordenan por columna y, dentro de cada columna, de arriba abajo; si no, la página se lee
+de arriba abajo. Las líneas que atraviesan la separación (títulos a todo el ancho) se leen con la
+columna izquierda.
+
+Con NumPy, las posiciones de cada página se cargan en vectores y tanto la búsqueda de la separación
+como la ordenación se hacen de una vez. Sin NumPy se usa una implementación en Python puro que da
+exactamente el mismo resultado.
+
+Funciones:
+- reading_order: Devuelve el texto de las líneas de una página en orden de lectura.
+- detect_split: Devuelve la posición de la separación entre columnas, o None si la página tiene una columna.
+"""
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usa la implementación en Python puro
+    np = None
+
+# Posiciones horizontales candidatas para la separación entre columnas.
+SPLIT_CANDIDATES = tuple(round(0.30 + 0.01 * step, 2) for step in range(41))
+# Fracción máxima de líneas que pueden atravesar la separación (títulos, pies de página...).
+MAX_CROSSING_FRACTION = 0.10
+# Fracción mínima de líneas que debe quedar a cada lado de la separación.
+MIN_COLUMN_FRACTION = 0.20
+
+_CANDIDATES_ARRAY = np.array(SPLIT_CANDIDATES) if np is not None else None
+
+
+def _limits(count):
+    return MAX_CROSSING_FRACTION * count, MIN_COLUMN_FRACTION * count
+
+
+def _detect_split_numpy(lefts, rights):
+    count = len(lefts)
+    max_crossing, min_column = _limits(count)
+    xs = _CANDIDATES_ARRAY
+    # Con los bordes ordenados, las líneas a cada lado de todas las candidatas se cuentan con una búsqueda binaria.
+    left_count = np.searchsorted(np.sort(rights), xs, side='right')
+    right_count = count - np.searchsorted(np.sort(lefts), xs, side='left')
+    crossing = count - left_count - right_count
+    valid = (crossing <= max_crossing) & (left_count >= min_column) & (right_count >= min_column)
+    if not valid.any():
+        return None
+    # Menos líneas atravesadas primero; a igualdad, la separación más cercana al centro.
+    score = np.where(valid, crossing + np.abs(xs - 0.5), np.inf)
+    return float(xs[int(np.argmin(score))])
+
+
+def _detect_split_python(lefts, rights):
+    count = len(lefts)
+    max_crossing, min_column = _limits(count)
+    sorted_lefts = sorted(lefts)
+    sorted_rights = sorted(rights)
+    best = None
+    best_score = None
+    for x in SPLIT_CANDIDATES:
+        left_count = bisect_right(sorted_rights, x)
+        right_count = count - bisect_left(sorted_lefts, x)
+        crossing = count - left_count - right_count
+        if crossing > max_crossing or left_count < min_column or right_count < min_column:
+            continue
+        score = crossing + abs(x - 0.5)
+        if best_score is None or score < best_score:
+            best, best_score = x, score
+    return best
+
+
+def detect_split(lefts, rights):
+    """
+    Busca la separación entre dos columnas de texto.
+
+    Parámetros:
+    - lefts: Borde izquierdo de cada línea (BoundingBox.Left), como lista o vector de NumPy.
+    - rights: Borde derecho de cada línea (Left + Width).
+
+    Retorna:
+    - La posición horizontal de la separación, o None si la página tiene una sola columna.
+    """
+    if len(lefts) == 0:
+        return None
+    if np is not None:
+        return _detect_split_numpy(np.asarray(lefts, dtype=float), np.asarray(rights, dtype=float))
+    return _detect_split_python(lefts, rights)
+
+
+def reading_order(lines):
+    """
+    Ordena las líneas de una página en orden de lectura.
+
+    Parámetros:
+    - lines: Lista de tuplas (left, top, width, texto) de la página.
+
+    Retorna:
+    - Lista con el texto de las líneas en orden de lectura.
+    """
+    count = len(lines)
+    if count == 0:
+        return []
+
+    if np is not None:
+        lefts = np.fromiter([line[0] for line in lines], dtype=float, count=count)
+        tops = np.fromiter([line[1] for line in lines], dtype=float, count=count)
+        widths = np.fromiter([line[2] for line in lines], dtype=float, count=count)
+        split = _detect_split_numpy(lefts, lefts + widths)
+        columns = (lefts >= split) if split is not None else np.zeros(count, dtype=bool)
+        # lexsort ordena por la última clave: columna, después Top y, a igualdad, el orden de Textract.
+        order = np.lexsort((np.arange(count), tops, columns))
+        return [lines[index][3] for index in order.tolist()]
+
+    lefts = [line[0] for line in lines]
+    split = _detect_split_python(lefts, [line[0] + line[2] for line in lines])
+    order = sorted(
+        range(count),
+        key=lambda index: (split is not None and lefts[index] >= split, lines[index][1], index)
+    )
+    return [lines[index][3] for index in order]
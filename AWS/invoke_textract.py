@@ -9,29 +9,54 @@ extracción de texto de documentos almacenados.
 Funciones:
 - start_extract_document_analysis: Inicia el análisis de texto en un documento especificado en S3.
 - lambda_handler: Maneja eventos de Lambda para desencadenar análisis de documentos en respuesta a acciones en S3.
+- get_s3_objects: Extrae los objetos de S3 de un evento de S3 o de un lote de mensajes de SQS.
+- find_cached_result: Busca en la caché de resultados un documento con el mismo contenido ya procesado.
+
+Si se configura la tabla RESULT_CACHE_TABLE, los documentos cuyo contenido (ETag) ya se procesó con la misma
+versión del proceso (PIPELINE_VERSION) no vuelven a enviarse a Textract: se devuelve el trabajo y el resultado
+anteriores. La clave de la caché viaja como JobTag del trabajo para que result_textract.py la registre al terminar.
 """
 import os
-import boto3
+import json
+from urllib.parse import unquote_plus
+
+from boto3.dynamodb.types import TypeDeserializer
+import aws_clients
+from common.concurrency import map_in_order
+from common.content import result_cache_key
 
 
 SNSTopicArn=os.environ['SNSTopicArn']
 roleArn=os.environ['roleArn']
+# Número máximo de trabajos de Textract que se inician a la vez en una invocación.
+TEXTRACT_START_WORKERS = int(os.environ.get('TEXTRACT_START_WORKERS', '5'))
+# Caché de resultados por contenido: tabla de DynamoDB con clave CacheKey (desactivada si no se indica)
+# y versión del proceso de extracción, que forma parte de la clave.
+RESULT_CACHE_TABLE = os.environ.get('RESULT_CACHE_TABLE')
+PIPELINE_VERSION = os.environ.get('PIPELINE_VERSION', 'textract-v1')
+# Textract admite JobTag de como mucho 64 caracteres.
+MAX_JOB_TAG_LENGTH = 64
+_deserializer = TypeDeserializer()
 
-def start_extract_document_analysis(s3_bucket, s3_key):
+def start_extract_document_analysis(s3_bucket, s3_key, textract_client=None, job_tag=None):
     """
     Inicia el análisis de un documento utilizando AWS Textract.
 
     Parámetros:
     - s3_bucket: Nombre del bucket de S3 donde se encuentra el documento.
     - s3_key: Clave del objeto en el bucket de S3 que apunta al documento.
+    - textract_client: Cliente de Textract a usar. Si no se indica, se usa el cliente compartido del contenedor.
+    - job_tag: Etiqueta opcional del trabajo, que Textract incluye en la notificación de SNS.
 
     Devuelve:
     - Devuelve el ID del trabajo de Textract si se inicia correctamente.
     - En caso de error durante el inicio del análisis, devuelve False.
     """
     
-    textract_client = boto3.client('textract')
+    if textract_client is None:
+        textract_client = aws_clients.client('textract')
     try:
+        extra_args = {'JobTag': job_tag} if job_tag and len(job_tag) <= MAX_JOB_TAG_LENGTH else {}
         response = textract_client.start_document_text_detection(
             DocumentLocation={
                 'S3Object': {
@@ -40,6 +65,7 @@ def start_extract_document_analysis(s3_bucket, s3_key):
                 }
             },
             NotificationChannel={"SNSTopicArn": SNSTopicArn, "RoleArn": roleArn},
+            **extra_args
         )
         print(response)
         
@@ -55,30 +81,131 @@ def start_extract_document_analysis(s3_bucket, s3_key):
         return False
    
 
+def get_s3_objects(event):
+    """
+    Extrae los objetos de S3 de un evento, ya venga directamente de S3 o de una cola de SQS.
+
+    Cada mensaje de SQS contiene en su cuerpo una notificación de S3 que a su vez puede incluir varios
+    registros. Las claves de los objetos llegan codificadas como en una URL y se decodifican aquí.
+
+    Parámetros:
+    - event: El evento que desencadenó la invocación de la función Lambda.
+
+    Devuelve:
+    - Lista de tuplas (id del mensaje de SQS o None, bucket, clave, ETag o None).
+    - Lista con los ids de los mensajes de SQS cuyo cuerpo no se ha podido interpretar.
+    """
+    objects = []
+    invalid_messages = []
+    for record in event.get('Records', []):
+        message_id = None
+        s3_records = [record]
+        if record.get('eventSource') == 'aws:sqs':
+            message_id = record['messageId']
+            try:
+                s3_records = json.loads(record['body']).get('Records', [])
+            except (ValueError, AttributeError) as e:
+                print("No se pudo interpretar el mensaje {}: {}".format(message_id, e))
+                invalid_messages.append(message_id)
+                continue
+
+        for s3_record in s3_records:
+            s3_bucket = s3_record['s3']['bucket']['name']
+            s3_key = unquote_plus(s3_record['s3']['object']['key'])
+            objects.append((message_id, s3_bucket, s3_key, s3_record['s3']['object'].get('eTag')))
+    return objects, invalid_messages
+
+def find_cached_result(s3_bucket, s3_key, etag=None):
+    """
+    Busca en la caché de resultados un documento con el mismo contenido procesado con la misma versión.
+
+    Parámetros:
+    - s3_bucket: Nombre del bucket del documento.
+    - s3_key: Clave del documento.
+    - etag: ETag del documento si viene en el evento; si no, se consulta con head_object.
+
+    Devuelve:
+    - La clave de la caché (None si la caché está desactivada o no se pudo calcular).
+    - El elemento de la caché (con JobId, ResultBucket y ResultKey) si el resultado existe, o None.
+    """
+    cache_key = None
+    if not RESULT_CACHE_TABLE:
+        return cache_key, None
+    try:
+        s3 = aws_clients.client('s3')
+        if not etag:
+            etag = s3.head_object(Bucket=s3_bucket, Key=s3_key)['ETag']
+        cache_key = result_cache_key(PIPELINE_VERSION, etag)
+
+        # Se llama desde varios hilos (map_in_order): el cliente de DynamoDB es seguro entre hilos; el recurso, no.
+        response = aws_clients.client('dynamodb').get_item(
+            TableName=RESULT_CACHE_TABLE,
+            Key={'CacheKey': {'S': cache_key}}
+        )
+        if 'Item' not in response:
+            return cache_key, None
+        item = {name: _deserializer.deserialize(value) for name, value in response['Item'].items()}
+
+        # El resultado puede haberse borrado después de registrarlo en la caché.
+        s3.head_object(Bucket=item['ResultBucket'], Key=item['ResultKey'])
+        return cache_key, item
+    except Exception as e:
+        # La caché es una optimización: ante cualquier fallo el documento se procesa con normalidad.
+        print("No se pudo usar la caché de resultados para s3://{}/{}: {}".format(s3_bucket, s3_key, e))
+        return cache_key, None
+
 def lambda_handler(event, context):
     """
     Función principal que maneja el evento y desencadena el inicio del análisis de Textract.
 
+    Se procesan todos los registros del evento, iniciando los trabajos de Textract en paralelo (como mucho
+    TEXTRACT_START_WORKERS a la vez). Los documentos que ya están en la caché de resultados no se envían a
+    Textract: se devuelven el trabajo y el fichero de resultado anteriores. Si el evento llega desde SQS, los mensajes con algún documento que no
+    se haya podido procesar se devuelven en batchItemFailures, para que solo se reintenten esos mensajes
+    (la integración con SQS debe tener activado ReportBatchItemFailures).
+
     Parámetros:
     - event: El evento que desencadenó la invocación de la función Lambda.
     - context: El contexto de la función Lambda que proporciona información sobre la ejecución y el entorno.
 
     Devuelve:
-    - Devuelve el ID del trabajo de Textract si el análisis se inicia con éxito.
-    - En caso de error durante el inicio del análisis, devuelve False.
+    - Diccionario con el resultado de cada documento en 'results' (bucket, clave, ID del trabajo de
+      Textract, o False si no se pudo iniciar, y si procede de la caché junto con la clave del resultado),
+      las métricas de la caché en 'cache' y, si el evento viene de SQS, 'batchItemFailures'.
     """
     print("event collected is {}".format(event))
-    
-    for record in event['Records']:
-        s3_bucket = record['s3']['bucket']['name']
-        print("Bucket name is {}".format(s3_bucket))
-        
-        s3_key = record['s3']['object']['key']
-        print("Bucket key name is {}".format(s3_key))
-        from_path = "s3://{}/{}".format(s3_bucket, s3_key)
-        print("from path {}".format(from_path))
-        
-        job_id = start_extract_document_analysis(s3_bucket, s3_key)
-        if job_id:
-            print("Job ID returned: {}".format(job_id))
-            return job_id
+
+    objects, invalid_messages = get_s3_objects(event)
+    textract_client = aws_clients.client('textract')
+
+    def start(s3_object):
+        _, s3_bucket, s3_key, etag = s3_object
+        print("from path s3://{}/{}".format(s3_bucket, s3_key))
+        result = {'bucket': s3_bucket, 'key': s3_key}
+        cache_key, cached = find_cached_result(s3_bucket, s3_key, etag)
+        if cached is not None:
+            print("Resultado en caché para s3://{}/{}: {}".format(s3_bucket, s3_key, cached['ResultKey']))
+            result.update(job_id=cached['JobId'], cached=True, result_key=cached['ResultKey'])
+        else:
+            job_id = start_extract_document_analysis(s3_bucket, s3_key, textract_client, job_tag=cache_key)
+            result.update(job_id=job_id, cached=False)
+        return result
+
+    results = map_in_order(start, objects, max_workers=TEXTRACT_START_WORKERS)
+
+    failed_messages = list(invalid_messages)
+    for (message_id, _, _, _), result in zip(objects, results):
+        if result['job_id']:
+            print("Job ID returned: {}".format(result['job_id']))
+        elif message_id is not None and message_id not in failed_messages:
+            failed_messages.append(message_id)
+
+    hits = sum(1 for result in results if result['cached'])
+    started = sum(1 for result in results if result['job_id'] and not result['cached'])
+    print("Trabajos iniciados: {} de {}. Caché de resultados: {} aciertos, {} fallos".format(
+        started, len(objects), hits, len(objects) - hits))
+
+    response = {'results': results, 'cache': {'hits': hits, 'misses': len(objects) - hits}}
+    if any(record.get('eventSource') == 'aws:sqs' for record in event.get('Records', [])):
+        response['batchItemFailures'] = [{'itemIdentifier': message_id} for message_id in failed_messages]
+    return response
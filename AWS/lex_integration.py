@@ -12,21 +12,76 @@ y leer documentos directamente desde un bucket de S3.
 Características:
 - Manejo de sesiones y pasos de tutoriales mediante atributos de sesión en Lex.
 - Consulta a DynamoDB para obtener respuestas a preguntas y contenido de tutorial.
+- Índice invertido de preguntas en memoria, reutilizado entre invocaciones mientras el contenedor siga caliente.
+- Sugerencias "¿Quizás quisiste decir...?" cuando la pregunta más parecida no es lo bastante fiable.
 - Recuperación de archivos de texto desde S3 para proporcionar contenido detallado de los tutoriales.
+- Caché LRU con TTL del contenido de los pasos, revalidada con el ETag de S3.
 - Gestión de errores y excepciones para asegurar la estabilidad de la función Lambda en escenarios de error.
 
 Este módulo es parte de un sistema más grande diseñado para educar y asistir a los usuarios en el uso de
 servicios AWS a través de un chatbot interactivo.
 """
 import os
-import boto3
-
-s3 = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('ChatbotResponses')
+import time
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+import aws_clients
+from common.cache import TTLCache
+from common.concurrency import map_in_order
+from common.manifest import MANIFEST_FILE, parse_manifest, step_entries
+from common.retrieval import (DEFAULT_MIN_CONFIDENCE, DEFAULT_SUGGESTION_COUNT, NO_ANSWER_MESSAGE,
+                              TOKEN_VERSION_FIELD, TOKENS_FIELD, RankingIndex, candidate_count, choose_answer,
+                              stored_tokens, stream_top_k, tokenize, with_confidence)
+
+TABLE_NAME = 'ChatbotResponses'
+s3 = aws_clients.client('s3')
+dynamodb = aws_clients.resource('dynamodb')
+table = dynamodb.Table(TABLE_NAME)
+# Los subpasos se leen desde varios hilos a la vez (map_in_order). Los recursos de boto3 no son seguros
+# entre hilos, así que esas lecturas usan el cliente de bajo nivel, que sí lo es.
+dynamodb_client = aws_clients.client('dynamodb')
 bucket_name = os.environ['bucket_name']
 folder_name = os.environ['folder_name']
 
+# Índice invertido de preguntas que se mantiene mientras el contenedor de la Lambda siga caliente.
+# Con un TTL de 0 se desactiva y cada pregunta vuelve a consultar DynamoDB directamente.
+INDEX_TTL_SECONDS = int(os.environ.get('INDEX_TTL_SECONDS', '300'))
+RANKING_SCORER = os.environ.get('RANKING_SCORER', 'bm25')
+_question_index = {'built_at': None, 'engine': None}
+
+# Primera fase de la búsqueda: solo se leen las claves y los términos de cada pregunta. La respuesta
+# se lee después, con una única lectura puntual de la pregunta ganadora, y se guarda en caché.
+QUESTION_PROJECTION = {
+    'ProjectionExpression': '#intent, #question, #tokens, #version',
+    'ExpressionAttributeNames': {
+        '#intent': 'IntentName',
+        '#question': 'Question',
+        '#tokens': TOKENS_FIELD,
+        '#version': TOKEN_VERSION_FIELD
+    }
+}
+# Confianza mínima para responder directamente y número de preguntas sugeridas si no se alcanza
+# (ver common.retrieval.choose_answer).
+MIN_CONFIDENCE = float(os.environ.get('MIN_CONFIDENCE', DEFAULT_MIN_CONFIDENCE))
+SUGGESTION_COUNT = int(os.environ.get('SUGGESTION_COUNT', DEFAULT_SUGGESTION_COUNT))
+_response_cache = TTLCache(maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', '256')), ttl=INDEX_TTL_SECONDS)
+
+# Caché de contenido del tutorial por (paso, subpaso): nombre del fichero, ETag y texto de S3.
+# Al caducar una entrada se revalida con su ETag, de modo que solo se descarga si ha cambiado.
+STEP_CACHE_TTL_SECONDS = int(os.environ.get('STEP_CACHE_TTL_SECONDS', '3600'))
+_step_cache = TTLCache(maxsize=int(os.environ.get('STEP_CACHE_SIZE', '64')), ttl=STEP_CACHE_TTL_SECONDS)
+
+# Número máximo de subpasos que se descargan en paralelo cuando no están en caché (1 = en serie).
+STEP_FETCH_WORKERS = int(os.environ.get('STEP_FETCH_WORKERS', '5'))
+STEP_UNAVAILABLE_MESSAGE = "No se pudo cargar el contenido de este subpaso."
+
+# Manifiesto del tutorial (common/manifest.py) publicado junto a los ficheros en S3. Se lee una vez
+# por contenedor y se revalida con su ETag al caducar. Si no existe se usan los metadatos por subpaso
+# de DynamoDB y el número de subpasos de LEGACY_STEP_SUBSTEPS.
+MANIFEST_TTL_SECONDS = int(os.environ.get('MANIFEST_TTL_SECONDS', '3600'))
+LEGACY_STEP_SUBSTEPS = {0: 1, 1: 2, 2: 1, 3: 1, 4: 5, 5: 2, 6: 3, 7: 1}
+_manifest = {'loaded_at': None, 'etag': None, 'manifest': None}
+
 
 def lambda_handler(event, context):
     """
@@ -88,34 +143,122 @@ def handle_step(event, next_step):
     Retorna:
     - Un diccionario con el mensaje del paso o subpaso correspondiente y los atributos de la sesión actualizados.
     """
-    step_substep = {0: 1, 1: 2, 2: 1, 3: 1, 4: 5, 5: 2, 6: 3, 7: 1}
     session_attributes = event['sessionState'].get('sessionAttributes', {})
+    manifest = get_tutorial_manifest()
+    last_step = max(manifest['steps']) if manifest else 7
     
     if next_step:
         step = int(session_attributes.get('step', 0))
     else:
         step = int(event['sessionState']['intent']['slots']['StepNumber']['value']['interpretedValue'])
         session_attributes['step'] = step
-        if step < 1 or step > 7:
-            message = "Lo siento, el paso especificado no es válido. Por favor, elige un paso entre 1 y 7."
+        if step < 1 or step > last_step:
+            message = f"Lo siento, el paso especificado no es válido. Por favor, elige un paso entre 1 y {last_step}."
             return build_response([{'contentType': 'PlainText', 'content': message}], session_attributes, 'GoToStep')
     
-    response = []
-    
-    for substep in range(1, step_substep.get(step, 1) + 1):
-        file_name = get_step_content(step, substep)
-        texto = read_text_file_from_s3(file_name)
-        mensaje = {
+    textos = map_in_order(
+        lambda source: source[2] if source[2] is not None else get_step_text(step, source[0], source[1]),
+        get_substep_sources(manifest, step),
+        max_workers=STEP_FETCH_WORKERS,
+        on_error=lambda source, e: print(f"Error al obtener el subpaso {step}_{source[0]}: {e}")
+    )
+    response = [
+        {
             'contentType': 'CustomPayload',
-            'content': texto
+            'content': texto if texto is not None else STEP_UNAVAILABLE_MESSAGE
         }
-        response.append(mensaje)
+        for texto in textos
+    ] or [{'contentType': 'PlainText', 'content': "No se encontró contenido para este paso y subpaso."}]
     
     session_attributes['step'] = step + 1
+    print(f"Caché de pasos: {_step_cache.hits} aciertos, {_step_cache.misses} fallos, {len(_step_cache)} entradas.")
     
     return build_response(response, session_attributes, 'NextStep' if next_step else 'GoToStep')
 
 
+def get_tutorial_manifest():
+    """
+    Devuelve el manifiesto del tutorial, leyéndolo de S3 como mucho una vez cada MANIFEST_TTL_SECONDS.
+
+    Parámetros:
+    - Ninguno.
+
+    Retorna:
+    - El manifiesto cargado, o None si no se ha publicado o no se puede leer.
+    """
+    loaded_at = _manifest['loaded_at']
+    if loaded_at is not None and time.monotonic() - loaded_at < MANIFEST_TTL_SECONDS:
+        return _manifest['manifest']
+
+    text, etag = fetch_text_file_from_s3(MANIFEST_FILE, _manifest['etag'])
+    if text is not None:
+        try:
+            _manifest['manifest'] = parse_manifest(text)
+            _manifest['etag'] = etag
+            print(f"Manifiesto del tutorial cargado, versión {_manifest['manifest']['version']}.")
+        except Exception as e:
+            print(f"Error al cargar el manifiesto del tutorial: {e}")
+    # También se anota cuando no existe, para no repetir la lectura en cada turno.
+    _manifest['loaded_at'] = time.monotonic()
+    return _manifest['manifest']
+
+
+def get_substep_sources(manifest, step):
+    """
+    Devuelve de dónde obtener cada subpaso de un paso.
+
+    Parámetros:
+    - manifest: El manifiesto del tutorial o None si no está disponible.
+    - step: El paso del tutorial.
+
+    Retorna:
+    - Lista de tuplas (subpaso, nombre del fichero, texto). El nombre del fichero es None si hay que
+      resolverlo en DynamoDB y el texto es None si no está incrustado en el manifiesto.
+    """
+    if manifest is None:
+        return [(substep, None, None) for substep in range(1, LEGACY_STEP_SUBSTEPS.get(step, 1) + 1)]
+    return [(entry['substep'], entry['key'], entry.get('text')) for entry in step_entries(manifest, step)]
+
+
+def get_step_text(step, substep, file_name=None):
+    """
+    Obtiene el texto de un subpaso del tutorial, usando la caché del contenedor siempre que sea posible.
+
+    Si la entrada está vigente no se accede a la red. Si ha caducado y el fichero sigue siendo el mismo,
+    se revalida contra S3 con su ETag y solo se vuelve a descargar si ha cambiado; si el manifiesto
+    indica otro fichero, se descarga el nuevo. Si no existe, se descarga de S3, resolviendo antes el
+    nombre del fichero en DynamoDB si no se conoce.
+
+    Parámetros:
+    - step: El paso actual del tutorial.
+    - substep: El subpaso actual dentro del paso.
+    - file_name: El nombre del fichero si ya se conoce (por ejemplo, por el manifiesto).
+
+    Retorna:
+    - El texto del subpaso, o None si no se ha podido leer.
+    """
+    key = (step, substep)
+    entry = _step_cache.get(key)
+    if entry is not None:
+        return entry['text']
+
+    entry = _step_cache.get_stale(key)
+    if file_name is None:
+        file_name = entry['file_name'] if entry is not None else get_step_content(step, substep)
+    if entry is not None and entry['file_name'] != file_name:
+        # El subpaso apunta a otro fichero: el ETag de la entrada no sirve para revalidarlo.
+        entry = None
+    text, etag = fetch_text_file_from_s3(file_name, entry['etag'] if entry is not None else None)
+
+    if text is None and etag is not None:
+        # S3 ha respondido 304: el contenido cacheado sigue siendo válido.
+        _step_cache.set(key, entry)
+        return entry['text']
+    if text is not None:
+        _step_cache.set(key, {'file_name': file_name, 'etag': etag, 'text': text})
+    return text
+
+
 def get_step_content(step, substep):
     """
     Obtiene el fichero contenido a través del paso y subpaso actuales desde DynamoDB.
@@ -129,11 +272,14 @@ def get_step_content(step, substep):
     """
     try:
         key = f"{step}_{substep}"
-        response = table.get_item(Key={'IntentName': 'tutorial', 'Question': key})
+        response = dynamodb_client.get_item(
+            TableName=TABLE_NAME,
+            Key={'IntentName': {'S': 'tutorial'}, 'Question': {'S': key}}
+        )
         item = response.get('Item')
         if not item:
             return "No se encontró contenido para este paso y subpaso."
-        return item['Response']
+        return item['Response']['S']
     except Exception as e:
         print(f"Error al obtener contenido desde DynamoDB: {e}")
         return "Ocurrió un error al obtener el contenido del paso."
@@ -166,51 +312,192 @@ def get_most_similar_response(intent_name, user_input):
     """
     Busca la respuesta más similar a la pregunta del usuario en DynamoDB.
 
+    La búsqueda se hace en dos fases: primero se ordenan las preguntas (find_similar_questions) y después
+    se lee únicamente la respuesta de la pregunta ganadora. Si common.retrieval.choose_answer no la
+    considera fiable (no alcanza MIN_CONFIDENCE o empata con la segunda), no se lee ninguna respuesta y se
+    sugieren las preguntas más parecidas; si ninguna pregunta comparte términos con la del usuario, tampoco.
+
     Parámetros:
     - intent_name: El nombre de la intención que contiene la pregunta.
     - user_input: La pregunta realizada por el usuario.
 
     Retorna:
-    - La respuesta más similar encontrada en DynamoDB o un mensaje de error si no se encuentra una respuesta.
+    - La respuesta más similar encontrada en DynamoDB, las sugerencias o un mensaje de error si no se encuentra una respuesta.
     """
     try:
-        response = table.query(
-            KeyConditionExpression=boto3.dynamodb.conditions.Key('IntentName').eq(intent_name)
-        )
-
-        items = response.get('Items', [])
-        if not items:
-            return "Lo siento, no tengo la respuesta a esa pregunta en este momento."
-        
-        max_similarity = -1
-        best_response = "Lo siento, no tengo la respuesta a esa pregunta en este momento."
-        for item in items:
-            similarity = calculate_similarity(user_input, item['Question'])
-            if similarity > max_similarity:
-                max_similarity = similarity
-                best_response = item['Response']
-        
-        return best_response
+        results = find_similar_questions(intent_name, user_input, k=candidate_count(SUGGESTION_COUNT))
+        document, message = choose_answer(results, MIN_CONFIDENCE, SUGGESTION_COUNT)
+        if document is None:
+            if results:
+                print(f"Confianza baja ({results[0][0]:.2f}) para '{user_input}', se ofrecen sugerencias.")
+            return message
+        return get_response(intent_name, document['text'])
 
     except Exception as e:
         print(f"Error al obtener la respuesta desde DynamoDB: {e}")
         return "Lo siento, ocurrió un error al procesar tu solicitud."
 
-def calculate_similarity(user_input, stored_question):
+def find_similar_questions(intent_name, user_input, k=1):
+    """
+    Devuelve las k preguntas de la intención más similares a la del usuario, con su confianza.
+
+    Las preguntas se ordenan con el índice invertido si está disponible o, si no, puntuándolas a medida
+    que llegan las páginas de la consulta de la intención (que solo proyecta claves y términos); en ese
+    caso la lectura se detiene al encontrar una coincidencia exacta. Si la pregunta del usuario no tiene
+    ningún término, no se consulta DynamoDB.
+
+    Parámetros:
+    - intent_name: El nombre de la intención que contiene la pregunta.
+    - user_input: La pregunta realizada por el usuario.
+    - k: Número máximo de preguntas.
+
+    Retorna:
+    - Lista de tuplas (confianza, documento) de mejor a peor; vacía si ninguna pregunta comparte términos con la del usuario.
+    """
+    index = get_question_index()
+    if index is not None:
+        return search_question_index(index['engine'], intent_name, user_input, k)
+    if not tokenize(user_input):
+        return []
+    return stream_top_k(iter_intent_questions(intent_name), user_input, k=k)
+
+def iter_intent_questions(intent_name):
+    """
+    Recorre las preguntas de una intención página a página, pidiendo cada página solo cuando se necesita.
+
+    Parámetros:
+    - intent_name: El nombre de la intención.
+
+    Retorna:
+    - Generador de documentos para el motor de recuperación (ver ranking_document).
+    """
+    query_kwargs = dict(QUESTION_PROJECTION, KeyConditionExpression=Key('IntentName').eq(intent_name))
+    while True:
+        response = table.query(**query_kwargs)
+        for item in response.get('Items', []):
+            yield ranking_document(item)
+
+        if 'LastEvaluatedKey' not in response:
+            return
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def get_response(intent_name, question):
     """
-    Calcula la similitud entre la pregunta del usuario y las preguntas almacenadas.
+    Lee la respuesta de una pregunta con una lectura puntual que solo proyecta el campo Response.
 
     Parámetros:
+    - intent_name: El nombre de la intención.
+    - question: La pregunta almacenada.
+
+    Retorna:
+    - La respuesta almacenada o un mensaje de error si la pregunta ya no existe.
+    """
+    key = (intent_name, question)
+    response_text = _response_cache.get(key)
+    if response_text is not None:
+        return response_text
+
+    response = table.get_item(
+        Key={'IntentName': intent_name, 'Question': question},
+        ProjectionExpression='#response',
+        ExpressionAttributeNames={'#response': 'Response'}
+    )
+    item = response.get('Item')
+    if not item:
+        return NO_ANSWER_MESSAGE
+    _response_cache.set(key, item['Response'])
+    return item['Response']
+
+def get_question_index():
+    """
+    Devuelve el índice invertido de preguntas, construyéndolo si no existe o si ha caducado su TTL.
+
+    Parámetros:
+    - Ninguno.
+
+    Retorna:
+    - El índice con las entradas 'built_at' y 'engine' (un RankingIndex con todas las preguntas),
+      o None si el índice está desactivado o no se ha podido construir.
+    """
+    if INDEX_TTL_SECONDS <= 0:
+        return None
+
+    built_at = _question_index['built_at']
+    if built_at is not None and time.monotonic() - built_at < INDEX_TTL_SECONDS:
+        return _question_index
+
+    try:
+        build_question_index()
+    except Exception as e:
+        print(f"Error al construir el índice de preguntas desde DynamoDB: {e}")
+        return None
+    return _question_index
+
+def build_question_index():
+    """
+    Recorre la tabla ChatbotResponses y construye el índice invertido de preguntas del contenedor.
+
+    Cada término normalizado apunta a las preguntas que lo contienen, de modo que una búsqueda
+    solo necesita puntuar las preguntas con algún término en común.
+
+    Parámetros:
+    - Ninguno.
+
+    Retorna:
+    - Nada. Sustituye el contenido de la variable de módulo _question_index.
+    """
+    documents = []
+    scan_kwargs = dict(QUESTION_PROJECTION)
+
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            if item['IntentName'] == 'tutorial':
+                continue
+            documents.append(ranking_document(item))
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    engine = RankingIndex(documents, scoring=RANKING_SCORER)
+    _question_index['engine'] = engine
+    _question_index['built_at'] = time.monotonic()
+    # Las respuestas cacheadas caducan con el índice para que los cambios de contenido se vean a la vez.
+    _response_cache.clear()
+    print(f"Índice de preguntas construido: {len(engine)} preguntas, {len(engine.postings)} términos.")
+
+def ranking_document(item):
+    """
+    Convierte un elemento de DynamoDB en un documento del motor de recuperación.
+
+    Parámetros:
+    - item: El elemento con IntentName, Question y, opcionalmente, los términos precalculados.
+
+    Retorna:
+    - El documento para RankingIndex. Si el elemento trae términos válidos no se vuelve a tokenizar la pregunta.
+    """
+    return {
+        'group': item['IntentName'],
+        'text': item['Question'],
+        'tokens': stored_tokens(item)
+    }
+
+def search_question_index(engine, intent_name, user_input, k=1):
+    """
+    Busca en el motor de recuperación las preguntas más similares a la del usuario.
+
+    Parámetros:
+    - engine: El RankingIndex con las preguntas.
+    - intent_name: El nombre de la intención que contiene la pregunta.
     - user_input: La pregunta realizada por el usuario.
-    - stored_question: La pregunta almacenada en DynamoDB.
+    - k: Número máximo de preguntas.
 
     Retorna:
-    - Un valor de similitud basado en la cantidad de palabras comunes entre las preguntas.
+    - Lista de tuplas (confianza, documento) de mayor a menor confianza (los k mejores candidatos del motor,
+      reordenados por with_confidence); vacía si ninguna pregunta de la intención comparte términos con la del usuario.
     """
-    user_words = set(user_input.lower().split())
-    question_words = set(stored_question.lower().split())
-    common_words = user_words.intersection(question_words)
-    return len(common_words) / max(len(user_words), len(question_words))
+    return with_confidence(user_input, engine.search(user_input, group=intent_name, k=k))
 
 def build_response(messages, session_attributes, intent_name):
     """
@@ -240,6 +527,33 @@ def build_response(messages, session_attributes, intent_name):
     }
     return response
 
+def fetch_text_file_from_s3(file_name, etag=None):
+    """
+    Descarga un archivo de texto de S3 junto con su ETag, con revalidación condicional opcional.
+
+    Parámetros:
+    - file_name: El nombre del archivo de texto en S3.
+    - etag: El ETag de la copia cacheada. Si se indica y el objeto no ha cambiado, no se descarga.
+
+    Retorna:
+    - Una tupla (texto, etag). Si el objeto no ha cambiado se devuelve (None, etag) y si no se
+      ha podido leer, (None, None).
+    """
+    kwargs = {'Bucket': bucket_name, 'Key': f"{folder_name}/{file_name}"}
+    if etag:
+        kwargs['IfNoneMatch'] = etag
+    try:
+        response = s3.get_object(**kwargs)
+        return response['Body'].read().decode('utf-8'), response.get('ETag')
+    except ClientError as e:
+        if etag and e.response.get('Error', {}).get('Code') in ('304', 'NotModified'):
+            return None, etag
+        print(f"Error al leer el archivo desde S3: {e}")
+        return None, None
+    except Exception as e:
+        print(f"Error al leer el archivo desde S3: {e}")
+        return None, None
+
 def read_text_file_from_s3(file_name):
     """
     Lee el contenido de un archivo de texto almacenado en S3.
@@ -250,11 +564,7 @@ def read_text_file_from_s3(file_name):
     Retorna:
     - El contenido del archivo de texto o un mensaje de error si no se puede leer el archivo.
     """
-    try:
-        response = s3.get_object(Bucket=bucket_name, Key=f"{folder_name}/{file_name}")
-        text = response['Body'].read().decode('utf-8')
+    text, _ = fetch_text_file_from_s3(file_name)
+    if text is not None:
         print(text)
-        return text
-    except Exception as e:
-        print(f"Error al leer el archivo desde S3: {e}")
-        return None
+    return text
@@ -6,25 +6,56 @@ invocadas a través de AWS Lambda, lo que permite un procesamiento automático y
 
 Funciones:
 - detect_language: Detecta el idioma predominante en un texto dado.
-- translate_content: Traduce el texto a español si no está ya en ese idioma.
+- translate_content: Traduce el texto a español si no está ya en ese idioma, por fragmentos y en paralelo.
+- translate_chunks: Traduce el texto por fragmentos y en paralelo y los devuelve en orden.
+- translate_chunk: Traduce un fragmento del texto conservando los espacios de sus extremos.
 - lambda_handler: Función principal de Lambda que maneja los eventos de SNS para el procesamiento de documentos.
-- process_response: Procesa la salida de Textract para extraer texto de documentos.
+- upload_text: Sube el texto a S3 a medida que se genera, con put_object o con una subida multiparte.
+- record_cached_result: Registra el resultado en la caché de resultados por contenido.
+- process_response: Procesa la salida de Textract para extraer texto de documentos, página a página.
+- iterar_respuestas_textract: Recorre de forma perezosa las respuestas paginadas de Textract.
+- iterar_paginas: Agrupa por página las líneas detectadas conservando solo texto y posición.
+- ordenar_pagina: Devuelve el texto de una página en orden de lectura según COLUMN_LAYOUT.
+- agrupar_columnas: Reparte las líneas de una página entre la columna izquierda y la derecha.
 - combinar_columnas: Combina el texto de dos columnas para documentos que están formateados en dos columnas.
 
 Estas funcionalidades están integradas en un flujo de trabajo que detecta el idioma de un documento, traduce su contenido
 si es necesario y maneja la estructura del documento para facilitar una presentación adecuada del texto traducido.
 
 """
+import io
 import os
 import json
-import boto3
+import time
+import aws_clients
+import column_layout
+from common.concurrency import map_in_order
+from common.text import assemble_text, split_text, text_sample
 
-s3 = boto3.client('s3')
-comprehend = boto3.client('comprehend')
-translate = boto3.client('translate')
-textract = boto3.client("textract")
+s3 = aws_clients.client('s3')
+comprehend = aws_clients.client('comprehend')
+translate = aws_clients.client('translate')
+textract = aws_clients.client('textract')
 bucket_name = os.environ['BUCKET_NAME']
 
+# Tamaño máximo de cada petición a Translate (el servicio admite hasta 10.000 bytes por petición).
+TRANSLATE_CHUNK_BYTES = int(os.environ.get('TRANSLATE_CHUNK_BYTES', '9000'))
+# Número máximo de fragmentos que se traducen a la vez.
+TRANSLATE_WORKERS = int(os.environ.get('TRANSLATE_WORKERS', '8'))
+# Caracteres del principio del documento que se envían a Comprehend para detectar el idioma.
+LANGUAGE_SAMPLE_CHARS = int(os.environ.get('LANGUAGE_SAMPLE_CHARS', '2000'))
+# Tamaño de cada parte de la subida multiparte a S3 (S3 exige al menos 5 MiB salvo en la última parte).
+# Los resultados más pequeños se suben con una sola llamada a put_object.
+MIN_PART_BYTES = 5 * 1024 * 1024
+UPLOAD_PART_BYTES = max(MIN_PART_BYTES, int(os.environ.get('UPLOAD_PART_BYTES', str(8 * 1024 * 1024))))
+RESULT_CONTENT_TYPE = 'text/plain; charset=utf-8'
+# Caché de resultados por contenido (ver invoke_textract.py). Si se configura, cada resultado se registra con la
+# clave que llega en el JobTag del trabajo.
+RESULT_CACHE_TABLE = os.environ.get('RESULT_CACHE_TABLE')
+# Reconstrucción del orden de lectura: 'auto' detecta en cada página si hay una o dos columnas
+# (column_layout.py); 'mitad' reparte las líneas por la mitad de la página, como hacía la versión anterior.
+COLUMN_LAYOUT = os.environ.get('COLUMN_LAYOUT', 'auto')
+
 
 def detect_language(text):
     """
@@ -48,30 +79,75 @@ def detect_language(text):
 
 def translate_content(text):
     """
-    Traduce el contenido de las páginas si está mayoritariamente en inglés.
+    Traduce el texto a español si no está ya en ese idioma.
 
     Parámetros:
-    - columnas_por_pagina: Diccionario con el contenido de las páginas.
+    - text: Texto extraído del documento.
 
     Devuelve:
-    - Diccionario con el contenido traducido.
-    - En caso de error, se maneja la excepción y se eleva.
+    - Texto traducido, o el original si ya está en español.
+    - En caso de error, se maneja la excepción y se devuelve None.
     """
     try:
-        language_code=detect_language(text)
-        if language_code != 'es':
-            translation_response = translate.translate_text(
-                Text=text,
-                SourceLanguageCode=language_code,
-                TargetLanguageCode='es'
-            )
-            translated_text = translation_response['TranslatedText']
-            return translated_text
-        return text
+        return "".join(translate_chunks(text))
 
     except Exception as e:
         print("Error al traducir el texto: ", e)
 
+def translate_chunks(text):
+    """
+    Traduce el texto a español por fragmentos y los devuelve en orden a medida que están listos.
+
+    El idioma se detecta sobre una muestra del principio del texto. Si hay que traducir, el texto se divide
+    en fragmentos que respetan los párrafos y las frases y caben en el límite de Translate; los fragmentos
+    se traducen en paralelo (como mucho TRANSLATE_WORKERS a la vez) por tandas, de modo que solo se
+    guardan en memoria los fragmentos traducidos de la tanda en curso.
+
+    Parámetros:
+    - text: Texto extraído del documento.
+
+    Devuelve:
+    - Generador de fragmentos de texto en español. Si el texto ya está en español, se devuelve tal cual.
+    - Los errores de Comprehend o Translate se propagan.
+    """
+    language_code=detect_language(text_sample(text, LANGUAGE_SAMPLE_CHARS))
+    if language_code == 'es':
+        yield text
+        return
+
+    chunks = split_text(text, TRANSLATE_CHUNK_BYTES)
+    window = max(1, TRANSLATE_WORKERS) * 4
+    for start in range(0, len(chunks), window):
+        yield from map_in_order(
+            lambda chunk: translate_chunk(chunk, language_code),
+            chunks[start:start + window],
+            max_workers=TRANSLATE_WORKERS
+        )
+
+def translate_chunk(chunk, language_code):
+    """
+    Traduce un fragmento del texto a español conservando los espacios y saltos de línea de sus extremos,
+    para que los fragmentos traducidos se puedan volver a unir sin alterar los párrafos.
+
+    Parámetros:
+    - chunk: Fragmento del texto.
+    - language_code: Código del idioma de origen.
+
+    Devuelve:
+    - Fragmento traducido.
+    """
+    content = chunk.strip()
+    if not content:
+        return chunk
+    leading = chunk[:len(chunk) - len(chunk.lstrip())]
+    trailing = chunk[len(chunk.rstrip()):]
+    translation_response = translate.translate_text(
+        Text=content,
+        SourceLanguageCode=language_code,
+        TargetLanguageCode='es'
+    )
+    return leading + translation_response['TranslatedText'] + trailing
+
 def lambda_handler(event, context):
     """
     Función principal que maneja el evento Lambda.
@@ -94,12 +170,9 @@ def lambda_handler(event, context):
         
             extracted_text=process_response(job_id)
             
-            es_text = translate_content(extracted_text)
-            
-            with open("/tmp/file.txt", "w", encoding="utf-8") as f:
-                f.write(es_text)
-                
-            s3.upload_file("/tmp/file.txt", bucket_name, "resultados-textract/" + job_id + ".txt")
+            result_key = "resultados-textract/" + job_id + ".txt"
+            upload_text(translate_chunks(extracted_text), result_key)
+            record_cached_result(message, result_key)
 
             return {"statusCode": 200, "body": json.dumps("File uploaded successfully!")}
             
@@ -111,58 +184,188 @@ def lambda_handler(event, context):
         print("Se produjo una excepción:", e)
         return {"statusCode": 500, "body": json.dumps("Error: An unexpected error occurred")}
 
+def record_cached_result(message, result_key):
+    """
+    Registra el resultado en la caché de resultados con la clave que invoke_textract.py envió como JobTag.
+
+    Un fallo al registrarlo no afecta al procesamiento: solo se pierde la posibilidad de reutilizar el resultado.
+
+    Parámetros:
+    - message: Notificación de Textract (JobId, JobTag y DocumentLocation).
+    - result_key: Clave del fichero de resultado en el bucket.
+    """
+    if not RESULT_CACHE_TABLE or not message.get('JobTag'):
+        return
+    try:
+        location = message.get('DocumentLocation', {})
+        aws_clients.resource('dynamodb').Table(RESULT_CACHE_TABLE).put_item(Item={
+            'CacheKey': message['JobTag'],
+            'JobId': message['JobId'],
+            'ResultBucket': bucket_name,
+            'ResultKey': result_key,
+            'SourceBucket': location.get('S3Bucket'),
+            'SourceKey': location.get('S3ObjectName'),
+            'CreatedAt': int(time.time())
+        })
+    except Exception as e:
+        print("No se pudo registrar el resultado en la caché:", e)
+
+def upload_text(chunks, key):
+    """
+    Sube a S3 el texto a medida que se genera, sin pasar por /tmp.
+
+    Los fragmentos se acumulan en un búfer en memoria. Si el texto completo cabe en una parte, se sube con
+    una sola llamada a put_object; si no, se inicia una subida multiparte y cada vez que el búfer alcanza
+    UPLOAD_PART_BYTES se envía como una parte, de modo que la memoria usada queda acotada por el tamaño
+    de la parte. Si algo falla, la subida multiparte se cancela para no dejar partes huérfanas.
+
+    Parámetros:
+    - chunks: Iterable de fragmentos de texto, en orden.
+    - key: Clave del objeto de destino en el bucket.
+    """
+    buffer = io.BytesIO()
+    upload_id = None
+    parts = []
+
+    def flush():
+        part_number = len(parts) + 1
+        response = s3.upload_part(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=buffer.getvalue()
+        )
+        parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        buffer.seek(0)
+        buffer.truncate()
+
+    try:
+        for chunk in chunks:
+            buffer.write(chunk.encode('utf-8'))
+            if buffer.tell() >= UPLOAD_PART_BYTES:
+                if upload_id is None:
+                    upload_id = s3.create_multipart_upload(
+                        Bucket=bucket_name,
+                        Key=key,
+                        ContentType=RESULT_CONTENT_TYPE
+                    )['UploadId']
+                flush()
+
+        if upload_id is None:
+            s3.put_object(Bucket=bucket_name, Key=key, Body=buffer.getvalue(), ContentType=RESULT_CONTENT_TYPE)
+            return
+
+        if buffer.tell():
+            flush()
+        s3.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+    except Exception:
+        if upload_id is not None:
+            s3.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+        raise
+
 def process_response(job_id):
     """
     Procesa la respuesta de Textract para obtener el texto detectado en las diferentes páginas del documento.
 
+    Las páginas de resultados se procesan a medida que llegan y solo se conserva en memoria la página
+    del documento que se está leyendo; sus líneas se escriben directamente en el texto final
+    (common.text.assemble_text), que es la única copia del documento completo.
+
     Parámetros:
     - job_id: Identificador del trabajo de Textract.
 
     Devuelve:
-    - Diccionario con el número de página y el contenido de texto detectado en cada página.
+    - Texto extraído del documento, con las columnas de cada página combinadas.
     """
-    pages = []
+    return assemble_text(
+        line
+        for page_number, lines in iterar_paginas(job_id)
+        for line in ordenar_pagina(page_number, lines)
+    )
 
-    next_token = None
+def iterar_respuestas_textract(job_id):
+    """
+    Recorre las respuestas paginadas de get_document_text_detection, pidiendo cada una solo cuando se necesita.
 
-    response = textract.get_document_text_detection(JobId=job_id)
-    pages.append(response)
-    
-    if "NextToken" in response:
-        next_token = response["NextToken"]
+    Parámetros:
+    - job_id: Identificador del trabajo de Textract.
 
-    while next_token:
-        response = textract.get_document_text_detection(
-            JobId=job_id, NextToken=next_token
-        )
-        pages.append(response)
-        next_token = None
-        if "NextToken" in response:
-            next_token = response["NextToken"]
+    Devuelve:
+    - Generador de respuestas de Textract.
+    """
+    kwargs = {'JobId': job_id}
+    while True:
+        response = textract.get_document_text_detection(**kwargs)
+        yield response
+        if "NextToken" not in response:
+            return
+        kwargs['NextToken'] = response["NextToken"]
 
-    columnas_por_pagina  = {}
-    
-    for page in pages:
-        for item in page["Blocks"]:
-            if item["BlockType"] == "LINE":
-                left = item["Geometry"]["BoundingBox"]["Left"]
-                
-                if left < 0.5:  
-                    columna = "izquierda"
-                else:
-                    columna = "derecha"
-                
-                page_number = item["Page"]
-                
-                if page_number not in columnas_por_pagina:
-                    columnas_por_pagina[page_number] = {"izquierda": [], "derecha": []}
-                columnas_por_pagina[page_number][columna].append(item["Text"])
-
-    combined_text = combinar_columnas(columnas_por_pagina)
-       
-    extracted_text = " ".join(combined_text).replace("&&n", "\n")
-        
-    return extracted_text
+def iterar_paginas(job_id):
+    """
+    Agrupa las líneas detectadas por página del documento a medida que llegan las respuestas de Textract.
+
+    De cada bloque LINE solo se conserva el texto y la posición (Left, Top, Width) de su BoundingBox. Textract
+    devuelve los bloques ordenados por página, así que una página se entrega en cuanto empieza la siguiente.
+
+    Parámetros:
+    - job_id: Identificador del trabajo de Textract.
+
+    Devuelve:
+    - Generador de tuplas (número de página, lista de tuplas (left, top, width, texto)).
+    """
+    current_page = None
+    lines = []
+    for response in iterar_respuestas_textract(job_id):
+        for item in response["Blocks"]:
+            if item["BlockType"] != "LINE":
+                continue
+            page_number = item["Page"]
+            if page_number != current_page:
+                if lines:
+                    yield current_page, lines
+                current_page = page_number
+                lines = []
+            box = item["Geometry"]["BoundingBox"]
+            lines.append((box["Left"], box["Top"], box["Width"], item["Text"]))
+    if lines:
+        yield current_page, lines
+
+def ordenar_pagina(page_number, lines):
+    """
+    Devuelve el texto de una página en orden de lectura.
+
+    Parámetros:
+    - page_number: Número de la página.
+    - lines: Lista de tuplas (left, top, width, texto) de la página.
+
+    Devuelve:
+    - Lista con el texto de las líneas de la página en orden de lectura.
+    """
+    if COLUMN_LAYOUT == 'mitad':
+        return combinar_columnas({page_number: agrupar_columnas(lines)})
+    return column_layout.reading_order(lines)
+
+def agrupar_columnas(lines):
+    """
+    Reparte las líneas de una página entre la columna izquierda y la derecha.
+
+    Parámetros:
+    - lines: Lista de tuplas (left, top, width, texto) de la página, en el orden de Textract.
+
+    Devuelve:
+    - Diccionario con las listas de texto 'izquierda' y 'derecha'.
+    """
+    columnas = {"izquierda": [], "derecha": []}
+    for left, _top, _width, text in lines:
+        columnas["izquierda" if left < 0.5 else "derecha"].append(text)
+    return columnas
     
 def combinar_columnas(columnas_por_pagina):
     """
@@ -9,19 +9,39 @@ y finalmente sube el texto traducido de vuelta al mismo bucket pero potencialmen
 Funciones:
 - main: Función principal que maneja la solicitud HTTP, orquestando el flujo de procesamiento del texto.
 - get_text_storage: Recupera el texto de un documento almacenado en Cloud Storage.
-- detect_language: Utiliza Google Cloud Natural Language para detectar el idioma del texto.
+- detect_language: Detecta el idioma del texto sobre una muestra, con caché por hash del documento.
+- detect_language_translate: Utiliza detect_language de Google Cloud Translate sobre una muestra del texto.
+- detect_language_sentiment: Utiliza Google Cloud Natural Language para detectar el idioma del texto completo.
 - translate_text_to_spanish: Utiliza Google Cloud Translate para traducir el texto al español.
 - upload_text_to_storage: Sube el texto procesado de vuelta a Cloud Storage.
 
+Los clientes de Google Cloud se obtienen de gcp_clients.py y se reutilizan entre peticiones de la misma instancia.
+
 Este módulo es ideal para ser usado en entornos donde se necesite procesamiento automático y traslación de documentos almacenados,
 especialmente útil en entornos multilingües donde la traducción al español es frecuentemente requerida.
 """
+import hashlib
+import os
+
 from google.cloud import language_v1
 from google.cloud import storage
 from google.cloud import translate_v2 as translate
+import gcp_clients
+from common.cache import TTLCache
+from common.text import guess_language, text_sample
 
 BUCKET_NAME = "mi-bucket-pdf"
 
+# Modo de detección del idioma:
+# - 'translate': detect_language de Cloud Translate sobre una muestra del texto (por defecto).
+# - 'local': palabras vacías de cada idioma sobre la muestra; si el resultado no es claro, se usa Translate.
+# - 'sentiment': analyze_sentiment de Natural Language sobre el texto completo (comportamiento anterior).
+LANGUAGE_DETECTION_MODE = os.environ.get('LANGUAGE_DETECTION_MODE', 'translate')
+# Caracteres del principio del documento que se usan para detectar el idioma.
+LANGUAGE_SAMPLE_CHARS = int(os.environ.get('LANGUAGE_SAMPLE_CHARS', '2000'))
+# Idiomas detectados por hash del documento, para no repetir la detección de un mismo texto.
+_language_cache = TTLCache(maxsize=int(os.environ.get('LANGUAGE_CACHE_SIZE', '1024')), ttl=24 * 3600)
+
 def main(request):
     '''Función principal que maneja la solicitud de la función.
 
@@ -31,6 +51,7 @@ def main(request):
     Returns:
         str: El idioma detectado del texto.
     '''
+    gcp_clients.start_request()
     try:
         document_location = request.data.decode("utf-8")
         text = get_text_storage(document_location)
@@ -46,6 +67,8 @@ def main(request):
     except Exception as e:
         print(f"Error en main: {e}")
         return "Error en main"
+    finally:
+        gcp_clients.log_request()
 
 def get_text_storage(document_location):
     '''Obtiene el texto del documento txt almacenado en Google Cloud Storage.
@@ -57,7 +80,7 @@ def get_text_storage(document_location):
         str: El texto del documento.
     '''
     try:
-        storage_client = storage.Client()
+        storage_client = gcp_clients.get('storage', storage.Client)
 
         bucket = storage_client.bucket(BUCKET_NAME)
         blob = bucket.blob(document_location)
@@ -68,7 +91,11 @@ def get_text_storage(document_location):
         return None
 
 def detect_language(text):
-    '''Detecta el idioma del texto utilizando el servicio de lenguaje de Google Cloud.
+    '''Detecta el idioma del texto según el modo configurado en LANGUAGE_DETECTION_MODE.
+
+    En los modos 'translate' y 'local' solo se analiza una muestra de LANGUAGE_SAMPLE_CHARS caracteres,
+    así que el tiempo de detección no depende de la longitud del documento. El resultado se guarda por
+    hash del documento, de modo que volver a procesar el mismo texto no repite la detección.
 
     Args:
         text (str): El texto a analizar.
@@ -77,15 +104,53 @@ def detect_language(text):
         str: El código del idioma detectado.
     '''
     try:
-        language_client = language_v1.LanguageServiceClient()
-
-        document = language_v1.Document(content=text, type_=language_v1.Document.Type.PLAIN_TEXT)
-        response = language_client.analyze_sentiment(request={'document': document})
-        return response.language
+        document_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        language = _language_cache.get((LANGUAGE_DETECTION_MODE, document_hash))
+        if language is not None:
+            return language
+
+        if LANGUAGE_DETECTION_MODE == 'sentiment':
+            language = detect_language_sentiment(text)
+        else:
+            sample = text_sample(text, LANGUAGE_SAMPLE_CHARS)
+            language = guess_language(sample) if LANGUAGE_DETECTION_MODE == 'local' else None
+            if language is None:
+                language = detect_language_translate(sample)
+
+        if language:
+            _language_cache.set((LANGUAGE_DETECTION_MODE, document_hash), language)
+        return language
     except Exception as e:
         print(f"Error en detect_language: {e}")
         return None
 
+def detect_language_translate(sample):
+    '''Detecta el idioma de una muestra del texto con detect_language de Google Cloud Translate.
+
+    Args:
+        sample (str): La muestra del texto a analizar.
+
+    Returns:
+        str: El código del idioma detectado.
+    '''
+    translate_client = gcp_clients.get('translate', translate.Client)
+    return translate_client.detect_language(sample)['language']
+
+def detect_language_sentiment(text):
+    '''Detecta el idioma del texto completo a partir del análisis de sentimiento de Natural Language.
+
+    Args:
+        text (str): El texto a analizar.
+
+    Returns:
+        str: El código del idioma detectado.
+    '''
+    language_client = gcp_clients.get('language', language_v1.LanguageServiceClient)
+
+    document = language_v1.Document(content=text, type_=language_v1.Document.Type.PLAIN_TEXT)
+    response = language_client.analyze_sentiment(request={'document': document})
+    return response.language
+
 def translate_text_to_spanish(text):
     '''Traduce el texto a español utilizando el servicio de traducción de Google Cloud.
 
@@ -96,7 +161,7 @@ def translate_text_to_spanish(text):
         str: El texto traducido.
     '''
     try:
-        translate_client = translate.Client()
+        translate_client = gcp_clients.get('translate', translate.Client)
 
         translation = translate_client.translate(text, target_language='es')
         translated_text = translation['translatedText']
@@ -114,7 +179,7 @@ def upload_text_to_storage(document_location, text):
         text (str): El texto a subir.
     '''
     try:
-        storage_client = storage.Client()
+        storage_client = gcp_clients.get('storage', storage.Client)
 
         bucket = storage_client.bucket(BUCKET_NAME)
         blob = bucket.blob(document_location)
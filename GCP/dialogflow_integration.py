@@ -13,10 +13,13 @@ Funciones:
 - dialogflow_webhook: Procesa la solicitud de Dialogflow y determina la acción a tomar basada en la intención del usuario.
 - start_tutorial: Inicia un tutorial interactivo configurando atributos iniciales de la sesión.
 - handle_step: Avanza a través de los pasos de un tutorial basado en la sesión actual y los atributos almacenados.
+- get_tutorial_manifest: Carga el manifiesto del tutorial desde Cloud Storage una vez por instancia.
+- get_substep_text: Obtiene el texto de un subpaso desde el manifiesto o desde Firestore y Cloud Storage.
 - get_step_content: Recupera contenido específico de un paso de Firestore.
 - handle_question: Responde a preguntas específicas basadas en la intención y el contexto del usuario.
-- get_most_similar_response: Busca en Firestore la respuesta más adecuada a la pregunta del usuario.
-- calculate_similarity: Calcula la similitud entre la entrada del usuario y las preguntas almacenadas para determinar la mejor respuesta.
+- get_most_similar_response: Busca en Firestore la respuesta más adecuada a la pregunta del usuario usando el motor
+  de recuperación compartido (common/retrieval.py), o sugerencias si la más parecida no es lo bastante fiable.
+- find_similar_questions: Devuelve las preguntas de una intención más similares a la del usuario, con su confianza.
 - build_response: Construye y devuelve una respuesta formateada para Dialogflow.
 - read_text_from_file: Lee el contenido de un archivo de texto almacenado en Cloud Storage.
 
@@ -25,7 +28,13 @@ Services para manejar y responder a las interacciones del usuario.
 """
 import os
 import json
+import time
 from google.cloud import storage, firestore
+from common.concurrency import map_in_order
+from common.manifest import MANIFEST_FILE, parse_manifest, step_entries
+from common.retrieval import (DEFAULT_MIN_CONFIDENCE, DEFAULT_SUGGESTION_COUNT, NO_ANSWER_MESSAGE,
+                              TOKEN_VERSION_FIELD, TOKENS_FIELD, candidate_count, choose_answer, stored_tokens,
+                              stream_top_k, tokenize)
 
 storage_client = storage.Client()
 db = firestore.Client()
@@ -33,6 +42,20 @@ db = firestore.Client()
 bucket_name = os.environ['bucket_name']
 folder_name = os.environ['folder_name']
 
+# Confianza mínima para responder directamente y número de preguntas sugeridas si no se alcanza
+# (ver common.retrieval.choose_answer).
+MIN_CONFIDENCE = float(os.environ.get('MIN_CONFIDENCE', DEFAULT_MIN_CONFIDENCE))
+SUGGESTION_COUNT = int(os.environ.get('SUGGESTION_COUNT', DEFAULT_SUGGESTION_COUNT))
+
+# Número máximo de subpasos que se descargan en paralelo (1 = en serie).
+STEP_FETCH_WORKERS = int(os.environ.get('STEP_FETCH_WORKERS', '5'))
+
+# Manifiesto del tutorial (common/manifest.py) publicado junto a los ficheros en Cloud Storage.
+# Se lee una vez por instancia; si no existe se usan los documentos de 'chatbotsteps'.
+MANIFEST_TTL_SECONDS = int(os.environ.get('MANIFEST_TTL_SECONDS', '3600'))
+LEGACY_STEP_SUBSTEPS = {0: 1, 1: 1, 2: 2, 3: 5, 4: 3, 5: 3, 6: 1}
+_manifest = {'loaded_at': None, 'manifest': None}
+
 def dialogflow_webhook(request):
     """
     Función principal que maneja las solicitudes entrantes de Dialogflow.
@@ -101,28 +124,74 @@ def handle_step(session_attributes, session, next_step):
     Retorna:
     - Un diccionario con el mensaje del paso o subpaso correspondiente y los atributos de la sesión actualizados.
     """
-    step_substep = {0: 1, 1: 1, 2: 2, 3: 5, 4: 3, 5: 3, 6: 1}
+    manifest = get_tutorial_manifest()
+    last_step = max(manifest['steps']) if manifest else 6
 
     if next_step:
         step = int(session_attributes.get('step', 0))
     else:
         step = int(session_attributes.get('stepNumber', 1))
         session_attributes['step'] = step
-        if step < 1 or step > 6:
-            message = "Lo siento, el paso especificado no es válido. Por favor, elige un paso entre 1 y 7."
+        if step < 1 or step > last_step:
+            message = f"Lo siento, el paso especificado no es válido. Por favor, elige un paso entre 1 y {last_step}."
             return build_response([message], session, session_attributes)
 
-    response_messages = []
+    if manifest is None:
+        sources = [(substep, None, None) for substep in range(1, LEGACY_STEP_SUBSTEPS.get(step, 1) + 1)]
+    else:
+        sources = [(entry['substep'], entry['key'], entry.get('text')) for entry in step_entries(manifest, step)]
 
-    for substep in range(1, step_substep.get(step, 1) + 1):
-        file_name = get_step_content(step, substep)
-        text = read_text_from_file(file_name)
-        response_messages.append(text)
+    response_messages = map_in_order(
+        lambda source: get_substep_text(step, *source),
+        sources,
+        max_workers=STEP_FETCH_WORKERS,
+        on_error=lambda source, e: "Ocurrió un error al obtener el contenido del paso."
+    ) or ["No se encontró contenido para este paso y subpaso."]
 
     session_attributes['step'] = step + 1
 
     return build_response(response_messages, session, session_attributes)
 
+def get_tutorial_manifest():
+    """
+    Devuelve el manifiesto del tutorial, leyéndolo de Cloud Storage como mucho una vez cada MANIFEST_TTL_SECONDS.
+
+    Retorna:
+    - El manifiesto cargado, o None si no se ha publicado o no se puede leer.
+    """
+    loaded_at = _manifest['loaded_at']
+    if loaded_at is not None and time.monotonic() - loaded_at < MANIFEST_TTL_SECONDS:
+        return _manifest['manifest']
+
+    try:
+        blob = storage_client.bucket(bucket_name).blob(f"{folder_name}/{MANIFEST_FILE}")
+        _manifest['manifest'] = parse_manifest(blob.download_as_text())
+        print(f"Manifiesto del tutorial cargado, versión {_manifest['manifest']['version']}.")
+    except Exception as e:
+        print(f"No se pudo cargar el manifiesto del tutorial: {e}")
+    # También se anota cuando no existe, para no repetir la lectura en cada turno.
+    _manifest['loaded_at'] = time.monotonic()
+    return _manifest['manifest']
+
+def get_substep_text(step, substep, file_name=None, text=None):
+    """
+    Obtiene el texto de un subpaso a partir de los datos del manifiesto o, si no los hay, de Firestore.
+
+    Parámetros:
+    - step: El paso actual del tutorial.
+    - substep: El subpaso actual dentro del paso.
+    - file_name: El nombre del fichero si lo indica el manifiesto.
+    - text: El texto si está incrustado en el manifiesto.
+
+    Retorna:
+    - El texto del subpaso.
+    """
+    if text is not None:
+        return text
+    if file_name is None:
+        file_name = get_step_content(step, substep)
+    return read_text_from_file(file_name)
+
 def get_step_content(step, substep):
     """
     Obtiene el contenido del paso y subpaso actuales desde Firestore.
@@ -164,46 +233,62 @@ def get_most_similar_response(intent_name, user_input):
     """
     Busca la respuesta más similar a la pregunta del usuario en Firestore.
 
+    La búsqueda se hace en dos fases: primero se ordenan las preguntas (find_similar_questions) y después
+    se lee únicamente la respuesta del documento ganador. Si common.retrieval.choose_answer no lo
+    considera fiable (no alcanza MIN_CONFIDENCE o empata con el segundo), no se lee ninguna respuesta y se
+    sugieren las preguntas más parecidas; si ninguna pregunta comparte términos con la del usuario, tampoco.
+
     Parámetros:
     - intent_name: El nombre de la intención que contiene la pregunta.
     - user_input: La pregunta realizada por el usuario.
 
     Retorna:
-    - La respuesta más similar encontrada en Firestore o un mensaje de error si no se encuentra una respuesta.
+    - La respuesta más similar encontrada en Firestore, las sugerencias o un mensaje de error si no se encuentra una respuesta.
     """
     try:
-        docs = db.collection("chatbotresponses").where('IntentName', '==', intent_name).stream()
-
-        max_similarity = -1
-        best_response = "Lo siento, no tengo la respuesta a esa pregunta en este momento."
-        for doc in docs:
-            item = doc.to_dict()
-            similarity = calculate_similarity(user_input, item['Question'])
-            if similarity > max_similarity:
-                max_similarity = similarity
-                best_response = item['Response']
-        
-        return best_response
+        results = find_similar_questions(intent_name, user_input, k=candidate_count(SUGGESTION_COUNT))
+        document, message = choose_answer(results, MIN_CONFIDENCE, SUGGESTION_COUNT)
+        if document is None:
+            if results:
+                print(f"Confianza baja ({results[0][0]:.2f}) para '{user_input}', se ofrecen sugerencias.")
+            return message
+
+        snapshot = db.collection("chatbotresponses").document(document['id']).get(field_paths=['Response'])
+        if not snapshot.exists:
+            return NO_ANSWER_MESSAGE
+        return snapshot.to_dict().get('Response', NO_ANSWER_MESSAGE)
 
     except Exception as e:
         print(f"Error al obtener la respuesta desde Firestore: {e}")
         return "Lo siento, ocurrió un error al procesar tu solicitud."
 
-def calculate_similarity(user_input, stored_question):
+def find_similar_questions(intent_name, user_input, k=1):
     """
-    Calcula la similitud entre la pregunta del usuario y las preguntas almacenadas.
+    Devuelve las k preguntas de la intención más similares a la del usuario, con su confianza.
+
+    Solo se leen las preguntas y sus términos, puntuándolas a medida que llegan del stream de Firestore y
+    conservando solo las mejores (common.retrieval.stream_top_k). El stream se abandona en cuanto aparece
+    una pregunta con exactamente los mismos términos que la del usuario, y si la pregunta del usuario no
+    tiene ningún término no se consulta Firestore.
 
     Parámetros:
+    - intent_name: El nombre de la intención que contiene la pregunta.
     - user_input: La pregunta realizada por el usuario.
-    - stored_question: La pregunta almacenada en Firestore.
+    - k: Número máximo de preguntas.
 
     Retorna:
-    - Un valor de similitud basado en la cantidad de palabras comunes entre las preguntas.
+    - Lista de tuplas (confianza, documento) de mejor a peor; vacía si ninguna pregunta comparte términos con la del usuario.
     """
-    user_words = set(user_input.lower().split())
-    question_words = set(stored_question.lower().split())
-    common_words = user_words.intersection(question_words)
-    return len(common_words) / max(len(user_words), len(question_words))
+    if not tokenize(user_input):
+        return []
+    docs = db.collection("chatbotresponses").where('IntentName', '==', intent_name) \
+        .select(['Question', TOKENS_FIELD, TOKEN_VERSION_FIELD]).stream()
+    return stream_top_k(
+        ({'text': item['Question'], 'tokens': stored_tokens(item), 'id': doc.id}
+         for doc, item in ((doc, doc.to_dict()) for doc in docs)),
+        user_input,
+        k=k
+    )
 
 def build_response(messages, session, session_attributes):
     """
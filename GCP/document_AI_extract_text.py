@@ -6,17 +6,62 @@ Adicionalmente, envía notificaciones sobre el estado del procesamiento usando C
 Funciones:
 - process_pdf_async: Realiza la llamada asincrónica a Google Document AI para procesar el documento PDF y extraer el texto.
 - extract_text_and_save: Es el punto de entrada para eventos de Google Cloud Functions que maneja la lógica de extracción y almacenamiento de texto.
+- procesar_pdf_async: Extrae, guarda y notifica un PDF, limitando los documentos en curso con un semáforo.
+- extraer_texto_async: Extrae el texto de un PDF, dividiéndolo en fragmentos de páginas si Document AI lo rechaza por largo.
+- procesar_documento_entero: Extrae el texto de un PDF sin dividirlo.
+- dividir_pdf: Divide un PDF en fragmentos de como mucho SHARD_MAX_PAGES páginas.
+- buscar_resultado_en_cache: Busca en la caché de resultados un PDF con el mismo contenido ya procesado.
+- ruta_en_cache: Devuelve la ruta del texto guardado en la caché para un contenido.
+- copiar_resultado_en_cache: Copia el fichero de texto de la caché a la ruta de salida de un PDF.
+- registrar_resultado_en_cache: Guarda en la caché el texto generado para un PDF y lo registra en Firestore.
 - guardar_texto_en_storage: Guarda el texto procesado en Google Cloud Storage y envía una notificación a través de Cloud Tasks.
+- guardar_texto_en_storage_async: Versión asíncrona de guardar_texto_en_storage.
 - enviar_notificacion: Envía una notificación utilizando Google Cloud Tasks para indicar que el procesamiento del documento ha concluido.
+- enviar_notificacion_async: Versión asíncrona de enviar_notificacion.
+- batch_extract_text: Punto de entrada HTTP del modo por lotes, que procesa todos los PDF pendientes con batch_process_documents.
+- listar_pdfs_pendientes: Busca los PDF de la carpeta de entrada que todavía no tienen su fichero de texto.
+- procesar_lote: Envía un lote de PDF a Document AI y devuelve la operación de larga duración.
+- guardar_resultados_lote: Une los fragmentos JSON que devuelve un lote y guarda el texto de cada documento.
+- leer_documento_fragmentado: Lee y une en orden los fragmentos JSON de un documento procesado por lotes.
+- nombre_archivo_salida: Devuelve la ruta del fichero de texto correspondiente a un PDF.
+
+Todo el procesamiento en línea se ejecuta en un único bucle de eventos persistente (common.concurrency.BackgroundLoop)
+que vive mientras la instancia siga activa. Así, los clientes asíncronos de Document AI y Cloud Tasks, ligados a ese
+bucle, se reutilizan entre peticiones, y las peticiones simultáneas se solapan en el mismo bucle con como mucho
+MAX_CONCURRENT_DOCUMENTS documentos en curso (el semáforo del bucle, BackgroundLoop.limiter). La subida a Cloud Storage, que solo tiene cliente
+síncrono, se ejecuta en un hilo con asyncio.to_thread. Los clientes se obtienen de gcp_clients.py.
+
+El procesamiento en línea de Document AI limita las páginas por petición. Los PDF se envían enteros por su URI, y solo
+si Document AI los rechaza por superar ese límite (y pypdf está instalado) se descargan y se dividen en fragmentos de
+SHARD_MAX_PAGES páginas consecutivas que se procesan en paralelo; sus textos se unen en el orden de las páginas. Así,
+los documentos cortos, que son la mayoría, no pagan la descarga ni la lectura del PDF.
+
+Si se configura la colección de Firestore result_cache_collection, los PDF cuyo contenido (md5Hash) ya se procesó con
+la misma versión del proceso (PIPELINE_VERSION) no vuelven a enviarse a Document AI: se copia a su ruta de salida el
+texto guardado en la caché y se envía la notificación como siempre. El texto de la caché se guarda una sola vez en una
+ruta propia del contenido (result_cache_prefix/<clave>.txt), de modo que volver a subir un PDF con otro contenido y
+sobrescribir su fichero de salida no cambia lo que se sirve para el contenido anterior.
 
 Este módulo es ideal para integrarse en flujos de trabajo donde los documentos PDF necesitan ser procesados automáticamente y los resultados almacenados accesiblemente para su posterior uso.
 """
+import io
 import os
+import json
 import asyncio
+from google.api_core import exceptions
 from google.api_core.client_options import ClientOptions
+from google.cloud import firestore
 from google.cloud import storage
 from google.cloud import tasks_v2
 from google.cloud import documentai_v1beta3 as documentai
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pypdf es opcional: sin él no se dividen los PDF largos
+    PdfReader = PdfWriter = None
+import gcp_clients
+from common.concurrency import BackgroundLoop, map_in_order
+from common.content import result_cache_key
+from common.text import assemble_text
 
 
 endpoint = os.environ['endpoint']
@@ -26,22 +71,63 @@ input_bucket = os.environ['input_bucket']
 output_bucket = os.environ['output_bucket']
 url_funcion_destino = os.environ['url_funcion_destino']
 
-async def process_pdf_async(content):
+# Modo por lotes: bucket con los PDF (si la petición no lo indica), carpeta donde Document AI deja los
+# resultados JSON, número máximo de documentos por operación, tiempo máximo de espera de cada operación
+# y número de documentos cuyos resultados se guardan a la vez.
+documents_bucket = os.environ.get('documents_bucket')
+BATCH_OUTPUT_PREFIX = os.environ.get('batch_output_prefix', 'documentai-lotes')
+BATCH_MAX_DOCUMENTS = int(os.environ.get('BATCH_MAX_DOCUMENTS', '1000'))
+BATCH_TIMEOUT_SECONDS = int(os.environ.get('BATCH_TIMEOUT_SECONDS', '1800'))
+BATCH_RESULT_WORKERS = int(os.environ.get('BATCH_RESULT_WORKERS', '8'))
+
+# Número máximo de documentos que se procesan a la vez en el bucle compartido.
+MAX_CONCURRENT_DOCUMENTS = int(os.environ.get('MAX_CONCURRENT_DOCUMENTS', '16'))
+_event_loop = BackgroundLoop('documentai-loop')
+
+# Páginas de cada fragmento en que se dividen los PDF que superan el límite de páginas del procesamiento en línea
+# (15 en los procesadores OCR) y fragmentos de un mismo PDF que se procesan a la vez.
+SHARD_MAX_PAGES = int(os.environ.get('SHARD_MAX_PAGES', '15'))
+SHARD_WORKERS = int(os.environ.get('SHARD_WORKERS', '4'))
+
+# Caché de resultados por contenido: colección de Firestore (desactivada si no se indica), carpeta del bucket donde se
+# guarda el texto de cada contenido y versión del proceso de extracción, que forma parte de la clave. Los contadores se
+# muestran en los registros.
+result_cache_collection = os.environ.get('result_cache_collection')
+RESULT_CACHE_PREFIX = os.environ.get('result_cache_prefix', 'documentai-cache')
+PIPELINE_VERSION = os.environ.get('PIPELINE_VERSION', 'documentai-v1')
+_cache_stats = {'aciertos': 0, 'fallos': 0}
+
+
+class LimitePaginasExcedido(Exception):
+    '''Document AI ha rechazado el documento por superar el límite de páginas del procesamiento en línea.'''
+
+async def process_pdf_async(content, raw_content=None):
     '''Procesa un documento PDF asincrónicamente y extrae su texto.
 
     Args:
         content (str): URI del PDF en Google Cloud Storage.
+        raw_content (bytes): Contenido del PDF (o de un fragmento). Si se indica, se envía en la petición en lugar
+            de la URI.
 
     Returns:
         str: Texto extraído del documento PDF.
+
+    Raises:
+        LimitePaginasExcedido: Si el documento supera el límite de páginas del procesamiento en línea.
     '''
     try:        
-        client = documentai.DocumentProcessorServiceAsyncClient(client_options=ClientOptions(api_endpoint=endpoint))
+        client = gcp_clients.get_for_loop(
+            'documentai',
+            lambda: documentai.DocumentProcessorServiceAsyncClient(client_options=ClientOptions(api_endpoint=endpoint))
+        )
         name=client.processor_path(project_id,'eu',processor_id)
         
-        gcs_document = documentai.GcsDocument(gcs_uri=content, mime_type='application/pdf')
-        
-        request = documentai.ProcessRequest(name=name, gcs_document=gcs_document)
+        if raw_content is not None:
+            raw_document = documentai.RawDocument(content=raw_content, mime_type='application/pdf')
+            request = documentai.ProcessRequest(name=name, raw_document=raw_document)
+        else:
+            gcs_document = documentai.GcsDocument(gcs_uri=content, mime_type='application/pdf')
+            request = documentai.ProcessRequest(name=name, gcs_document=gcs_document)
         
         response=await client.process_document(request=request)
 
@@ -49,6 +135,10 @@ async def process_pdf_async(content):
                
         return document.text
 
+    except exceptions.InvalidArgument as e:
+        if 'page' in str(e).lower() and 'limit' in str(e).lower():
+            raise LimitePaginasExcedido(str(e)) from e
+        print(f"Hubo un error {e}")
     except Exception as e:
         print(f"Hubo un error {e}")
 
@@ -59,25 +149,233 @@ def extract_text_and_save(data, context):
         data (dict): Datos del evento de Cloud Functions.
         context (google.cloud.functions.Context): Contexto del evento.
     '''
+    gcp_clients.start_request()
     try:
 
         file_name = data['name']
         bucket_name = data['bucket']
         
         if file_name.endswith('.pdf') and file_name.startswith(input_bucket):         
-            content_uri = f"gs://{bucket_name}/{file_name}"
-
-            texto_extraido = asyncio.run(process_pdf_async(content_uri))
-            
-            if texto_extraido:
-                texto_unido = " ".join(texto_extraido.split()).replace("&&n", "\n")
-                guardar_texto_en_storage(texto_unido, file_name, bucket_name)
+            _event_loop.run(procesar_pdf_async(file_name, bucket_name, data.get('md5Hash')))
            
         else:
             print('No se realiza ninguna acción')
        
     except Exception as e:
-        print(f"Hubo un error al extraer y guardar el texto: {e}")       
+        print(f"Hubo un error al extraer y guardar el texto: {e}")
+    finally:
+        gcp_clients.log_request()
+
+async def procesar_pdf_async(file_name, bucket_name, content_hash=None):
+    '''Extrae el texto de un PDF, lo guarda en Cloud Storage y envía la notificación.
+
+    Como mucho MAX_CONCURRENT_DOCUMENTS documentos pasan a la vez por este proceso; el resto espera en el semáforo.
+    Si el contenido del PDF está en la caché de resultados, se copia el texto guardado en lugar de extraerlo.
+
+    Args:
+        file_name (str): Ruta del PDF en el bucket.
+        bucket_name (str): Nombre del bucket de Cloud Storage.
+        content_hash (str): md5Hash del PDF si viene en el evento; si no, se consulta cuando la caché está activa.
+
+    Returns:
+        bool: True si el texto se ha extraído y guardado.
+    '''
+    async with _event_loop.limiter(MAX_CONCURRENT_DOCUMENTS):
+        cache_key = None
+        if result_cache_collection:
+            cache_key, en_cache = await asyncio.to_thread(buscar_resultado_en_cache, file_name, bucket_name, content_hash)
+            if en_cache is not None and await asyncio.to_thread(copiar_resultado_en_cache, en_cache, file_name, bucket_name):
+                _cache_stats['aciertos'] += 1
+                print(f"Resultado en caché para gs://{bucket_name}/{file_name} (caché: {_cache_stats})")
+                await enviar_notificacion_async(nombre_archivo_salida(file_name))
+                return True
+            _cache_stats['fallos'] += 1
+            print(f"gs://{bucket_name}/{file_name} no está en la caché (caché: {_cache_stats})")
+
+        textos_extraidos = await extraer_texto_async(file_name, bucket_name)
+        if not textos_extraidos or not any(textos_extraidos):
+            return False
+        texto_unido = assemble_text(textos_extraidos, normalize_whitespace=True)
+        guardado = await guardar_texto_en_storage_async(texto_unido, file_name, bucket_name)
+        if guardado and cache_key:
+            await asyncio.to_thread(registrar_resultado_en_cache, cache_key, texto_unido, file_name, bucket_name)
+        return guardado
+
+def buscar_resultado_en_cache(file_name, bucket_name, content_hash=None):
+    '''Busca en la caché de resultados un PDF con el mismo contenido procesado con la misma versión.
+
+    Args:
+        file_name (str): Ruta del PDF en el bucket.
+        bucket_name (str): Nombre del bucket de Cloud Storage.
+        content_hash (str): md5Hash del PDF; si no se indica, se leen los metadatos del objeto.
+
+    Returns:
+        tuple: Clave de la caché (o None si no se pudo calcular) y datos del resultado guardado (o None).
+    '''
+    try:
+        if not content_hash:
+            blob = gcp_clients.get('storage', storage.Client).bucket(bucket_name).get_blob(file_name)
+            content_hash = blob.md5_hash if blob is not None else None
+        cache_key = result_cache_key(PIPELINE_VERSION, content_hash)
+        if cache_key is None:
+            return None, None
+        db = gcp_clients.get('firestore', firestore.Client)
+        snapshot = db.collection(result_cache_collection).document(cache_key).get()
+        en_cache = snapshot.to_dict() if snapshot.exists else None
+        if en_cache is not None and en_cache.get('ResultKey') != ruta_en_cache(cache_key):
+            # Entrada que apunta a un fichero de salida, que puede haberse sobrescrito: se trata como un fallo.
+            en_cache = None
+        return cache_key, en_cache
+    except Exception as e:
+        print(f"No se pudo consultar la caché de resultados: {e}")
+        return None, None
+
+def ruta_en_cache(cache_key):
+    '''Devuelve la ruta del texto guardado en la caché para un contenido.
+
+    Args:
+        cache_key (str): Clave de la caché del contenido del PDF.
+
+    Returns:
+        str: Ruta del fichero de texto dentro de RESULT_CACHE_PREFIX.
+    '''
+    return f"{RESULT_CACHE_PREFIX}/{cache_key}.txt"
+
+def copiar_resultado_en_cache(en_cache, file_name, bucket_name):
+    '''Copia el fichero de texto guardado en la caché a la ruta de salida de un PDF.
+
+    Args:
+        en_cache (dict): Datos del resultado guardado (ResultBucket y ResultKey).
+        file_name (str): Ruta del PDF en el bucket.
+        bucket_name (str): Nombre del bucket de Cloud Storage.
+
+    Returns:
+        bool: True si el fichero de salida está disponible; False si hay que procesar el PDF.
+    '''
+    try:
+        cliente_storage = gcp_clients.get('storage', storage.Client)
+        bucket_origen = cliente_storage.bucket(en_cache['ResultBucket'])
+        bucket_origen.copy_blob(bucket_origen.blob(en_cache['ResultKey']), cliente_storage.bucket(bucket_name),
+                                nombre_archivo_salida(file_name))
+        return True
+    except Exception as e:
+        print(f"No se pudo copiar el resultado de la caché: {e}")
+        return False
+
+def registrar_resultado_en_cache(cache_key, texto, file_name, bucket_name):
+    '''Guarda el texto generado para un PDF en la ruta de la caché de su contenido y lo registra en Firestore.
+
+    Args:
+        cache_key (str): Clave de la caché del contenido del PDF.
+        texto (str): Texto extraído del PDF.
+        file_name (str): Ruta del PDF en el bucket.
+        bucket_name (str): Nombre del bucket de Cloud Storage.
+    '''
+    try:
+        nombre_cache = ruta_en_cache(cache_key)
+        bucket = gcp_clients.get('storage', storage.Client).bucket(bucket_name)
+        bucket.blob(nombre_cache).upload_from_string(texto, content_type='text/plain; charset=utf-8')
+        db = gcp_clients.get('firestore', firestore.Client)
+        db.collection(result_cache_collection).document(cache_key).set({
+            'ResultBucket': bucket_name,
+            'ResultKey': nombre_cache,
+            'SourceKey': file_name,
+            'PipelineVersion': PIPELINE_VERSION,
+            'CreatedAt': firestore.SERVER_TIMESTAMP
+        })
+    except Exception as e:
+        print(f"No se pudo registrar el resultado en la caché: {e}")
+
+async def extraer_texto_async(file_name, bucket_name):
+    '''Extrae el texto de un PDF, dividiéndolo en fragmentos de SHARD_MAX_PAGES páginas si Document AI lo rechaza por largo.
+
+    El PDF se envía primero entero por su URI, de modo que los documentos que caben en una petición no se descargan. Si
+    Document AI lo rechaza por superar el límite de páginas y pypdf está disponible, se descarga, se divide y los
+    fragmentos se envían en paralelo (como mucho SHARD_WORKERS a la vez); sus textos se devuelven en el orden de las
+    páginas, sin unirlos, para que assemble_text los componga sin copias intermedias.
+
+    Args:
+        file_name (str): Ruta del PDF en el bucket.
+        bucket_name (str): Nombre del bucket de Cloud Storage.
+
+    Returns:
+        list: Textos extraídos de cada fragmento en el orden de las páginas, o None si no se han podido extraer.
+    '''
+    content_uri = f"gs://{bucket_name}/{file_name}"
+    try:
+        return await procesar_documento_entero(content_uri)
+    except LimitePaginasExcedido as e:
+        if PdfReader is None:
+            print(f"{content_uri} supera el límite de páginas y pypdf no está disponible para dividirlo: {e}")
+            return None
+        print(f"{content_uri} supera el límite de páginas, se divide en fragmentos de {SHARD_MAX_PAGES} páginas")
+
+    try:
+        cliente_storage = gcp_clients.get('storage', storage.Client)
+        blob = cliente_storage.bucket(bucket_name).blob(file_name)
+        contenido = await asyncio.to_thread(blob.download_as_bytes)
+        fragmentos = await asyncio.to_thread(dividir_pdf, contenido, SHARD_MAX_PAGES)
+    except Exception as e:
+        print(f"No se pudo dividir {content_uri}: {e}")
+        return None
+
+    limite = asyncio.Semaphore(SHARD_WORKERS)
+
+    async def procesar_fragmento(fragmento):
+        async with limite:
+            try:
+                return await process_pdf_async(content_uri, raw_content=fragmento)
+            except LimitePaginasExcedido as e:
+                print(f"Un fragmento de {content_uri} sigue superando el límite de páginas: {e}")
+                return None
+
+    textos = await asyncio.gather(*(procesar_fragmento(fragmento) for fragmento in fragmentos))
+    if any(texto is None for texto in textos):
+        print(f"Algún fragmento de {content_uri} no se ha podido procesar")
+        return None
+    print(f"{content_uri} procesado en {len(fragmentos)} fragmentos")
+    return textos
+
+async def procesar_documento_entero(content_uri):
+    '''Procesa un PDF entero por su URI y devuelve su texto como único fragmento.
+
+    Args:
+        content_uri (str): URI gs:// del PDF.
+
+    Returns:
+        list: Lista con el texto del documento, o None si no se ha podido extraer.
+
+    Raises:
+        LimitePaginasExcedido: Si el documento supera el límite de páginas del procesamiento en línea.
+    '''
+    texto = await process_pdf_async(content_uri)
+    return None if texto is None else [texto]
+
+def dividir_pdf(contenido, paginas_por_fragmento):
+    '''Divide un PDF en fragmentos de páginas consecutivas.
+
+    Args:
+        contenido (bytes): Contenido del PDF.
+        paginas_por_fragmento (int): Número máximo de páginas de cada fragmento.
+
+    Returns:
+        list: Contenido de cada fragmento en el orden de las páginas. Si el PDF cabe en un fragmento, una lista con
+            el contenido original.
+    '''
+    reader = PdfReader(io.BytesIO(contenido))
+    paginas = len(reader.pages)
+    if paginas <= paginas_por_fragmento:
+        return [contenido]
+
+    fragmentos = []
+    for inicio in range(0, paginas, paginas_por_fragmento):
+        writer = PdfWriter()
+        for pagina in reader.pages[inicio:inicio + paginas_por_fragmento]:
+            writer.add_page(pagina)
+        salida = io.BytesIO()
+        writer.write(salida)
+        fragmentos.append(salida.getvalue())
+    return fragmentos
 
 
 def guardar_texto_en_storage(texto, nombre_archivo, nombre_bucket):
@@ -87,31 +385,68 @@ def guardar_texto_en_storage(texto, nombre_archivo, nombre_bucket):
         texto (str): Texto extraído del documento PDF.
         nombre_archivo (str): Nombre del archivo PDF.
         nombre_bucket (str): Nombre del bucket de Cloud Storage.
+
+    Returns:
+        bool: True si el texto se ha guardado.
+    '''
+    return _event_loop.run(guardar_texto_en_storage_async(texto, nombre_archivo, nombre_bucket))
+
+async def guardar_texto_en_storage_async(texto, nombre_archivo, nombre_bucket):
+    '''Guarda el texto extraído en Cloud Storage sin bloquear el bucle y envía la notificación.
+
+    Args:
+        texto (str): Texto extraído del documento PDF.
+        nombre_archivo (str): Nombre del archivo PDF.
+        nombre_bucket (str): Nombre del bucket de Cloud Storage.
+
+    Returns:
+        bool: True si el texto se ha guardado.
     '''
     try:
         # Generar el nombre de archivo de salida
-        nombre_archivo_salida = nombre_archivo.replace(input_bucket, output_bucket).replace('.pdf', '.txt')
+        nombre_salida = nombre_archivo_salida(nombre_archivo)
 
-        # Obtener el bucket
-        cliente_storage = storage.Client()
-        bucket = cliente_storage.get_bucket(nombre_bucket)
+        # Obtener el bucket (sin llamada a la API: solo se necesita la referencia)
+        cliente_storage = gcp_clients.get('storage', storage.Client)
+        bucket = cliente_storage.bucket(nombre_bucket)
 
-        # Crear el blob de salida y subir el texto
-        blob_salida = bucket.blob(nombre_archivo_salida)
-        blob_salida.upload_from_string(texto, content_type='text/plain; charset=utf-8')
-        enviar_notificacion(nombre_archivo_salida)
-        print(f'Texto extraído y guardado en gs://{nombre_bucket}/{nombre_archivo_salida}')
+        # Crear el blob de salida y subir el texto en un hilo, ya que el cliente de Storage es síncrono
+        blob_salida = bucket.blob(nombre_salida)
+        await asyncio.to_thread(blob_salida.upload_from_string, texto, content_type='text/plain; charset=utf-8')
+        await enviar_notificacion_async(nombre_salida)
+        print(f'Texto extraído y guardado en gs://{nombre_bucket}/{nombre_salida}')
+        return True
     except Exception as e:
         print(f"Hubo un error al guardar el texto en Cloud Storage: {e}")
+        return False
+
+def nombre_archivo_salida(nombre_archivo):
+    '''Devuelve la ruta del fichero de texto correspondiente a un PDF de la carpeta de entrada.
+
+    Args:
+        nombre_archivo (str): Ruta del PDF en el bucket.
+
+    Returns:
+        str: Ruta del fichero de texto en la carpeta de salida.
+    '''
+    return nombre_archivo.replace(input_bucket, output_bucket).replace('.pdf', '.txt')
 
 def enviar_notificacion(text):
     '''Envía una notificación indicando que el archivo ya ha sido procesado.
 
+    Args:
+        text (str): Texto para la notificación. Contiene la localización del archivo txt
+    '''
+    _event_loop.run(enviar_notificacion_async(text))
+
+async def enviar_notificacion_async(text):
+    '''Envía de forma asíncrona una notificación indicando que el archivo ya ha sido procesado.
+
     Args:
         text (str): Texto para la notificación. Contiene la localización del archivo txt
     '''
     try:
-        client = tasks_v2.CloudTasksClient()
+        client = gcp_clients.get_for_loop('tasks_async', tasks_v2.CloudTasksAsyncClient)
         parent = client.queue_path(project_id, "europe-west6", "task-completed-queue") 
 
         task = {
@@ -123,6 +458,159 @@ def enviar_notificacion(text):
             }
         }
 
-        client.create_task(request={"parent": parent, "task": task})
+        await client.create_task(request={"parent": parent, "task": task})
     except Exception as e:
         print("No se pudo enviar la notificacion: ", e)
+
+def batch_extract_text(request):
+    '''Punto de entrada HTTP del modo por lotes.
+
+    Busca los PDF de la carpeta de entrada que todavía no tienen fichero de texto, los envía a Document AI con
+    batch_process_documents en operaciones de como mucho BATCH_MAX_DOCUMENTS documentos (todas a la vez) y,
+    a medida que terminan, guarda el texto de cada documento en la carpeta de salida igual que el modo en línea.
+    Pensado para cargas iniciales o reprocesados de muchos documentos.
+
+    Args:
+        request (flask.Request): La solicitud HTTP. Su cuerpo JSON puede indicar 'bucket' y 'limit'.
+
+    Returns:
+        str: Resumen en JSON con los documentos pendientes, procesados y fallidos.
+    '''
+    gcp_clients.start_request()
+    resumen = {'pendientes': 0, 'operaciones': 0, 'procesados': 0, 'fallidos': []}
+    try:
+        parametros = request.get_json(silent=True) or {}
+        nombre_bucket = parametros.get('bucket', documents_bucket)
+        pendientes = listar_pdfs_pendientes(nombre_bucket, parametros.get('limit'))
+        resumen['pendientes'] = len(pendientes)
+
+        lotes = [pendientes[i:i + BATCH_MAX_DOCUMENTS] for i in range(0, len(pendientes), BATCH_MAX_DOCUMENTS)]
+        operaciones = [procesar_lote(nombre_bucket, lote) for lote in lotes]
+        resumen['operaciones'] = len(operaciones)
+
+        for operacion in operaciones:
+            procesados, fallidos = guardar_resultados_lote(operacion, nombre_bucket)
+            resumen['procesados'] += procesados
+            resumen['fallidos'].extend(fallidos)
+    except Exception as e:
+        print(f"Hubo un error en el procesamiento por lotes: {e}")
+        resumen['error'] = str(e)
+    finally:
+        gcp_clients.log_request()
+
+    print(f"Procesamiento por lotes: {resumen}")
+    return json.dumps(resumen)
+
+def listar_pdfs_pendientes(nombre_bucket, limite=None):
+    '''Busca los PDF de la carpeta de entrada que todavía no tienen su fichero de texto en la carpeta de salida.
+
+    Args:
+        nombre_bucket (str): Nombre del bucket de Cloud Storage.
+        limite (int): Número máximo de documentos a devolver. Sin límite si es None.
+
+    Returns:
+        list: Rutas de los PDF pendientes, ordenadas.
+    '''
+    cliente_storage = gcp_clients.get('storage', storage.Client)
+    procesados = {blob.name for blob in cliente_storage.list_blobs(nombre_bucket, prefix=output_bucket)}
+    pendientes = sorted(
+        blob.name for blob in cliente_storage.list_blobs(nombre_bucket, prefix=input_bucket)
+        if blob.name.endswith('.pdf') and nombre_archivo_salida(blob.name) not in procesados
+    )
+    return pendientes[:int(limite)] if limite else pendientes
+
+def procesar_lote(nombre_bucket, nombres_archivo):
+    '''Envía un lote de PDF a Document AI con batch_process_documents.
+
+    Args:
+        nombre_bucket (str): Nombre del bucket de Cloud Storage.
+        nombres_archivo (list): Rutas de los PDF del lote.
+
+    Returns:
+        Operation: La operación de larga duración del lote.
+    '''
+    client = gcp_clients.get(
+        'documentai_batch',
+        lambda: documentai.DocumentProcessorServiceClient(client_options=ClientOptions(api_endpoint=endpoint))
+    )
+    input_config = documentai.BatchDocumentsInputConfig(
+        gcs_documents=documentai.GcsDocuments(documents=[
+            documentai.GcsDocument(gcs_uri=f"gs://{nombre_bucket}/{nombre}", mime_type='application/pdf')
+            for nombre in nombres_archivo
+        ])
+    )
+    output_config = documentai.DocumentOutputConfig(
+        gcs_output_config=documentai.DocumentOutputConfig.GcsOutputConfig(
+            gcs_uri=f"gs://{nombre_bucket}/{BATCH_OUTPUT_PREFIX}/"
+        )
+    )
+    request = documentai.BatchProcessRequest(
+        name=client.processor_path(project_id, 'eu', processor_id),
+        input_documents=input_config,
+        document_output_config=output_config
+    )
+    operacion = client.batch_process_documents(request=request)
+    print(f"Lote de {len(nombres_archivo)} documentos enviado: {operacion.operation.name}")
+    return operacion
+
+def guardar_resultados_lote(operacion, nombre_bucket):
+    '''Espera a que termine un lote y guarda el texto de cada documento procesado.
+
+    Args:
+        operacion (Operation): La operación devuelta por procesar_lote.
+        nombre_bucket (str): Nombre del bucket de Cloud Storage.
+
+    Returns:
+        tuple: Número de documentos guardados y lista de rutas de los que han fallado.
+    '''
+    operacion.result(timeout=BATCH_TIMEOUT_SECONDS)
+    prefijo_entrada = f"gs://{nombre_bucket}/"
+
+    def guardar(estado):
+        nombre_archivo = estado.input_gcs_source[len(prefijo_entrada):]
+        if estado.status.code != 0:
+            print(f"Document AI no pudo procesar {nombre_archivo}: {estado.status.message}")
+            return False
+        texto_extraido = leer_documento_fragmentado(estado.output_gcs_destination)
+        if not texto_extraido:
+            return False
+        texto_unido = assemble_text((texto_extraido,), normalize_whitespace=True)
+        return guardar_texto_en_storage(texto_unido, nombre_archivo, nombre_bucket)
+
+    estados = list(operacion.metadata.individual_process_statuses)
+    resultados = map_in_order(
+        guardar,
+        estados,
+        max_workers=BATCH_RESULT_WORKERS,
+        on_error=lambda estado, e: print(f"Hubo un error al guardar {estado.input_gcs_source}: {e}") or False
+    )
+    fallidos = [estado.input_gcs_source for estado, ok in zip(estados, resultados) if not ok]
+    return len(estados) - len(fallidos), fallidos
+
+def leer_documento_fragmentado(destino):
+    '''Lee los fragmentos JSON de un documento procesado por lotes y une su texto en orden.
+
+    Document AI divide la salida de los documentos largos en varios ficheros JSON; cada uno contiene el texto
+    de sus páginas y su posición en shard_info. Una vez leídos, los fragmentos se borran del bucket.
+
+    Args:
+        destino (str): URI gs:// de la carpeta de salida del documento.
+
+    Returns:
+        str: Texto completo del documento.
+    '''
+    nombre_bucket, _, prefijo = destino[len("gs://"):].partition("/")
+    # La barra final evita que la carpeta del documento 1 incluya también las de los documentos 10, 11...
+    prefijo = prefijo.rstrip("/") + "/"
+    cliente_storage = gcp_clients.get('storage', storage.Client)
+    blobs = [blob for blob in cliente_storage.list_blobs(nombre_bucket, prefix=prefijo) if blob.name.endswith('.json')]
+
+    fragmentos = []
+    for blob in blobs:
+        documento = documentai.Document.from_json(blob.download_as_bytes(), ignore_unknown_fields=True)
+        fragmentos.append((documento.shard_info.shard_index, documento.text))
+    texto = "".join(text for _, text in sorted(fragmentos, key=lambda fragmento: fragmento[0]))
+
+    for blob in blobs:
+        blob.delete()
+    return texto
@@ -0,0 +1,136 @@
+"""
+Registro de clientes de Google Cloud compartido por las Cloud Functions.
+
+Cada cliente se crea la primera vez que se pide y se reutiliza en las siguientes peticiones que
+atiende la misma instancia, de modo que la autenticación y la preparación de los canales gRPC solo
+se pagan una vez. Los clientes asíncronos (grpc.aio) quedan ligados al bucle de eventos en el que se
+crean, así que se guardan por bucle: se reutilizan mientras el bucle siga siendo el mismo.
+
+El registro no importa ningún SDK: quien pide un cliente indica también cómo construirlo. Para que la
+mejora se vea en los registros, se mide el tiempo de construcción de los clientes creados durante
+cada petición (start_request / log_request).
+
+Funciones:
+- get: Devuelve el cliente compartido de un nombre, creándolo si es necesario.
+- get_for_loop: Igual que get, pero para clientes asíncronos ligados al bucle de eventos actual.
+- set_client: Sustituye un cliente (por ejemplo, por uno falso en local).
+- start_request: Marca el inicio de una petición para medir los clientes creados en ella.
+- log_request: Muestra el tiempo de construcción de clientes de la petición actual.
+- creation_times: Devuelve el tiempo de creación de cada cliente.
+- reset: Descarta los clientes creados.
+"""
+import asyncio
+import threading
+import time
+
+_lock = threading.Lock()
+_clients = {}
+_loop_clients = {}
+_creation_seconds = {}
+_request_seconds = {}
+
+
+def _create(name, factory):
+    start = time.perf_counter()
+    instance = factory()
+    seconds = time.perf_counter() - start
+    _creation_seconds[name] = seconds
+    _request_seconds[name] = _request_seconds.get(name, 0.0) + seconds
+    return instance
+
+
+def get(name, factory):
+    """
+    Devuelve el cliente compartido de un nombre, creándolo la primera vez.
+
+    Args:
+        name (str): Nombre del cliente, por ejemplo 'storage'.
+        factory (callable): Función sin argumentos que construye el cliente.
+
+    Returns:
+        object: El cliente compartido.
+    """
+    instance = _clients.get(name)
+    if instance is not None:
+        return instance
+    with _lock:
+        if name not in _clients:
+            _clients[name] = _create(name, factory)
+        return _clients[name]
+
+
+def get_for_loop(name, factory):
+    """
+    Devuelve el cliente asíncrono de un nombre para el bucle de eventos en ejecución.
+
+    El cliente se reutiliza mientras el bucle sea el mismo; si cambia, se crea uno nuevo y se descarta
+    el anterior. Si el cliente se ha sustituido con set_client, se devuelve el sustituto. Debe llamarse
+    desde una corrutina.
+
+    Args:
+        name (str): Nombre del cliente, por ejemplo 'documentai'.
+        factory (callable): Función sin argumentos que construye el cliente.
+
+    Returns:
+        object: El cliente asíncrono del bucle actual.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if name in _clients:
+            return _clients[name]
+        entry = _loop_clients.get(name)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, _create(name, factory))
+            _loop_clients[name] = entry
+        return entry[1]
+
+
+def set_client(name, instance):
+    """
+    Sustituye el cliente de un nombre.
+
+    Args:
+        name (str): Nombre del cliente.
+        instance (object): Objeto que se devolverá en lugar del cliente real.
+    """
+    with _lock:
+        _clients[name] = instance
+        _creation_seconds[name] = 0.0
+
+
+def start_request():
+    """Marca el inicio de una petición: a partir de aquí se acumula el tiempo de construcción de clientes."""
+    _request_seconds.clear()
+
+
+def log_request():
+    """
+    Muestra el tiempo dedicado a construir clientes durante la petición actual.
+
+    Returns:
+        dict: Segundos de construcción de cada cliente creado en la petición.
+    """
+    created = dict(_request_seconds)
+    total_ms = sum(created.values()) * 1000
+    detail = ", ".join(f"{name}: {seconds * 1000:.1f} ms" for name, seconds in created.items())
+    print(f"Construcción de clientes en esta petición: {total_ms:.1f} ms" + (f" ({detail})" if detail else ""))
+    return created
+
+
+def creation_times():
+    """
+    Devuelve el tiempo de creación de cada cliente de la instancia.
+
+    Returns:
+        dict: Nombre del cliente -> segundos.
+    """
+    return dict(_creation_seconds)
+
+
+def reset():
+    """Descarta todos los clientes creados hasta ahora."""
+    with _lock:
+        _clients.clear()
+        _loop_clients.clear()
+        _creation_seconds.clear()
+        _request_seconds.clear()
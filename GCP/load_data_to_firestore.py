@@ -8,13 +8,18 @@ Funcionalidades:
 - Datos predefinidos: Define una lista de respuestas típicas que un chatbot podría necesitar, cubriendo
   diversas intenciones y preguntas frecuentes.
 - Carga de datos: Inserta los datos en Firestore, generando un ID de documento único basado en la combinación
-  de 'IntentName' y 'Question' para evitar duplicados y permitir una fácil recuperación.
+  de 'IntentName' y 'Question' para evitar duplicados y permitir una fácil recuperación. Las escrituras se
+  agrupan con BulkWriter (mode=bulk, por defecto) o con WriteBatch de 500 operaciones en paralelo (mode=batch).
+- Campos de búsqueda: Cada pregunta se guarda con sus términos normalizados y la versión del normalizador.
+- Carga incremental: Con incremental=true solo se escriben los documentos cuyo hash de contenido ha cambiado
+  y se borran los que ya no existen. El resultado indica el rendimiento en documentos por segundo.
+- Manifiesto del tutorial: Si se configura el bucket, publica el manifiesto (common/manifest.py) que leen los webhooks.
 - Manejo de excepciones: Captura y maneja cualquier error durante el proceso de carga, proporcionando
   retroalimentación adecuada.
 
 Parámetros:
-- request (flask.Request): El objeto request que activa la función. No se utiliza directamente
-  dentro de la función, pero es necesario para cumplir con la interfaz esperada por Google Cloud Functions.
+- request (flask.Request): El objeto request que activa la función. Admite los parámetros de consulta
+  opcionales 'mode' ('bulk' o 'batch') e 'incremental' ('true' o 'false').
 
 Retorno:
 - str: Un mensaje que indica el resultado de la operación de carga, ya sea un éxito o un mensaje de error
@@ -23,15 +28,33 @@ Retorno:
 Ejemplo de uso:
 Esta función puede ser desencadenada manualmente a través de una herramienta de interfaz de línea de comandos
 o automáticamente por un evento en el sistema que requiere reinitialización o actualización de los datos del
-chatbot en Firestore.
+chatbot en Firestore. Para probarla en local basta con definir FIRESTORE_EMULATOR_HOST apuntando al emulador
+de Firestore: el cliente se conecta a él automáticamente.
 """
-from google.cloud import firestore
+import os
+import time
+from google.cloud import firestore, storage
+from common.concurrency import map_in_order
+from common.content import HASH_FIELD, content_hash
+from common.manifest import MANIFEST_FILE, build_manifest, dump_manifest, substep_key
+from common.retrieval import search_fields
+
+# Bucket y carpeta de los ficheros del tutorial. Si se configuran, se publica también el manifiesto.
+bucket_name = os.environ.get('bucket_name')
+folder_name = os.environ.get('folder_name', '')
+
+# Un WriteBatch de Firestore admite como máximo 500 operaciones.
+BATCH_SIZE = 500
+BATCH_WORKERS = int(os.environ.get('FIRESTORE_BATCH_WORKERS', '4'))
 
 def load_data_to_firestore(request):
     try:
+        args = getattr(request, 'args', None) or {}
+        mode = args.get('mode', 'bulk')
+        incremental = str(args.get('incremental', 'false')).lower() == 'true'
+        start = time.perf_counter()
+
         db = firestore.Client()
-        collection_name = 'chatbotresponses'
-        collection_ref = db.collection(collection_name)
 
         
         responses = [
@@ -72,10 +95,9 @@ def load_data_to_firestore(request):
             {"IntentName": "Sprints", "Question": "¿Cuántos sprints se realizaron?", "Response": "Se han realizado 7 sprints y una fase inicial."},
         ]
         
-
-        for response in responses:
-            doc_id = f"{response['IntentName']}_{response['Question']}"
-            collection_ref.document(doc_id).set(response)
+        # Las preguntas se guardan con sus términos ya normalizados para que el webhook no tenga que tokenizarlas.
+        responses = [dict(response, **search_fields(response['Question'])) for response in responses]
+        stats = [sync_collection(db, 'chatbotresponses', responses, mode, incremental)]
 
         #=================================#
         #Introducción de pasos del tutorial
@@ -83,23 +105,119 @@ def load_data_to_firestore(request):
         
         responses = []
 
-        collection_name = 'chatbotsteps'
-        collection_ref = db.collection(collection_name)
-
         for step, substeps in steps.items():
             for substep in range(1, substeps + 1):
                 entry = {
                     "IntentName": "tutorial",
                     "Question": f"{step}_{substep}",
-                    "Response": f"Paso{step}_Subpaso{substep}.txt"
+                    "Response": substep_key(step, substep)
                 }
                 responses.append(entry)   
 
-        for response in responses:
-            doc_id = f"{response['IntentName']}_{response['Question']}"
-            collection_ref.document(doc_id).set(response)
+        stats.append(sync_collection(db, 'chatbotsteps', responses, mode, incremental))
 
-        return "Datos cargados exitosamente."
+        if bucket_name:
+            publish_manifest(steps)
+
+        elapsed = time.perf_counter() - start
+        written = sum(stat['written'] for stat in stats)
+        deleted = sum(stat['deleted'] for stat in stats)
+        skipped = sum(stat['skipped'] for stat in stats)
+        rate = (written + deleted) / elapsed if elapsed else 0.0
+        return (f"Datos cargados exitosamente: {written} escritos, {deleted} borrados y {skipped} sin cambios "
+                f"en {elapsed:.2f} s ({rate:.0f} documentos/s).")
         
     except Exception as e:
         return f"Error al cargar los datos: {str(e)}"
+
+def sync_collection(db, collection_name, entries, mode='bulk', incremental=False):
+    """
+    Sincroniza una colección de Firestore con una lista de entradas.
+
+    Args:
+        db (firestore.Client): Cliente de Firestore.
+        collection_name (str): Nombre de la colección.
+        entries (list): Entradas con IntentName, Question y Response. El ID de cada documento es
+            '{IntentName}_{Question}'.
+        mode (str): 'bulk' para escribir con BulkWriter o 'batch' para escribir con WriteBatch de
+            hasta 500 operaciones confirmados en paralelo.
+        incremental (bool): Si es True, solo se escriben los documentos cuyo hash ha cambiado y se
+            borran los que ya no están en las entradas.
+
+    Returns:
+        dict: Número de documentos escritos ('written'), borrados ('deleted') y sin cambios ('skipped').
+    """
+    collection_ref = db.collection(collection_name)
+    documents = {}
+    for entry in entries:
+        documents[f"{entry['IntentName']}_{entry['Question']}"] = dict(entry, **{HASH_FIELD: content_hash(entry)})
+
+    deletes = []
+    skipped = 0
+    if incremental:
+        stored = {doc.id: (doc.to_dict() or {}).get(HASH_FIELD) for doc in collection_ref.select([HASH_FIELD]).stream()}
+        deletes = [doc_id for doc_id in stored if doc_id not in documents]
+        unchanged = [doc_id for doc_id, data in documents.items() if stored.get(doc_id) == data[HASH_FIELD]]
+        for doc_id in unchanged:
+            del documents[doc_id]
+        skipped = len(unchanged)
+
+    if mode == 'batch':
+        write_in_batches(db, collection_ref, documents, deletes)
+    else:
+        bulk_writer = db.bulk_writer()
+        for doc_id, data in documents.items():
+            bulk_writer.set(collection_ref.document(doc_id), data)
+        for doc_id in deletes:
+            bulk_writer.delete(collection_ref.document(doc_id))
+        bulk_writer.close()
+
+    return {'written': len(documents), 'deleted': len(deletes), 'skipped': skipped}
+
+def write_in_batches(db, collection_ref, documents, deletes):
+    """
+    Escribe y borra documentos con WriteBatch de hasta BATCH_SIZE operaciones, confirmando los lotes en paralelo.
+
+    Args:
+        db (firestore.Client): Cliente de Firestore.
+        collection_ref (firestore.CollectionReference): Colección destino.
+        documents (dict): ID del documento -> datos a escribir.
+        deletes (list): IDs de los documentos a borrar.
+    """
+    operations = [('set', doc_id, data) for doc_id, data in documents.items()]
+    operations += [('delete', doc_id, None) for doc_id in deletes]
+    chunks = [operations[start:start + BATCH_SIZE] for start in range(0, len(operations), BATCH_SIZE)]
+
+    def commit(chunk):
+        batch = db.batch()
+        for operation, doc_id, data in chunk:
+            if operation == 'set':
+                batch.set(collection_ref.document(doc_id), data)
+            else:
+                batch.delete(collection_ref.document(doc_id))
+        batch.commit()
+
+    map_in_order(commit, chunks, max_workers=BATCH_WORKERS)
+
+def publish_manifest(steps, inline_text=True):
+    """
+    Genera el manifiesto del tutorial a partir de los ficheros de Cloud Storage y lo publica en la misma carpeta.
+
+    Parámetros:
+    - steps: Diccionario paso -> número de subpasos.
+    - inline_text: Si es True, el texto de cada subpaso se incluye en el manifiesto.
+    """
+    bucket = storage.Client().bucket(bucket_name)
+
+    def read_text(file_name):
+        try:
+            return bucket.blob(f"{folder_name}/{file_name}").download_as_text()
+        except Exception as e:
+            print(f"No se pudo leer {file_name} para el manifiesto: {e}")
+            return None
+
+    manifest = build_manifest(steps, read_text, inline_text)
+    bucket.blob(f"{folder_name}/{MANIFEST_FILE}").upload_from_string(
+        dump_manifest(manifest), content_type='application/json'
+    )
+    print(f"Manifiesto del tutorial publicado, versión {manifest['version']}.")
@@ -0,0 +1,100 @@
+"""
+Compara la composición del texto final de las extracciones con common.text.assemble_text frente a las
+expresiones que usaban AWS/result_textract.py (" ".join(lineas).replace("&&n", "\n")) y
+GCP/document_AI_extract_text.py (" ".join(texto.split()).replace("&&n", "\n")).
+
+Primero comprueba, sobre piezas aleatorias con espacios Unicode, tabuladores, saltos de línea y marcas
+&&n (también partidas o repetidas), que assemble_text produce exactamente el mismo texto que las
+expresiones anteriores, también cuando las piezas se normalizan en tramos muy cortos. Después mide el
+tiempo y el pico de memoria (tracemalloc) de ambas sobre un documento sintético, en líneas sueltas (como
+Textract y los fragmentos en línea de Document AI) y en una sola pieza (como los resultados por lotes).
+
+Uso:
+    python benchmarks/bench_assemble_text.py [tamaño_mb]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common.text import (LINE_BREAK_MARKER, _normalized_slices,  # pylint: disable=wrong-import-position
+                         assemble_text)
+
+FUZZ_CASES = 20000
+SEED = 22
+# Fragmentos con los que se construyen las piezas aleatorias: palabras, espacios que str.split
+# reconoce (incluidos los Unicode) y trozos de la marca de salto de línea.
+ALPHABET = ('palabra', 'línea', 'ñ', 'x', ' ', '  ', '\t', '\n', '\r\n', '\x0b', '\x0c', '\x1c', '\x85',
+            '\xa0', '\u2003', '\u3000', '&', '&&', 'n', LINE_BREAK_MARKER, LINE_BREAK_MARKER * 2)
+LINE = "Texto de ejemplo extraído de una página con  espacios\tvariados&&n"
+
+
+def legacy_textract(pieces):
+    return " ".join(pieces).replace(LINE_BREAK_MARKER, "\n")
+
+
+def legacy_documentai(pieces):
+    return " ".join(" ".join(pieces).split()).replace(LINE_BREAK_MARKER, "\n")
+
+
+def random_pieces(rng):
+    return [''.join(rng.choice(ALPHABET) for _ in range(rng.randrange(8)))
+            for _ in range(rng.randrange(6))]
+
+
+def check_equivalence():
+    """Compara assemble_text con las expresiones anteriores sobre FUZZ_CASES entradas aleatorias."""
+    rng = random.Random(SEED)
+    for _ in range(FUZZ_CASES):
+        pieces = random_pieces(rng)
+        assert assemble_text(pieces) == legacy_textract(pieces), pieces
+        assert assemble_text(pieces, normalize_whitespace=True) == legacy_documentai(pieces), pieces
+        # Document AI compone el texto a partir de los fragmentos del PDF antes unidos con "\n".
+        assert assemble_text(pieces, normalize_whitespace=True) == legacy_documentai(["\n".join(pieces)]), pieces
+        text = ''.join(pieces)
+        slices = _normalized_slices(text, rng.randrange(1, 8))  # pylint: disable=protected-access
+        assert " ".join(slices) == " ".join(text.split()), text
+    print(f"assemble_text coincide con las expresiones anteriores en {FUZZ_CASES} entradas aleatorias\n")
+
+
+def measure(function, pieces):
+    """
+    Devuelve el resultado, el tiempo en segundos y el pico de memoria en MB de function(pieces). El pico se
+    mide en una segunda ejecución, porque tracemalloc ralentiza mucho las asignaciones pequeñas.
+    """
+    start = time.perf_counter()
+    result = function(pieces)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(pieces)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    check_equivalence()
+
+    pieces = [LINE] * (size_mb * 2 ** 20 // len(LINE))
+    print(f"Documento de {size_mb} MB en {len(pieces)} líneas\n")
+    cases = (
+        ('Textract', pieces, legacy_textract, assemble_text),
+        ('Document AI', pieces, legacy_documentai, lambda lines: assemble_text(lines, normalize_whitespace=True)),
+        ('DocAI lotes', ["\n".join(pieces)], legacy_documentai,
+         lambda lines: assemble_text(lines, normalize_whitespace=True)),
+    )
+    for name, document, legacy, current in cases:
+        expected, legacy_elapsed, legacy_peak = measure(legacy, document)
+        text, elapsed, peak = measure(current, document)
+        assert text == expected, f"{name}: el texto compuesto no coincide"
+        print(f"  {name:<12} anterior {legacy_elapsed * 1e3:8.1f} ms  pico {legacy_peak:7.1f} MB   "
+              f"assemble_text {elapsed * 1e3:8.1f} ms  pico {peak:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Compara la reconstrucción del orden de lectura de AWS/result_textract.py sobre volcados sintéticos de
+bloques de Textract: el reparto anterior por la mitad de la página (COLUMN_LAYOUT=mitad) y el motor de
+column_layout.py, con NumPy y con la implementación en Python puro.
+
+Las páginas sintéticas mezclan páginas a dos columnas con un título a todo el ancho (y las líneas en
+el orden intercalado por filas en que las puede devolver Textract) y páginas a una columna con líneas
+sangradas o alineadas a la derecha. Además del tiempo, se cuenta cuántas páginas quedan en el orden
+de lectura correcto.
+
+Uso:
+    python benchmarks/bench_column_layout.py [páginas]
+"""
+import random
+import sys
+import time
+
+from fakes import FakeTextract, load_aws_module, quiet  # pylint: disable=import-error
+
+REPETITIONS = 3
+LINES_PER_COLUMN = 40
+LINES_PER_PAGE = 50
+
+
+def line_block(page, left, top, width, text):
+    return {'BlockType': 'LINE', 'Page': page, 'Text': text,
+            'Geometry': {'BoundingBox': {'Left': left, 'Top': top, 'Width': width, 'Height': 0.015}}}
+
+
+def two_column_page(page, rng):
+    """Título a todo el ancho y dos columnas; Textract devuelve las líneas intercaladas por filas."""
+    blocks = [line_block(page, 0.1, 0.04, 0.8, f"p{page} título")]
+    expected = [f"p{page} título"]
+    right = []
+    for row in range(LINES_PER_COLUMN):
+        top = 0.1 + row * 0.02
+        left_text, right_text = f"p{page} i{row}", f"p{page} d{row}"
+        blocks.append(line_block(page, 0.06 + rng.random() * 0.02, top, 0.36 + rng.random() * 0.04, left_text))
+        blocks.append(line_block(page, 0.53 + rng.random() * 0.02, top + 0.002, 0.36 + rng.random() * 0.04, right_text))
+        expected.append(left_text)
+        right.append(right_text)
+    return blocks, expected + right
+
+
+def one_column_page(page, rng):
+    """Una columna con algunas líneas sangradas o alineadas a la derecha (fechas, firmas...)."""
+    blocks = []
+    expected = []
+    for row in range(LINES_PER_PAGE):
+        text = f"p{page} l{row}"
+        if row % 10 == 9:
+            left, width = 0.62 + rng.random() * 0.1, 0.2
+        else:
+            left, width = 0.1 + rng.random() * 0.02, 0.7 + rng.random() * 0.1
+        blocks.append(line_block(page, left, 0.05 + row * 0.018, width, text))
+        expected.append(text)
+    return blocks, expected
+
+
+def build_document(pages, seed=7):
+    rng = random.Random(seed)
+    blocks = []
+    expected_pages = []
+    for page in range(1, pages + 1):
+        builder = two_column_page if page % 5 < 3 else one_column_page
+        page_blocks, expected = builder(page, rng)
+        blocks.extend(page_blocks)
+        expected_pages.append(expected)
+    return blocks, expected_pages
+
+
+def time_engine(module, pages, order_page):
+    samples = []
+    ordered = None
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        ordered = [order_page(page_number, lines) for page_number, lines in pages]
+        samples.append(time.perf_counter() - start)
+    return min(samples), ordered
+
+
+def main():
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    blocks, expected_pages = build_document(page_count)
+    module = load_aws_module('result_textract', {'BUCKET_NAME': 'bucket'})
+    layout = module.column_layout
+    module.textract = FakeTextract(blocks)
+    pages = list(module.iterar_paginas('trabajo'))
+
+    print(f"{page_count} páginas, {len(blocks)} líneas, NumPy {'disponible' if layout.np is not None else 'no disponible'}\n")
+
+    def legacy(page_number, lines):
+        return module.combinar_columnas({page_number: module.agrupar_columnas(lines)})
+
+    def without_numpy(_page_number, lines):
+        numpy_module, layout.np = layout.np, None
+        try:
+            return layout.reading_order(lines)
+        finally:
+            layout.np = numpy_module
+
+    engines = [('mitad (anterior)', legacy)]
+    if layout.np is not None:
+        engines.append(('auto, NumPy', lambda _page_number, lines: layout.reading_order(lines)))
+    engines.append(('auto, Python puro', without_numpy))
+
+    print(f"{'motor':>18} {'ms total':>9} {'µs/página':>10} {'páginas bien':>13}")
+    results = {}
+    for name, order_page in engines:
+        seconds, ordered = time_engine(module, pages, order_page)
+        correct = sum(1 for got, expected in zip(ordered, expected_pages) if got == expected)
+        results[name] = ordered
+        print(f"{name:>18} {seconds * 1e3:9.1f} {seconds / page_count * 1e6:10.1f} {correct:>7}/{page_count}")
+
+    auto_results = [ordered for name, ordered in results.items() if name.startswith('auto')]
+    assert all(ordered == auto_results[0] for ordered in auto_results), "NumPy y Python puro no coinciden"
+
+    print()
+    for layout_mode in ('mitad', 'auto'):
+        module.COLUMN_LAYOUT = layout_mode
+        module.textract = FakeTextract(blocks)
+        with quiet():
+            start = time.perf_counter()
+            module.process_response('trabajo')
+            elapsed = time.perf_counter() - start
+        print(f"process_response con COLUMN_LAYOUT={layout_mode}: {elapsed * 1e3:.1f} ms "
+              f"({module.textract.round_trips()} respuestas de Textract)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Mide el rendimiento del procesamiento en línea de GCP/document_AI_extract_text.py cuando llegan muchos
+PDF a la vez, contra sustitutos locales de Document AI, Cloud Storage y Cloud Tasks con latencia simulada.
+
+Se compara el esquema anterior (un asyncio.run por evento, uno detrás de otro) con el bucle compartido,
+lanzando todos los PDF a la vez (como varias peticiones simultáneas) y variando MAX_CONCURRENT_DOCUMENTS.
+Los PDF son reales (fake_pdf): la mayoría caben en una petición y uno de cada LONG_EVERY tiene LONG_PAGES páginas, supera el límite de páginas de
+Document AI (PAGE_LIMIT) y se divide en fragmentos.
+
+Uso:
+    python benchmarks/bench_docai_async.py [número_de_pdf]
+"""
+import asyncio
+import sys
+import time
+
+from fakes import (FakeCloudTasksAsync, FakeDocumentAI, FakeStorage,  # pylint: disable=import-error
+                   fake_pdf, load_gcp_module, quiet)
+
+ENV = {
+    'endpoint': 'eu-documentai.googleapis.com', 'project_id': 'proyecto', 'processor_id': 'procesador',
+    'input_bucket': 'pdfs', 'output_bucket': 'textos', 'url_funcion_destino': 'https://destino'
+}
+LIMITS = (4, 16, 64)
+DOCUMENT_AI_LATENCY = 0.2
+STORAGE_LATENCY = 0.03
+TASKS_LATENCY = 0.02
+LONG_EVERY = 8
+LONG_PAGES = 40
+PAGE_LIMIT = 15
+
+
+def pdf_pages(number):
+    pages = LONG_PAGES if number % LONG_EVERY == LONG_EVERY - 1 else 2
+    return [f"Documento {number}"] + [f"pagina {page}" for page in range(1, pages)]
+
+
+def setup(count):
+    objects = {f"pdfs/documento-{number:04d}.pdf": fake_pdf(pdf_pages(number)) for number in range(count)}
+    storage_client = FakeStorage({'documentos': objects}, STORAGE_LATENCY)
+    module = load_gcp_module('document_AI_extract_text', ENV, storage_client=storage_client)
+    module.gcp_clients.reset()
+    module.gcp_clients.set_client('storage', storage_client)
+    module.gcp_clients.set_client('documentai', FakeDocumentAI(storage_client, DOCUMENT_AI_LATENCY,
+                                                                 page_limit=PAGE_LIMIT))
+    module.gcp_clients.set_client('tasks_async', FakeCloudTasksAsync(TASKS_LATENCY))
+    return module, sorted(objects), storage_client
+
+
+async def process_all(module, names):
+    return await asyncio.gather(*(module.procesar_pdf_async(name, 'documentos') for name in names))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    module, names, storage_client = setup(count)
+    print(f"{count} PDF, latencia simulada: Document AI {DOCUMENT_AI_LATENCY * 1e3:.0f} ms, "
+          f"Storage {STORAGE_LATENCY * 1e3:.0f} ms, Cloud Tasks {TASKS_LATENCY * 1e3:.0f} ms\n")
+
+    sample = names[:max(1, count // 8)]
+    start = time.perf_counter()
+    with quiet():
+        for name in sample:
+            module.MAX_CONCURRENT_DOCUMENTS = 1
+            asyncio.run(module.procesar_pdf_async(name, 'documentos'))
+    per_document = (time.perf_counter() - start) / len(sample)
+    print(f"  asyncio.run por evento: {1 / per_document:7.1f} PDF/s (estimado con {len(sample)} PDF)")
+
+    for limit in LIMITS:
+        module.MAX_CONCURRENT_DOCUMENTS = limit
+        start = time.perf_counter()
+        with quiet():
+            results = module._event_loop.run(process_all(module, names))  # pylint: disable=protected-access
+        elapsed = time.perf_counter() - start
+        assert all(results), "algún PDF no se ha procesado"
+        print(f"  bucle compartido, {limit:>2} en curso: {count / elapsed:7.1f} PDF/s ({elapsed:.2f} s)")
+
+    saved = storage_client.buckets['documentos']
+    for number in (0, LONG_EVERY - 1):
+        expected = ' '.join(pdf_pages(number)).encode('utf-8')
+        assert saved[f"textos/documento-{number:04d}.txt"] == expected, f"texto incorrecto en el documento {number}"
+
+
+if __name__ == '__main__':
+    main()
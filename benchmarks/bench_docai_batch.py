@@ -0,0 +1,75 @@
+"""
+Ejecuta el modo por lotes de GCP/document_AI_extract_text.py (batch_extract_text) sobre una carga
+inicial de PDF sintéticos, contra sustitutos locales de Cloud Storage, Cloud Tasks y Document AI.
+
+Comprueba que el texto guardado de cada documento coincide con el que devolvería el modo en línea
+(incluidos los documentos cuya salida se divide en varios fragmentos JSON) y muestra el número de
+operaciones de larga duración, las llamadas por servicio y el tiempo total.
+
+Uso:
+    python benchmarks/bench_docai_batch.py [número_de_pdf]
+"""
+import json
+import sys
+import time
+from unittest import mock
+
+from fakes import FakeCloudTasksAsync, FakeDocumentAI, FakeStorage, load_gcp_module, quiet  # pylint: disable=import-error
+
+ENV = {
+    'endpoint': 'eu-documentai.googleapis.com', 'project_id': 'proyecto', 'processor_id': 'procesador',
+    'input_bucket': 'pdfs', 'output_bucket': 'textos', 'url_funcion_destino': 'https://destino',
+    'documents_bucket': 'documentos', 'BATCH_MAX_DOCUMENTS': '500'
+}
+
+
+def build_pdfs(count):
+    objects = {}
+    for number in range(count):
+        pages = [f"Documento {number} pagina {page}&&ncon   espacios" for page in range(1 + number % 7)]
+        objects[f"pdfs/documento-{number:05d}.pdf"] = '\f'.join(pages).encode('utf-8')
+    # Algunos documentos ya procesados que no deben volver a enviarse.
+    for number in range(0, count, 10):
+        objects[f"textos/documento-{number:05d}.txt"] = b'ya procesado'
+    return objects
+
+
+def expected_text(pdf):
+    texto = ''.join(page + '\n' for page in pdf.decode('utf-8').split('\f'))
+    return " ".join(texto.split()).replace("&&n", "\n")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    objects = build_pdfs(count)
+    storage_client = FakeStorage({'documentos': objects})
+    tasks_client = FakeCloudTasksAsync()
+    processor = FakeDocumentAI(storage_client, latency=0.5, per_document=0.0005)
+
+    module = load_gcp_module('document_AI_extract_text', ENV, storage_client=storage_client)
+    module.gcp_clients.reset()
+    module.gcp_clients.set_client('storage', storage_client)
+    module.gcp_clients.set_client('tasks_async', tasks_client)
+    module.gcp_clients.set_client('documentai_batch', processor)
+
+    start = time.perf_counter()
+    with quiet():
+        resumen = json.loads(module.batch_extract_text(mock.Mock(get_json=lambda silent: {})))
+    elapsed = time.perf_counter() - start
+
+    saved = storage_client.buckets['documentos']
+    for name, pdf in objects.items():
+        if name.endswith('.pdf') and int(name[-9:-4]) % 10:
+            salida = name.replace('pdfs', 'textos').replace('.pdf', '.txt')
+            assert saved[salida].decode('utf-8') == expected_text(pdf), salida
+    assert not any(name.startswith(module.BATCH_OUTPUT_PREFIX) for name in saved), "quedan fragmentos JSON"
+
+    print(f"PDF pendientes: {resumen['pendientes']}  procesados: {resumen['procesados']}  "
+          f"fallidos: {len(resumen['fallidos'])}")
+    print(f"Operaciones de Document AI: {resumen['operaciones']}  notificaciones: {len(tasks_client.tasks)}")
+    print(f"Llamadas a Cloud Storage: {dict(storage_client.calls)}")
+    print(f"Tiempo total: {elapsed:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Mide la extracción en línea de un PDF largo en GCP/document_AI_extract_text.py, enviándolo entero o
+dividido en fragmentos de SHARD_MAX_PAGES páginas procesados en paralelo, contra un sustituto local de
+Document AI cuya latencia crece con el número de páginas de cada petición.
+
+En los casos con fragmentos, el sustituto tiene un límite de SHARD_MAX_PAGES páginas por petición, de
+modo que el PDF entero se rechaza y se divide, como con el servicio real. Comprueba que el texto
+guardado es el mismo en todos los casos y que ninguna petición aceptada supera el límite de páginas.
+Necesita pypdf para generar y dividir el PDF.
+
+Uso:
+    python benchmarks/bench_docai_shards.py [páginas]
+"""
+import sys
+import time
+
+from fakes import (FakeCloudTasksAsync, FakeDocumentAI, FakeStorage,  # pylint: disable=import-error
+                   fake_pdf, load_gcp_module, quiet)
+
+ENV = {
+    'endpoint': 'eu-documentai.googleapis.com', 'project_id': 'proyecto', 'processor_id': 'procesador',
+    'input_bucket': 'pdfs', 'output_bucket': 'textos', 'url_funcion_destino': 'https://destino'
+}
+LATENCY = 0.1
+PER_PAGE = 0.02
+# (páginas por fragmento, fragmentos en paralelo); None = sin dividir
+CASES = ((None, 1), (15, 1), (15, 4), (15, 16))
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pdf = fake_pdf([f"Página {number}&&ncon texto" for number in range(pages)])
+    storage_client = FakeStorage({'documentos': {'pdfs/manual.pdf': pdf}})
+    module = load_gcp_module('document_AI_extract_text', ENV, storage_client=storage_client)
+    module.gcp_clients.reset()
+    module.gcp_clients.set_client('storage', storage_client)
+    module.gcp_clients.set_client('tasks_async', FakeCloudTasksAsync())
+
+    print(f"PDF de {pages} páginas, latencia por petición {LATENCY * 1e3:.0f} ms + {PER_PAGE * 1e3:.0f} ms/página\n")
+    expected = None
+    for max_pages, workers in CASES:
+        processor = FakeDocumentAI(storage_client, LATENCY, per_page=PER_PAGE, page_limit=max_pages)
+        module.gcp_clients.set_client('documentai', processor)
+        module.SHARD_MAX_PAGES = max_pages or pages
+        module.SHARD_WORKERS = workers
+        start = time.perf_counter()
+        with quiet():
+            module.extract_text_and_save({'name': 'pdfs/manual.pdf', 'bucket': 'documentos'}, None)
+        elapsed = time.perf_counter() - start
+
+        text = storage_client.buckets['documentos'].pop('textos/manual.txt')
+        expected = expected or text
+        assert text == expected, "el texto unido no coincide con el del PDF entero"
+        label = f"{max_pages} págs x {workers:>2} en paralelo" if max_pages else "PDF entero"
+        print(f"  {label:<26} {elapsed * 1e3:8.1f} ms  peticiones: {processor.calls['process_document']:>3}  "
+              f"máx. páginas por petición: {processor.max_pages}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Mide la búsqueda de respuestas sin índice (INDEX_TTL_SECONDS=0 en Lex, siempre en Dialogflow) en una
+intención con miles de preguntas, contra sustitutos locales de DynamoDB (con páginas de PAGE_SIZE
+elementos, como las de 1 MB de DynamoDB) y Firestore.
+
+Para cada consulta se muestra si se encuentra la pregunta esperada, las llamadas a la base de datos,
+los documentos leídos, la latencia y el pico de memoria (tracemalloc). La consulta exacta termina la
+lectura en cuanto llega su pregunta; la reformulada tiene que recorrer la intención entera.
+
+Uso:
+    python benchmarks/bench_large_intent.py [preguntas]
+"""
+import sys
+import time
+import tracemalloc
+
+from fakes import FakeDynamoTable, FakeFirestore, load_aws_module, load_gcp_module, quiet  # pylint: disable=import-error
+
+INTENT = 'CrearFuncionLambda'
+PAGE_SIZE = 100
+LATENCY = 0.002
+TOPICS = ('memoria', 'tiempo de espera', 'capas', 'alias', 'versiones', 'permisos', 'disparadores', 'registros')
+
+
+def build_questions(count):
+    questions = []
+    for number in range(count):
+        topic = TOPICS[number % len(TOPICS)]
+        questions.append((f"¿Cómo se configura {topic} en la función número {number}?", f"Respuesta {number}"))
+    return questions
+
+
+def queries(count):
+    target = count * 3 // 4
+    topic = TOPICS[target % len(TOPICS)]
+    expected = f"Respuesta {target}"
+    return (
+        ('exacta', f"¿Cómo se configura {topic} en la función número {target}?", expected),
+        ('reformulada', f"configurar {topic} funcion {target}", expected),
+    )
+
+
+def measure(search, new_backend, expected):
+    """Mide el tiempo y las llamadas en una ejecución y el pico de memoria en otra (tracemalloc ralentiza)."""
+    backend = new_backend()
+    with quiet():
+        start = time.perf_counter()
+        answer = search()
+        elapsed = time.perf_counter() - start
+        new_backend()
+        tracemalloc.start()
+        search()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return answer == expected, backend.round_trips(), backend.bytes_read / 1024, elapsed, peak
+
+
+def report(platform, name, found, round_trips, read_kb, elapsed, peak):
+    print(f"{platform:<10} {name:<12} {'sí' if found else 'no':>9} {round_trips:>8} {read_kb:>10.0f} "
+          f"{elapsed * 1e3:>8.1f} {peak / 1024:>10.0f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    questions = build_questions(count)
+    print(f"{count} preguntas en la intención {INTENT}, páginas de {PAGE_SIZE} elementos, "
+          f"latencia por llamada {LATENCY * 1e3:.0f} ms\n")
+    print(f"{'':<10} {'consulta':<12} {'encontrada':>9} {'llamadas':>8} {'KB leídos':>10} {'ms':>8} {'KB de pico':>10}")
+
+    lex = load_aws_module('lex_integration', {'bucket_name': 'bucket', 'folder_name': 'tutorial'})
+    lex.INDEX_TTL_SECONDS = 0
+    items = [{'IntentName': INTENT, 'Question': question, 'Response': response} for question, response in questions]
+
+    def new_table():
+        lex.table = FakeDynamoTable(items, LATENCY, page_size=PAGE_SIZE)
+        lex._response_cache.clear()  # pylint: disable=protected-access
+        return lex.table
+
+    for name, query, expected in queries(count):
+        report('Lex', name, *measure(lambda query=query: lex.get_most_similar_response(INTENT, query), new_table, expected))
+
+    documents = {f"faq_{number:05d}": {'IntentName': INTENT, 'Question': question, 'Response': response}
+                 for number, (question, response) in enumerate(questions)}
+    dialogflow = load_gcp_module('dialogflow_integration', {'bucket_name': 'bucket', 'folder_name': 'tutorial'})
+
+    def new_firestore():
+        dialogflow.db = FakeFirestore({'chatbotresponses': documents}, LATENCY)
+        return dialogflow.db
+
+    for name, query, expected in queries(count):
+        report('Dialogflow', name,
+               *measure(lambda query=query: dialogflow.get_most_similar_response(INTENT, query), new_firestore, expected))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Compara la calidad de ordenación y la latencia por consulta del motor de recuperación compartido
+(common/retrieval.py) frente a la similitud por palabras comunes que usaban los webhooks, y también
+la puntuación sin índice que se aplica a las preguntas leídas de la base de datos (stream_top_k).
+
+Las preguntas almacenadas se leen del fichero de contenido AWS/contenido_chatbot.json y las
+consultas de prueba son reformulaciones de esas preguntas etiquetadas con la pregunta esperada.
+
+Uso:
+    python benchmarks/bench_ranking.py
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common.retrieval import RankingIndex, stream_top_k  # pylint: disable=wrong-import-position
+
+# (intención, consulta del usuario, pregunta almacenada que debería ganar)
+LABELLED_QUERIES = [
+    ("CreacionRolIAM", "como creo un rol en IAM", "¿Cómo se crea un rol IAM?"),
+    ("CreacionRolIAM", "que es un rol de iam", "¿Qué es un rol IAM?"),
+    ("CreacionRolIAM", "permisos del rol para textract", "¿Qué permisos necesita un rol para trabajar con Textract?"),
+    ("CreacionRolIAM", "qué permisos hacen falta para s3", "¿Qué permisos necesita un rol para trabajar con S3?"),
+    ("CreacionRolIAM", "entidades de confianza", "¿Qué es una entidad de confianza en IAM?"),
+    ("CreacionBucketS3", "como crear carpetas dentro de s3", "¿Cómo se crean carpetas en S3?"),
+    ("CreacionBucketS3", "cuantos buckets tengo que crear", "¿Cuántos buckets necesito crear?"),
+    ("CreacionBucketS3", "configuracion segura del bucket", "¿Cuál es la configuración más segura para un bucket S3?"),
+    ("CrearSNS", "qué es un endpoint de sns", "¿Qué es un endpoint en SNS?"),
+    ("CrearSNS", "suscribir endpoints a un tema", "¿Cómo se suscriben los endpoints a un tema de SNS?"),
+    ("CrearSNS", "temas estandar de SNS", "¿Qué es un tema estándar en SNS?"),
+    ("CrearFuncionLambda", "como configurar las variables de entorno", "¿Cómo configuro variables de entorno en Lambda?"),
+    ("CrearFuncionLambda", "que lenguajes soporta lambda", "¿Qué lenguajes admite AWS Lambda?"),
+    ("CrearFuncionLambda", "monitorear funciones lambda", "¿Cómo se monitorea una función Lambda?"),
+    ("CrearFuncionLambda", "almacenamiento efimero", "¿Qué es el almacenamiento efímero en Lambda?"),
+    ("CrearFuncionLambda", "limite de concurrencia", "¿Qué es la limitación de concurrencia en AWS Lambda?"),
+    ("CrearFuncionLambda", "actualizar el codigo de la lambda", "¿Cómo se actualiza el código de una función Lambda?"),
+    ("Textract", "que es el nexttoken", "¿Qué es el NextToken y cómo se utiliza en Textract?"),
+    ("Textract", "documentos con varias paginas en textract", "¿Cómo se manejan los documentos con múltiples páginas en AWS Textract?"),
+    ("Textract", "cuando usar operaciones asincronas", "¿Cuándo es preferible usar una operación asíncrona en AWS Textract?"),
+    ("Textract", "qué bloques devuelve textract", "¿Qué tipos de bloques devuelve AWS Textract en su análisis?"),
+    ("ComprehendTranslate", "como se detecta el idioma con comprehend", "¿Cómo se detecta el idioma predominante de un texto utilizando AWS Comprehend?"),
+    ("ComprehendTranslate", "idiomas de origen y destino en translate", "¿Cómo se especifican los idiomas de origen y destino en una solicitud de AWS Translate?"),
+    ("Lex", "que son los slots", "¿Qué es una ranura (slot) en AWS Lex?"),
+    ("Lex", "como entrenar un bot", "¿Cómo se entrenan los bots en AWS Lex?"),
+    ("Lex", "probar bots", "¿Cómo se pueden probar los bots de AWS Lex?"),
+    ("Lex", "gestion de sesiones en lex", "¿Cómo se manejan las sesiones en AWS Lex?"),
+    ("Lex", "umbral de confianza", "¿Qué es el umbral de confianza en AWS Lex?"),
+    ("Lex", "integracion con cloudwatch", "¿Cómo se integra AWS Lex con AWS CloudWatch?"),
+    ("GitHubInfo", "donde esta el codigo en github", "¿Dónde puedo encontrar el código en GitHub?"),
+]
+
+REPETITIONS = 200
+
+
+def load_faq():
+    """
+    Lee las respuestas del fichero de contenido que carga AWS/campos_dynamoDB.py.
+
+    Retorna:
+    - Lista de diccionarios con IntentName, Question y Response.
+    """
+    with open(os.path.join(ROOT, 'AWS', 'contenido_chatbot.json'), encoding='utf-8') as f:
+        return json.load(f)['responses']
+
+
+def legacy_similarity(user_input, stored_question):
+    """Similitud por palabras comunes que usaban los webhooks antes del motor compartido."""
+    user_words = set(user_input.lower().split())
+    question_words = set(stored_question.lower().split())
+    common_words = user_words.intersection(question_words)
+    return len(common_words) / max(len(user_words), len(question_words))
+
+
+def legacy_rank(items, intent_name, user_input):
+    """Recorrido lineal original: gana el primer elemento con la similitud máxima."""
+    max_similarity = -1
+    best_question = None
+    tied = 0
+    for item in items:
+        if item['IntentName'] != intent_name:
+            continue
+        similarity = legacy_similarity(user_input, item['Question'])
+        if similarity > max_similarity:
+            max_similarity = similarity
+            best_question = item['Question']
+            tied = 1
+        elif similarity == max_similarity:
+            tied += 1
+    return best_question, tied > 1
+
+
+def first_question(items, intent_name):
+    """
+    Primera pregunta de la intención: lo que devolvían los webhooks cuando ninguna pregunta compartía términos
+    con la consulta. Se conserva aquí para comparar con el recorrido original en igualdad de condiciones.
+    """
+    return next((item['Question'] for item in items if item['IntentName'] == intent_name), None)
+
+
+def engine_rank(engine, items, intent_name, user_input):
+    """Ordenación con el motor compartido, con la misma regla de desempate que los webhooks."""
+    results = engine.search(user_input, group=intent_name, k=2)
+    if not results:
+        return first_question(items, intent_name), True
+    tied = len(results) > 1 and results[0][0] == results[1][0]
+    return results[0][1]['text'], tied
+
+
+def stream_rank(items, intent_name, user_input):
+    """Puntuación en streaming de las preguntas de la intención, como cuando no hay índice."""
+    documents = ({'text': item['Question']} for item in items if item['IntentName'] == intent_name)
+    results = stream_top_k(documents, user_input, k=2, stop_on_exact=False)
+    if not results:
+        return first_question(items, intent_name), True
+    tied = len(results) > 1 and results[0][0] == results[1][0]
+    return results[0][1]['text'], tied
+
+
+def evaluate(name, rank):
+    """Ejecuta las consultas etiquetadas y devuelve aciertos, empates y latencia media en microsegundos."""
+    hits = 0
+    ties = 0
+    for intent_name, query, expected in LABELLED_QUERIES:
+        best, tied = rank(intent_name, query)
+        hits += best == expected
+        ties += tied
+
+    start = time.perf_counter()
+    for _ in range(REPETITIONS):
+        for intent_name, query, _expected in LABELLED_QUERIES:
+            rank(intent_name, query)
+    elapsed = time.perf_counter() - start
+    latency_us = elapsed / (REPETITIONS * len(LABELLED_QUERIES)) * 1e6
+
+    print(f"{name:<10} acierto@1 {hits:>2}/{len(LABELLED_QUERIES)}  empates {ties:>2}  {latency_us:8.1f} µs/consulta")
+
+
+def main():
+    items = load_faq()
+    print(f"{len(items)} preguntas almacenadas, {len(LABELLED_QUERIES)} consultas etiquetadas\n")
+
+    evaluate('actual', lambda intent, query: legacy_rank(items, intent, query))
+    evaluate('streaming', lambda intent, query: stream_rank(items, intent, query))
+
+    for scoring in ('bm25', 'tfidf'):
+        start = time.perf_counter()
+        engine = RankingIndex(
+            ({'group': item['IntentName'], 'text': item['Question']} for item in items),
+            scoring=scoring
+        )
+        build_ms = (time.perf_counter() - start) * 1e3
+        evaluate(scoring, lambda intent, query, engine=engine: engine_rank(engine, items, intent, query))
+        print(f"{'':<10} construcción del índice: {build_ms:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
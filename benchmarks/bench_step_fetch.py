@@ -0,0 +1,93 @@
+"""
+Mide la latencia de un turno NextStep con todas las descargas de subpasos fuera de caché,
+descargando en serie (STEP_FETCH_WORKERS=1) y en paralelo, contra sustitutos locales de
+DynamoDB + S3 (Lex) y Firestore + Cloud Storage (Dialogflow) con latencia simulada.
+
+Uso:
+    python benchmarks/bench_step_fetch.py [latencia_ms]
+"""
+import statistics
+import sys
+import time
+
+from fakes import (FakeDynamoClient, FakeDynamoTable, FakeFirestore, FakeS3, FakeStorage,  # pylint: disable=import-error
+                   load_aws_module, load_gcp_module, quiet)
+
+REPETITIONS = 10
+WORKERS = (1, 2, 5)
+
+
+def aws_backends(latency):
+    steps = {1: 2, 2: 1, 3: 1, 4: 5, 5: 2, 6: 3, 7: 1}
+    items = []
+    objects = {}
+    for step, substeps in steps.items():
+        for substep in range(1, substeps + 1):
+            file_name = f"Paso{step}_Subpaso{substep}.txt"
+            items.append({'IntentName': 'tutorial', 'Question': f"{step}_{substep}", 'Response': file_name})
+            objects[f"tutorial/{file_name}"] = f"Contenido del paso {step}.{substep}".encode('utf-8')
+    return FakeDynamoTable(items, latency), FakeS3(objects, latency)
+
+
+def gcp_backends(latency):
+    steps = {1: 1, 2: 2, 3: 5, 4: 3, 5: 3, 6: 1}
+    documents = {}
+    objects = {}
+    for step, substeps in steps.items():
+        for substep in range(1, substeps + 1):
+            file_name = f"Paso{step}_Subpaso{substep}.txt"
+            documents[f"tutorial_{step}_{substep}"] = {'Question': f"{step}_{substep}", 'Response': file_name}
+            objects[f"tutorial/{file_name}"] = f"Contenido del paso {step}.{substep}".encode('utf-8')
+    return FakeFirestore({'chatbotsteps': documents}, latency), FakeStorage({'bucket': objects}, latency)
+
+
+def measure(turn, reset):
+    samples = []
+    for _ in range(REPETITIONS):
+        reset()
+        with quiet():
+            start = time.perf_counter()
+            turn()
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+
+def bench_lex(latency):
+    lex = load_aws_module('lex_integration', {'bucket_name': 'bucket', 'folder_name': 'tutorial'})
+    lex.table, lex.s3 = aws_backends(latency)
+    lex.dynamodb_client = FakeDynamoClient([lex.table])
+    event = {'sessionState': {'sessionAttributes': {'step': 4}, 'intent': {'name': 'NextStep'}}}
+
+    def turn():
+        event['sessionState']['sessionAttributes'] = {'step': 4}
+        lex.lambda_handler(event, None)
+
+    print("Lex, paso 4 (5 subpasos, sin caché):")
+    for workers in WORKERS:
+        lex.STEP_FETCH_WORKERS = workers
+        print(f"  {workers} hilo(s): {measure(turn, lex._step_cache.clear):7.1f} ms")  # pylint: disable=protected-access
+
+
+def bench_dialogflow(latency):
+    firestore_client, storage_client = gcp_backends(latency)
+    dialogflow = load_gcp_module('dialogflow_integration', {'bucket_name': 'bucket', 'folder_name': 'tutorial'},
+                                 storage_client=storage_client, firestore_client=firestore_client)
+
+    def turn():
+        dialogflow.handle_step({'step': 3}, 'projects/p/agent/sessions/s', next_step=True)
+
+    print("Dialogflow, paso 3 (5 subpasos):")
+    for workers in WORKERS:
+        dialogflow.STEP_FETCH_WORKERS = workers
+        print(f"  {workers} hilo(s): {measure(turn, lambda: None):7.1f} ms")
+
+
+def main():
+    latency = float(sys.argv[1]) / 1e3 if len(sys.argv) > 1 else 0.02
+    print(f"Latencia simulada por llamada: {latency * 1e3:.0f} ms\n")
+    bench_lex(latency)
+    bench_dialogflow(latency)
+
+
+if __name__ == '__main__':
+    main()
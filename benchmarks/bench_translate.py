@@ -0,0 +1,98 @@
+"""
+Mide el tiempo de traducción de documentos largos en AWS/result_textract.py con distintos tamaños
+del grupo de hilos (TRANSLATE_WORKERS), contra sustitutos locales de Comprehend y Translate cuya
+latencia crece con el tamaño de cada petición.
+
+También comprueba que el texto reensamblado coincide con el original (el sustituto de Translate
+devuelve el texto sin cambios) y que una única petición con el documento completo se rechazaría. Antes,
+sobre textos aleatorios con párrafos, frases, espacios y caracteres multibyte, comprueba que
+common.text.split_text cumple ''.join(fragmentos) == texto y que ningún fragmento supera el tamaño pedido.
+
+Uso:
+    python benchmarks/bench_translate.py [tamaño_kb]
+"""
+import random
+import statistics
+import sys
+import time
+
+from fakes import FakeComprehend, FakeTranslate, load_aws_module, quiet  # pylint: disable=import-error
+
+FUZZ_CASES = 20000
+SEED = 11
+# Fragmentos con los que se construyen los textos aleatorios: fronteras de párrafo, línea, frase y
+# palabra, palabras largas y caracteres de 2, 3 y 4 bytes en UTF-8.
+ALPHABET = ('palabra', 'x', 'ñandú', '€', '🙂', ' ', '\t', '\n', '\n\n', '. ', '? ', '…\n', ';',
+            'supercalifragilístico')
+
+REPETITIONS = 3
+WORKERS = (1, 2, 4, 8, 16)
+LATENCY = 0.05
+PER_KB = 0.01
+
+PARAGRAPH = ("The extracted document contains several sentences per paragraph. "
+             "Each sentence is long enough to look like real text from a manual! "
+             "Does the chunker keep the sentence boundaries? It should.\n")
+
+
+def build_document(size_kb):
+    paragraphs = []
+    size = 0
+    while size < size_kb * 1024:
+        paragraphs.append(PARAGRAPH * 4)
+        size += len(paragraphs[-1])
+    return "\n".join(paragraphs)
+
+
+def check_split_text(split_text):
+    """Comprueba el invariante de split_text en el que se apoya translate_content sobre FUZZ_CASES textos aleatorios."""
+    rng = random.Random(SEED)
+    for _ in range(FUZZ_CASES):
+        text = ''.join(rng.choice(ALPHABET) for _ in range(rng.randrange(40)))
+        max_bytes = rng.randrange(4, 64)
+        chunks = split_text(text, max_bytes)
+        assert ''.join(chunks) == text, (text, max_bytes)
+        assert all(chunk and len(chunk.encode('utf-8')) <= max_bytes for chunk in chunks), (text, max_bytes)
+    print(f"split_text reproduce el texto original en {FUZZ_CASES} textos aleatorios\n")
+
+
+def main():
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    text = build_document(size_kb)
+    result_textract = load_aws_module('result_textract', {'BUCKET_NAME': 'bucket'})
+    result_textract.comprehend = FakeComprehend('en')
+    check_split_text(result_textract.split_text)
+
+    print(f"Documento de {len(text.encode('utf-8')) // 1024} KB, latencia por petición "
+          f"{LATENCY * 1e3:.0f} ms + {PER_KB * 1e3:.0f} ms/KB\n")
+
+    single = FakeTranslate()
+    try:
+        single.translate_text(Text=text, SourceLanguageCode='en', TargetLanguageCode='es')
+        print("Una sola petición: aceptada")
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Una sola petición: rechazada ({e})")
+
+    baseline = None
+    for workers in WORKERS:
+        result_textract.TRANSLATE_WORKERS = workers
+        samples = []
+        for _ in range(REPETITIONS):
+            result_textract.translate = FakeTranslate(LATENCY, PER_KB)
+            with quiet():
+                start = time.perf_counter()
+                translated = result_textract.translate_content(text)
+            samples.append(time.perf_counter() - start)
+        assert translated == text, "el texto reensamblado no coincide con el original"
+        elapsed = statistics.median(samples)
+        baseline = baseline or elapsed
+        calls = result_textract.translate.calls['translate_text']
+        print(f"  {workers:>2} hilo(s): {elapsed * 1e3:8.1f} ms  {size_kb / elapsed:8.1f} KB/s  "
+              f"x{baseline / elapsed:4.1f}  ({calls} peticiones)")
+
+    print(f"\nBytes enviados a Comprehend por documento: "
+          f"{result_textract.comprehend.bytes_sent // (len(WORKERS) * REPETITIONS)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Banco de pruebas de los turnos más habituales de los dos bots: reproduce eventos grabados de Lex
+(events/lex.json) contra AWS/lex_integration.lambda_handler y de Dialogflow (events/dialogflow.json)
+contra GCP/dialogflow_integration.dialogflow_webhook, con sustitutos locales de DynamoDB + S3 y de
+Firestore + Cloud Storage.
+
+Los datos se cargan con las propias funciones de carga (AWS/campos_dynamoDB.py y
+GCP/load_data_to_firestore.py), incluido el manifiesto del tutorial, de modo que tienen la misma forma
+que en la nube. Para cada intención (StartTutorial, NextStep, GoToStep y preguntas frecuentes) se
+muestra:
+- p50 y p99 de la latencia por turno con el contenedor caliente.
+- Viajes de red por turno en caliente y en frío (con todas las cachés del módulo vacías), y el p50 de
+  la latencia en frío.
+- Memoria: pico y memoria retenida por turno, medidos con tracemalloc en una pasada aparte.
+
+Con --json se guardan los resultados, y con --comparar se muestran las diferencias de p50 y de viajes
+respecto a una ejecución anterior guardada, para medir en local el efecto de cada cambio.
+
+Uso:
+    python benchmarks/bench_webhooks.py [--turnos N] [--latencia MS] [--json RUTA] [--comparar RUTA]
+"""
+import argparse
+import copy
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+from unittest import mock
+
+from fakes import (FakeDynamoClient, FakeDynamoResource, FakeDynamoTable, FakeFirestore, FakeS3,  # pylint: disable=import-error
+                   FakeStorage, load_aws_module, load_gcp_module, quiet)
+
+EVENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'events')
+ENV = {'bucket_name': 'bucket', 'folder_name': 'tutorial'}
+INTENTS = ('StartTutorial', 'NextStep', 'GoToStep', 'FAQ')
+TRACED_TURNS = 20
+STEP_TEXT = ("En este subpaso se explica cómo configurar el servicio desde la consola, qué opciones dejar por "
+             "defecto y qué permisos hacen falta. ") * 15
+
+
+def load_events(name):
+    with open(os.path.join(EVENTS_DIR, f"{name}.json"), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def step_files(steps):
+    return {
+        f"tutorial/Paso{step}_Subpaso{substep}.txt": f"Paso {step}.{substep}. {STEP_TEXT}".encode('utf-8')
+        for step, substeps in steps.items()
+        for substep in range(1, substeps + 1)
+    }
+
+
+class LexPlatform:
+    """Lambda de Lex con DynamoDB y S3 sustituidos, cargados con campos_dynamoDB.lambda_handler."""
+
+    name = 'Lex'
+
+    def __init__(self, latency):
+        loader = load_aws_module('campos_dynamoDB', ENV)
+        steps = {int(step): substeps for step, substeps in loader.load_content()['steps'].items()}
+        self.table = FakeDynamoTable()
+        self.s3 = FakeS3(step_files(steps))
+        loader.dynamodb, loader.table, loader.s3 = FakeDynamoResource({self.table.name: self.table}), self.table, self.s3
+        with quiet():
+            loader.lambda_handler({}, None)
+
+        self.module = load_aws_module('lex_integration', ENV)
+        self.module.table, self.module.s3 = self.table, self.s3
+        self.module.dynamodb_client = FakeDynamoClient([self.table])
+        self.table.latency = self.s3.latency = latency
+        self.backends = (self.table, self.s3)
+
+    def reset_caches(self):
+        module = self.module
+        module._step_cache.clear()  # pylint: disable=protected-access
+        module._response_cache.clear()  # pylint: disable=protected-access
+        module._question_index.update(built_at=None, engine=None)  # pylint: disable=protected-access
+        module._manifest.update(loaded_at=None, etag=None, manifest=None)  # pylint: disable=protected-access
+
+    def turn(self, event):
+        return self.module.lambda_handler(event, None)
+
+
+class DialogflowPlatform:
+    """Webhook de Dialogflow con Firestore y Cloud Storage sustituidos, cargados con load_data_to_firestore."""
+
+    name = 'Dialogflow'
+
+    def __init__(self, latency):
+        self.firestore = FakeFirestore()
+        self.storage = FakeStorage({'bucket': step_files({1: 1, 2: 2, 3: 5, 4: 3, 5: 3, 6: 1})})
+        loader = load_gcp_module('load_data_to_firestore', ENV, storage_client=self.storage,
+                                 firestore_client=self.firestore)
+        with mock.patch('google.cloud.firestore.Client', return_value=self.firestore), \
+                mock.patch('google.cloud.storage.Client', return_value=self.storage), quiet():
+            loader.load_data_to_firestore(SimpleNamespace(args={}))
+
+        self.module = load_gcp_module('dialogflow_integration', ENV, storage_client=self.storage,
+                                      firestore_client=self.firestore)
+        self.firestore.latency = self.storage.latency = latency
+        self.backends = (self.firestore, self.storage)
+
+    def reset_caches(self):
+        self.module._manifest.update(loaded_at=None, manifest=None)  # pylint: disable=protected-access
+
+    def turn(self, event):
+        return self.module.dialogflow_webhook(SimpleNamespace(get_json=lambda: event))
+
+
+def round_trips(platform):
+    return sum(backend.round_trips() for backend in platform.backends)
+
+
+def run_turns(platform, events, turns, cold=False):
+    """Ejecuta turnos recorriendo los eventos en orden; devuelve las latencias en ms y los viajes por turno."""
+    latencies = []
+    trips = []
+    for number in range(turns):
+        event = copy.deepcopy(events[number % len(events)])
+        if cold:
+            platform.reset_caches()
+        before = round_trips(platform)
+        with quiet():
+            start = time.perf_counter()
+            platform.turn(event)
+            latencies.append((time.perf_counter() - start) * 1e3)
+        trips.append(round_trips(platform) - before)
+    return latencies, trips
+
+
+def trace_turns(platform, events):
+    """Mide con tracemalloc el pico de memoria y la memoria retenida de cada turno (en KB)."""
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        for number in range(TRACED_TURNS):
+            event = copy.deepcopy(events[number % len(events)])
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            with quiet():
+                platform.turn(event)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+            retained.append((current - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(peaks), statistics.mean(retained)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def bench_platform(platform, events, turns):
+    results = {}
+    for intent in INTENTS:
+        intent_events = events[intent]
+        cold_latencies, cold_trips = run_turns(platform, intent_events, len(intent_events), cold=True)
+        run_turns(platform, intent_events, len(intent_events))  # calentamiento
+        latencies, trips = run_turns(platform, intent_events, turns)
+        peak_kb, retained_kb = trace_turns(platform, intent_events)
+        results[intent] = {
+            'p50_ms': statistics.median(latencies),
+            'p99_ms': percentile(latencies, 0.99),
+            'viajes_turno': statistics.mean(trips),
+            'viajes_frio': statistics.mean(cold_trips),
+            'p50_frio_ms': statistics.median(cold_latencies),
+            'pico_kb': peak_kb,
+            'retenido_kb': retained_kb,
+        }
+    return results
+
+
+def print_results(name, results, baseline=None):
+    print(f"\n{name}")
+    print(f"  {'intención':<14} {'p50 ms':>8} {'p99 ms':>8} {'viajes/turno':>12} {'viajes frío':>11} "
+          f"{'p50 frío ms':>11} {'KB pico':>8} {'KB retenidos':>12}")
+    for intent, row in results.items():
+        line = (f"  {intent:<14} {row['p50_ms']:8.3f} {row['p99_ms']:8.3f} {row['viajes_turno']:12.2f} "
+                f"{row['viajes_frio']:11.2f} {row['p50_frio_ms']:11.3f} {row['pico_kb']:8.1f} {row['retenido_kb']:12.2f}")
+        previous = (baseline or {}).get(name, {}).get(intent)
+        if previous:
+            change = (row['p50_ms'] / previous['p50_ms'] - 1) * 100 if previous['p50_ms'] else 0.0
+            line += (f"   p50 {change:+.0f}%  viajes {row['viajes_turno'] - previous['viajes_turno']:+.2f}"
+                     f"/{row['viajes_frio'] - previous['viajes_frio']:+.2f}")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de pruebas de los webhooks de Lex y Dialogflow.")
+    parser.add_argument('--turnos', type=int, default=200, help="turnos medidos por intención")
+    parser.add_argument('--latencia', type=float, default=0.0, help="latencia simulada por llamada, en ms")
+    parser.add_argument('--json', help="guarda los resultados en este fichero")
+    parser.add_argument('--comparar', help="compara con los resultados guardados en este fichero")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            baseline = json.load(f)['resultados']
+
+    print(f"{args.turnos} turnos por intención, latencia simulada {args.latencia:.0f} ms por llamada")
+    all_results = {}
+    for platform_class, events_name in ((LexPlatform, 'lex'), (DialogflowPlatform, 'dialogflow')):
+        with quiet():
+            platform = platform_class(args.latencia / 1e3)
+        results = bench_platform(platform, load_events(events_name), args.turnos)
+        all_results[platform.name] = results
+        print_results(platform.name, results, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'turnos': args.turnos, 'latencia_ms': args.latencia, 'resultados': all_results}, f, indent=2)
+        print(f"\nResultados guardados en {args.json}")
+
+
+if __name__ == '__main__':
+    main()
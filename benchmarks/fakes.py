@@ -0,0 +1,683 @@
+"""
+Sustitutos en memoria de S3, DynamoDB, Comprehend, Translate, Textract, Cloud Storage, Firestore, Cloud Tasks
+y Document AI para los benchmarks locales.
+
+Cada sustituto simula una latencia fija por llamada (time.sleep libera el GIL, igual que la E/S
+de red real) y cuenta las llamadas por operación, de modo que los benchmarks pueden comparar
+tanto el tiempo como el número de viajes de red por turno.
+
+También incluye funciones para importar los módulos de AWS/ y GCP/ con sus variables de entorno
+y con los clientes sustituidos, sin necesidad de credenciales.
+"""
+import asyncio
+import base64
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeBackend:
+    """Base de los sustitutos: simula latencia y cuenta llamadas y bytes devueltos."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+
+    def _call(self, operation):
+        with self._lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _read(self, payload):
+        """Anota el tamaño aproximado (JSON) de los datos devueltos y los devuelve."""
+        with self._lock:
+            self.bytes_read += len(json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8'))
+        return payload
+
+    def round_trips(self):
+        """Número total de llamadas realizadas."""
+        return sum(self.calls.values())
+
+
+class FakeClientError(Exception):
+    """Error con la misma forma que botocore.exceptions.ClientError."""
+
+    def __init__(self, code, operation):
+        super().__init__(f"{operation}: {code}")
+        self.response = {'Error': {'Code': code}}
+
+
+def client_error(code, operation):
+    """Crea un ClientError de botocore si está disponible, o un equivalente en caso contrario."""
+    try:
+        from botocore.exceptions import ClientError  # pylint: disable=import-outside-toplevel
+        return ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+    except ImportError:
+        return FakeClientError(code, operation)
+
+
+class FakeDynamoTable(FakeBackend):
+    """
+    Tabla de DynamoDB, por defecto con clave (IntentName, Question). Con page_size, query y scan devuelven
+    como mucho page_size elementos por llamada y LastEvaluatedKey, como DynamoDB al llegar a 1 MB.
+    """
+
+    def __init__(self, items=(), latency=0.0, key_names=('IntentName', 'Question'), page_size=None,
+                 name='ChatbotResponses'):
+        super().__init__(latency)
+        self.name = name
+        self.key_names = key_names
+        self.page_size = page_size
+        self.items = {}
+        for item in items:
+            self.items[self._key(item)] = dict(item)
+
+    def _key(self, item):
+        return tuple(item[name] for name in self.key_names)
+
+    @staticmethod
+    def _project(item, kwargs):
+        expression = kwargs.get('ProjectionExpression')
+        if not expression:
+            return dict(item)
+        names = kwargs.get('ExpressionAttributeNames', {})
+        fields = [names.get(field.strip(), field.strip()) for field in expression.split(',')]
+        return {field: item[field] for field in fields if field in item}
+
+    def get_item(self, Key, **kwargs):
+        self._call('get_item')
+        item = self.items.get(self._key(Key))
+        return {'Item': self._read(self._project(item, kwargs))} if item is not None else {}
+
+    def put_item(self, Item, **_kwargs):
+        self._call('put_item')
+        self.items[self._key(Item)] = dict(Item)
+        return {}
+
+    def _page(self, entries, kwargs):
+        start_key = kwargs.get('ExclusiveStartKey')
+        if start_key is not None:
+            start = self._key(start_key)
+            entries = [(key, item) for key, item in entries if key > start]
+        response = {}
+        if self.page_size is not None and len(entries) > self.page_size:
+            entries = entries[:self.page_size]
+            response['LastEvaluatedKey'] = dict(zip(self.key_names, entries[-1][0]))
+        response['Items'] = self._read([self._project(item, kwargs) for _, item in entries])
+        return response
+
+    def query(self, KeyConditionExpression=None, **kwargs):
+        self._call('query')
+        intent_name = KeyConditionExpression.get_expression()['values'][1]
+        return self._page([(key, item) for key, item in sorted(self.items.items()) if key[0] == intent_name], kwargs)
+
+    def scan(self, **kwargs):
+        self._call('scan')
+        return self._page(sorted(self.items.items()), kwargs)
+
+
+class FakeDynamoResource:
+    """Recurso de DynamoDB que devuelve las tablas sustitutas por nombre."""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def Table(self, name):  # pylint: disable=invalid-name
+        return self.tables[name]
+
+    def batch_write_item(self, RequestItems, **_kwargs):
+        for name, requests in RequestItems.items():
+            table = self.tables[name]
+            table._call('batch_write_item')  # pylint: disable=protected-access
+            for request in requests:
+                item = request['PutRequest']['Item']
+                table.items[table._key(item)] = dict(item)  # pylint: disable=protected-access
+        return {'UnprocessedItems': {}}
+
+
+class FakeDynamoClient:
+    """
+    Cliente de bajo nivel de DynamoDB sobre las tablas sustitutas: traduce los valores con tipo
+    ({'S': ...}) y cuenta las llamadas en la tabla correspondiente.
+    """
+
+    def __init__(self, tables):
+        self.tables = {table.name: table for table in tables}
+
+    def get_item(self, TableName, Key, **kwargs):
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer  # pylint: disable=import-outside-toplevel
+        deserializer = TypeDeserializer()
+        serializer = TypeSerializer()
+        key = {name: deserializer.deserialize(value) for name, value in Key.items()}
+        response = self.tables[TableName].get_item(Key=key, **kwargs)
+        if 'Item' in response:
+            response['Item'] = {name: serializer.serialize(value) for name, value in response['Item'].items()}
+        return response
+
+
+class FakeS3(FakeBackend):
+    """Cliente de S3 con los objetos guardados en un diccionario clave -> bytes."""
+
+    def __init__(self, objects=None, latency=0.0):
+        super().__init__(latency)
+        self.objects = dict(objects or {})
+        self.uploads = {}
+
+    def _etag(self, key):
+        return f'"{hash(self.objects[key]) & 0xffffffff:08x}"'
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None, **_kwargs):
+        self._call('get_object')
+        if Key not in self.objects:
+            raise client_error('NoSuchKey', 'GetObject')
+        etag = self._etag(Key)
+        if IfNoneMatch is not None and IfNoneMatch == etag:
+            raise client_error('304', 'GetObject')
+        return {'Body': io.BytesIO(self.objects[Key]), 'ETag': etag, 'Bucket': Bucket}
+
+    def head_object(self, Bucket, Key, **_kwargs):
+        self._call('head_object')
+        if Key not in self.objects:
+            raise client_error('404', 'HeadObject')
+        return {'ETag': self._etag(Key), 'ContentLength': len(self.objects[Key]), 'Bucket': Bucket}
+
+    def put_object(self, Bucket, Key, Body, **_kwargs):
+        self._call('put_object')
+        self.objects[Key] = Body if isinstance(Body, bytes) else Body.encode('utf-8')
+        return {'ETag': self._etag(Key), 'Bucket': Bucket}
+
+    def create_multipart_upload(self, Bucket, Key, **_kwargs):
+        self._call('create_multipart_upload')
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = (Key, {})
+        return {'UploadId': upload_id, 'Bucket': Bucket, 'Key': Key}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **_kwargs):
+        self._call('upload_part')
+        self.uploads[UploadId][1][PartNumber] = Body
+        return {'ETag': f'"part-{PartNumber}"', 'Bucket': Bucket}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **_kwargs):
+        self._call('complete_multipart_upload')
+        _, parts = self.uploads.pop(UploadId)
+        self.objects[Key] = b''.join(parts[part['PartNumber']] for part in MultipartUpload['Parts'])
+        return {'ETag': self._etag(Key), 'Bucket': Bucket}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **_kwargs):
+        self._call('abort_multipart_upload')
+        self.uploads.pop(UploadId, None)
+        return {'Bucket': Bucket}
+
+
+class FakeComprehend(FakeBackend):
+    """Cliente de Comprehend: detecta siempre el idioma indicado y respeta el límite de 100 KB por petición."""
+
+    MAX_BYTES = 100000
+
+    def __init__(self, language_code='en', latency=0.0):
+        super().__init__(latency)
+        self.language_code = language_code
+        self.bytes_sent = 0
+
+    def detect_dominant_language(self, Text):
+        self._call('detect_dominant_language')
+        size = len(Text.encode('utf-8'))
+        self.bytes_sent += size
+        if size > self.MAX_BYTES:
+            raise client_error('TextSizeLimitExceededException', 'DetectDominantLanguage')
+        return {'Languages': [{'LanguageCode': self.language_code, 'Score': 0.99}]}
+
+
+class FakeTranslate(FakeBackend):
+    """
+    Cliente de Translate que devuelve el texto sin cambios. La latencia de cada petición crece con
+    su tamaño (latency + per_kb por cada KB) y se rechazan las peticiones de más de 10.000 bytes.
+    """
+
+    MAX_BYTES = 10000
+
+    def __init__(self, latency=0.0, per_kb=0.0):
+        super().__init__(latency)
+        self.per_kb = per_kb
+
+    def translate_text(self, Text, SourceLanguageCode, TargetLanguageCode, **_kwargs):
+        size = len(Text.encode('utf-8'))
+        self._call('translate_text')
+        if size > self.MAX_BYTES:
+            raise client_error('TextSizeLimitExceededException', 'TranslateText')
+        if self.per_kb:
+            time.sleep(self.per_kb * size / 1024)
+        return {'TranslatedText': Text, 'SourceLanguageCode': SourceLanguageCode,
+                'TargetLanguageCode': TargetLanguageCode}
+
+
+class FakeTextract(FakeBackend):
+    """
+    Cliente de Textract que devuelve los bloques de un trabajo ya terminado en respuestas de como mucho
+    page_size bloques enlazadas con NextToken, como get_document_text_detection.
+    """
+
+    def __init__(self, blocks, latency=0.0, page_size=1000):
+        super().__init__(latency)
+        self.blocks = blocks
+        self.page_size = page_size
+
+    def get_document_text_detection(self, JobId, NextToken=None, **_kwargs):
+        self._call('get_document_text_detection')
+        start = int(NextToken or 0)
+        end = start + self.page_size
+        response = {'JobStatus': 'SUCCEEDED', 'Blocks': self.blocks[start:end]}
+        if end < len(self.blocks):
+            response['NextToken'] = str(end)
+        return response
+
+
+class FakeSnapshot:
+    """Instantánea de un documento de Firestore."""
+
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    """Referencia a un documento de Firestore."""
+
+    def __init__(self, collection, doc_id):
+        self.collection = collection
+        self.id = doc_id
+
+    def get(self, field_paths=None, **_kwargs):
+        self.collection.backend._call('document.get')
+        data = self.collection.documents.get(self.id)
+        if data is not None and field_paths is not None:
+            data = {field: data[field] for field in field_paths if field in data}
+        return FakeSnapshot(self.id, self.collection.backend._read(data))
+
+    def set(self, data, **_kwargs):
+        self.collection.backend._call('document.set')
+        self.collection.documents[self.id] = dict(data)
+
+    def delete(self, **_kwargs):
+        self.collection.backend._call('document.delete')
+        self.collection.documents.pop(self.id, None)
+
+
+class FakeQuery:
+    """Consulta con filtros de igualdad y proyección sobre una colección de Firestore."""
+
+    def __init__(self, collection, filters=(), fields=None):
+        self.collection = collection
+        self.filters = list(filters)
+        self.fields = fields
+
+    def where(self, field, op, value):
+        if op != '==':
+            raise NotImplementedError(op)
+        return FakeQuery(self.collection, self.filters + [(field, value)], self.fields)
+
+    def select(self, field_paths):
+        return FakeQuery(self.collection, self.filters, list(field_paths))
+
+    def stream(self):
+        self.collection.backend._call('query.stream')
+        for doc_id, data in sorted(self.collection.documents.items()):
+            if all(data.get(field) == value for field, value in self.filters):
+                if self.fields is not None:
+                    data = {field: data[field] for field in self.fields if field in data}
+                yield FakeSnapshot(doc_id, self.collection.backend._read(data))
+
+
+class FakeCollection(FakeQuery):
+    """Colección de Firestore."""
+
+    def __init__(self, backend, documents):
+        self.backend = backend
+        self.documents = documents
+        super().__init__(self)
+
+    def document(self, doc_id):
+        return FakeDocument(self, doc_id)
+
+
+class FakeWriteBatch:
+    """Lote de escrituras de Firestore: una sola llamada al confirmar."""
+
+    def __init__(self, backend, call_name='batch.commit'):
+        self.backend = backend
+        self.call_name = call_name
+        self.operations = []
+
+    def set(self, reference, data, **_kwargs):
+        self.operations.append((reference, dict(data)))
+
+    def delete(self, reference, **_kwargs):
+        self.operations.append((reference, None))
+
+    def commit(self):
+        self.backend._call(self.call_name)
+        for reference, data in self.operations:
+            if data is None:
+                reference.collection.documents.pop(reference.id, None)
+            else:
+                reference.collection.documents[reference.id] = data
+        self.operations = []
+
+
+class FakeBulkWriter(FakeWriteBatch):
+    """BulkWriter de Firestore: agrupa las operaciones en lotes de 20, como el cliente real."""
+
+    def __init__(self, backend):
+        super().__init__(backend, 'bulk_writer.batch')
+
+    def _maybe_flush(self):
+        if len(self.operations) >= 20:
+            self.commit()
+
+    def set(self, reference, data, **kwargs):
+        super().set(reference, data, **kwargs)
+        self._maybe_flush()
+
+    def delete(self, reference, **kwargs):
+        super().delete(reference, **kwargs)
+        self._maybe_flush()
+
+    def close(self):
+        if self.operations:
+            self.commit()
+
+
+class FakeFirestore(FakeBackend):
+    """Cliente de Firestore con las colecciones guardadas en diccionarios."""
+
+    def __init__(self, collections=None, latency=0.0):
+        super().__init__(latency)
+        self.collections = {name: dict(docs) for name, docs in (collections or {}).items()}
+
+    def collection(self, name):
+        return FakeCollection(self, self.collections.setdefault(name, {}))
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def bulk_writer(self):
+        return FakeBulkWriter(self)
+
+
+class FakeBlob:
+    """Objeto de Cloud Storage."""
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+
+    def download_as_text(self, **_kwargs):
+        self.bucket.backend._call('blob.download')
+        if self.name not in self.bucket.objects:
+            raise FileNotFoundError(self.name)
+        return self.bucket.objects[self.name].decode('utf-8')
+
+    @property
+    def md5_hash(self):
+        data = self.bucket.objects.get(self.name)
+        return base64.b64encode(hashlib.md5(data).digest()).decode('ascii') if data is not None else None
+
+    def download_as_bytes(self, **_kwargs):
+        self.bucket.backend._call('blob.download')
+        if self.name not in self.bucket.objects:
+            raise FileNotFoundError(self.name)
+        return self.bucket.objects[self.name]
+
+    def upload_from_string(self, data, **_kwargs):
+        self.bucket.backend._call('blob.upload')
+        self.bucket.objects[self.name] = data if isinstance(data, bytes) else data.encode('utf-8')
+
+    def delete(self, **_kwargs):
+        self.bucket.backend._call('blob.delete')
+        self.bucket.objects.pop(self.name, None)
+
+
+class FakeBucket:
+    """Bucket de Cloud Storage."""
+
+    def __init__(self, backend, objects):
+        self.backend = backend
+        self.objects = objects
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name, **_kwargs):
+        self.backend._call('bucket.get_blob')
+        return FakeBlob(self, name) if name in self.objects else None
+
+    def copy_blob(self, blob, destination_bucket, new_name=None, **_kwargs):
+        self.backend._call('bucket.copy_blob')
+        if blob.name not in self.objects:
+            raise FileNotFoundError(blob.name)
+        destination_bucket.objects[new_name or blob.name] = self.objects[blob.name]
+        return FakeBlob(destination_bucket, new_name or blob.name)
+
+
+class FakeStorage(FakeBackend):
+    """Cliente de Cloud Storage con los objetos de cada bucket en un diccionario."""
+
+    def __init__(self, buckets=None, latency=0.0):
+        super().__init__(latency)
+        self.buckets = {name: dict(objects) for name, objects in (buckets or {}).items()}
+
+    def bucket(self, name):
+        return FakeBucket(self, self.buckets.setdefault(name, {}))
+
+    def get_bucket(self, name):
+        return self.bucket(name)
+
+    def list_blobs(self, bucket_or_name, prefix=None, **_kwargs):
+        self._call('list_blobs')
+        bucket = self.bucket(getattr(bucket_or_name, 'name', bucket_or_name))
+        return [FakeBlob(bucket, name) for name in sorted(bucket.objects) if name.startswith(prefix or '')]
+
+
+class FakeCloudTasks(FakeBackend):
+    """Cliente de Cloud Tasks que guarda las tareas creadas."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.tasks = []
+
+    @staticmethod
+    def queue_path(project, location, queue):
+        return f"projects/{project}/locations/{location}/queues/{queue}"
+
+    def create_task(self, request, **_kwargs):
+        self._call('create_task')
+        with self._lock:
+            self.tasks.append(request)
+        return request['task']
+
+
+class FakeCloudTasksAsync(FakeCloudTasks):
+    """Cliente asíncrono de Cloud Tasks: la latencia se simula sin bloquear el bucle de eventos."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(0.0)
+        self.async_latency = latency
+
+    async def create_task(self, request, **kwargs):  # pylint: disable=invalid-overridden-method
+        if self.async_latency:
+            await asyncio.sleep(self.async_latency)
+        return super().create_task(request, **kwargs)
+
+
+class FakeOperation:
+    """Operación de larga duración de un lote de Document AI."""
+
+    def __init__(self, name, statuses, duration):
+        self.operation = SimpleNamespace(name=name)
+        self.metadata = SimpleNamespace(individual_process_statuses=statuses)
+        self._done_at = time.perf_counter() + duration
+
+    def result(self, timeout=None):
+        remaining = self._done_at - time.perf_counter()
+        if timeout is not None and remaining > timeout:
+            raise TimeoutError(self.operation.name)
+        if remaining > 0:
+            time.sleep(remaining)
+        return SimpleNamespace()
+
+
+class FakeDocumentAI(FakeBackend):
+    """
+    Procesador de Document AI. El "PDF" es texto con las páginas separadas por saltos de página
+    (\\f), o un PDF real cuyas páginas llevan su texto en la clave /Texto (ver fake_pdf); el texto
+    extraído es el de cada página seguido de un salto de línea.
+
+    process_document (asíncrono) procesa un documento en línea y tarda latency + per_page por página;
+    con page_limit, rechaza como el servicio real (InvalidArgument) los documentos de más páginas, y
+    max_pages guarda el mayor número de páginas aceptado en una petición. batch_process_documents deja en el
+    bucket de salida un JSON por cada pages_per_shard páginas de cada documento, como el servicio
+    real, y la operación tarda latency + per_document por documento en terminar.
+    """
+
+    def __init__(self, storage_client, latency=0.0, per_document=0.0, pages_per_shard=2, per_page=0.0,
+                 page_limit=None):
+        super().__init__(0.0)
+        self.storage_client = storage_client
+        self.page_limit = page_limit
+        self.duration = latency
+        self.per_document = per_document
+        self.pages_per_shard = pages_per_shard
+        self.per_page = per_page
+        self.max_pages = 0
+        self.operations = 0
+
+    @staticmethod
+    def processor_path(project, location, processor):
+        return f"projects/{project}/locations/{location}/processors/{processor}"
+
+    @staticmethod
+    def _pages(content):
+        if content.startswith(b'%PDF'):
+            from pypdf import PdfReader  # pylint: disable=import-outside-toplevel
+            return [str(page.get('/Texto', '')) for page in PdfReader(io.BytesIO(content)).pages]
+        return content.decode('utf-8').split('\f')
+
+    def _read_pages(self, gcs_uri):
+        bucket_name, _, name = gcs_uri[len('gs://'):].partition('/')
+        return self._pages(self.storage_client.buckets[bucket_name][name])
+
+    async def process_document(self, request, **_kwargs):
+        self._call('process_document')
+        if request.raw_document.content:
+            pages = self._pages(request.raw_document.content)
+        else:
+            pages = self._read_pages(request.gcs_document.gcs_uri)
+        if self.page_limit is not None and len(pages) > self.page_limit:
+            from google.api_core import exceptions  # pylint: disable=import-outside-toplevel
+            raise exceptions.InvalidArgument(
+                f"Document pages exceed the limit: {self.page_limit} got {len(pages)}")
+        with self._lock:
+            self.max_pages = max(self.max_pages, len(pages))
+        if self.duration or self.per_page:
+            await asyncio.sleep(self.duration + self.per_page * len(pages))
+        return SimpleNamespace(document=SimpleNamespace(text=''.join(page + '\n' for page in pages)))
+
+    def batch_process_documents(self, request, **_kwargs):
+        self._call('batch_process_documents')
+        self.operations += 1
+        operation_id = f"op{self.operations}"
+        output_uri = request.document_output_config.gcs_output_config.gcs_uri.rstrip('/')
+        bucket_name, _, prefix = output_uri[len('gs://'):].partition('/')
+        output_objects = self.storage_client.buckets.setdefault(bucket_name, {})
+
+        statuses = []
+        documents = request.input_documents.gcs_documents.documents
+        for index, document in enumerate(documents):
+            pages = self._read_pages(document.gcs_uri)
+            shards = [pages[i:i + self.pages_per_shard] for i in range(0, len(pages), self.pages_per_shard)]
+            destination = f"{prefix}/{operation_id}/{index}"
+            offset = 0
+            for shard_index, shard in enumerate(shards):
+                text = ''.join(page + '\n' for page in shard)
+                output_objects[f"{destination}/documento-{shard_index}.json"] = json.dumps({
+                    'text': text,
+                    'shardInfo': {'shardIndex': shard_index, 'shardCount': len(shards), 'textOffset': offset}
+                }).encode('utf-8')
+                offset += len(text)
+            statuses.append(SimpleNamespace(
+                input_gcs_source=document.gcs_uri,
+                output_gcs_destination=f"gs://{bucket_name}/{destination}",
+                status=SimpleNamespace(code=0, message='')
+            ))
+        return FakeOperation(f"operations/{operation_id}", statuses, self.duration + self.per_document * len(documents))
+
+
+def fake_pdf(pages):
+    """
+    Crea un PDF real (con pypdf) de páginas en blanco que llevan su texto en la clave /Texto, para que
+    FakeDocumentAI pueda "extraerlo" también de los fragmentos generados al dividir el PDF.
+    """
+    from pypdf import PdfWriter  # pylint: disable=import-outside-toplevel
+    from pypdf.generic import NameObject, TextStringObject  # pylint: disable=import-outside-toplevel
+    writer = PdfWriter()
+    for text in pages:
+        page = writer.add_blank_page(width=595, height=842)
+        page[NameObject('/Texto')] = TextStringObject(text)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def quiet():
+    """Contexto que descarta los print de los módulos medidos para no distorsionar los tiempos."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _import_fresh(directory, module_name, env):
+    for path in (ROOT, os.path.join(ROOT, directory)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.environ.update(env)
+    sys.modules.pop(module_name, None)
+    return importlib.import_module(module_name)
+
+
+def load_aws_module(module_name, env=None):
+    """
+    Importa un módulo de AWS/ con una región y variables de entorno de prueba.
+
+    Los clientes de boto3 se crean sin contactar con AWS; el benchmark debe sustituirlos después.
+    """
+    defaults = {'AWS_DEFAULT_REGION': 'eu-west-1', 'AWS_ACCESS_KEY_ID': 'test', 'AWS_SECRET_ACCESS_KEY': 'test'}
+    defaults.update(env or {})
+    return _import_fresh('AWS', module_name, defaults)
+
+
+def load_gcp_module(module_name, env=None, storage_client=None, firestore_client=None):
+    """
+    Importa un módulo de GCP/ sustituyendo los clientes que se crean al importar.
+    """
+    with mock.patch('google.cloud.storage.Client', return_value=storage_client or FakeStorage()), \
+            mock.patch('google.cloud.firestore.Client', return_value=firestore_client or FakeFirestore()):
+        return _import_fresh('GCP', module_name, env or {})
@@ -0,0 +1,6 @@
+"""
+Utilidades compartidas por las funciones de AWS y de Google Cloud.
+
+Los módulos de este paquete no dependen de ningún SDK de la nube, por lo que pueden empaquetarse
+junto a cualquier función Lambda o Cloud Function que los necesite.
+"""
@@ -0,0 +1,92 @@
+"""
+Caché en memoria con política LRU y caducidad por tiempo (TTL).
+
+Está pensada para guardarse en una variable de módulo, de modo que sobreviva entre invocaciones
+mientras el contenedor de la función siga caliente. Las entradas caducadas no se descartan de
+inmediato: pueden recuperarse con get_stale para revalidarlas (por ejemplo, con un ETag) sin
+volver a descargar el contenido.
+
+Clases:
+- TTLCache: Caché LRU con TTL y contadores de aciertos y fallos.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Caché LRU con caducidad por tiempo y contadores de aciertos y fallos.
+    """
+
+    def __init__(self, maxsize=128, ttl=300, clock=time.monotonic):
+        """
+        Parámetros:
+        - maxsize: Número máximo de entradas; al superarlo se descarta la usada hace más tiempo.
+        - ttl: Segundos durante los que una entrada se considera vigente.
+        - clock: Función que devuelve el instante actual en segundos.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Devuelve el valor vigente de una clave y actualiza los contadores.
+
+        Parámetros:
+        - key: La clave a buscar.
+
+        Retorna:
+        - El valor guardado, o None si no existe o ha caducado.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self.clock() - entry[0] >= self.ttl:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_stale(self, key):
+        """
+        Devuelve el valor de una clave aunque haya caducado, sin modificar los contadores.
+
+        Parámetros:
+        - key: La clave a buscar.
+
+        Retorna:
+        - El valor guardado o None si no existe.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[1]
+
+    def set(self, key, value):
+        """
+        Guarda un valor y reinicia su tiempo de vida.
+
+        Parámetros:
+        - key: La clave.
+        - value: El valor a guardar.
+        """
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Elimina todas las entradas y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,116 @@
+"""
+Ejecución concurrente acotada para las llamadas de red de las funciones.
+
+Las descargas de los subpasos del tutorial (y otras operaciones de E/S independientes) pueden
+lanzarse en paralelo con un grupo de hilos de tamaño limitado. Los resultados se devuelven en el
+mismo orden que las entradas y el fallo de un elemento solo afecta a ese elemento.
+
+Para el código asíncrono, BackgroundLoop mantiene un único bucle de eventos en un hilo propio durante
+toda la vida de la instancia, de modo que los clientes asíncronos (ligados a su bucle) se reutilizan
+entre peticiones y las corrutinas lanzadas desde varios hilos se ejecutan a la vez en el mismo bucle.
+El bucle también ofrece un semáforo propio (limiter) para acotar cuántas de esas corrutinas avanzan a la vez.
+
+Funciones:
+- map_in_order: Aplica una función a cada elemento con un máximo de hilos y conserva el orden.
+
+Clases:
+- BackgroundLoop: Bucle de eventos persistente en un hilo en segundo plano.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def map_in_order(func, items, max_workers=4, on_error=None):
+    """
+    Aplica una función a cada elemento usando como mucho max_workers hilos y conserva el orden.
+
+    Parámetros:
+    - func: Función que recibe un elemento y devuelve su resultado.
+    - items: Elementos a procesar.
+    - max_workers: Número máximo de hilos. Con 1 o menos se procesa en serie sin crear hilos.
+    - on_error: Función que recibe el elemento y la excepción y devuelve el resultado sustituto.
+      Si no se indica, la excepción se propaga.
+
+    Retorna:
+    - Lista con los resultados en el mismo orden que items.
+    """
+    items = list(items)
+
+    def run(item):
+        try:
+            return func(item)
+        except Exception as e:
+            if on_error is None:
+                raise
+            return on_error(item, e)
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [run(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(run, items))
+
+
+class BackgroundLoop:
+    """
+    Bucle de eventos persistente que se ejecuta en un hilo en segundo plano.
+
+    El bucle se arranca la primera vez que se usa. run puede llamarse desde cualquier hilo (salvo desde
+    el propio bucle) y bloquea hasta que la corrutina termina. limiter devuelve el semáforo con el que las
+    corrutinas acotan cuántas avanzan a la vez.
+    """
+
+    def __init__(self, name='background-loop'):
+        """
+        Parámetros:
+        - name: Nombre del hilo del bucle.
+        """
+        self.name = name
+        self._loop = None
+        self._lock = threading.Lock()
+        self._limiter = None
+        self._limiter_key = None
+
+    @property
+    def loop(self):
+        """El bucle de eventos, arrancándolo si todavía no existe."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coroutine, timeout=None):
+        """
+        Ejecuta una corrutina en el bucle y espera su resultado.
+
+        Parámetros:
+        - coroutine: La corrutina a ejecutar.
+        - timeout: Segundos máximos de espera, o None para esperar sin límite.
+
+        Retorna:
+        - El resultado de la corrutina. Sus excepciones se propagan.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def limiter(self, limit):
+        """
+        Devuelve un semáforo de limit plazas ligado al bucle en el que se llama.
+
+        Debe llamarse desde una corrutina. Un asyncio.Semaphore queda ligado al primer bucle que lo usa, así
+        que se crea uno nuevo si el bucle en ejecución es otro (por ejemplo, con asyncio.run) o si cambia el
+        límite; las corrutinas que ya tenían plaza la conservan en el semáforo anterior.
+
+        Parámetros:
+        - limit: Número máximo de corrutinas que pueden tener plaza a la vez.
+
+        Retorna:
+        - El asyncio.Semaphore a usar con async with.
+        """
+        key = (asyncio.get_running_loop(), limit)
+        if self._limiter_key != key:
+            self._limiter = asyncio.Semaphore(limit)
+            self._limiter_key = key
+        return self._limiter
@@ -0,0 +1,56 @@
+"""
+Utilidades para preparar el contenido que cargan los scripts de datos en DynamoDB y Firestore y para
+identificar documentos por su contenido.
+
+Funciones:
+- content_hash: Calcula el hash del contenido de un elemento para detectar cambios entre cargas.
+- result_cache_key: Clave de la caché de resultados de extracción de un documento.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import re
+
+HASH_FIELD = 'ContentHash'
+
+
+def content_hash(item):
+    """
+    Calcula el hash del contenido de un elemento, sin incluir el propio campo de hash.
+
+    Parámetros:
+    - item: El elemento a guardar (diccionario serializable a JSON).
+
+    Retorna:
+    - El hash SHA-256 en hexadecimal.
+    """
+    payload = {key: value for key, value in item.items() if key != HASH_FIELD}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def result_cache_key(pipeline_version, content_id):
+    """
+    Calcula la clave de la caché de resultados de extracción de un documento.
+
+    La clave combina la versión del proceso de extracción (al cambiarla, los resultados anteriores dejan de
+    usarse) con el identificador del contenido del objeto: el ETag de S3 o el md5Hash de Cloud Storage. El
+    md5Hash (en base64) se pasa a hexadecimal, de modo que la clave solo contiene caracteres válidos como
+    identificador de documento de Firestore y como JobTag de Textract.
+
+    Parámetros:
+    - pipeline_version: Versión del proceso de extracción, por ejemplo 'textract-v1'.
+    - content_id: ETag o md5Hash del objeto.
+
+    Retorna:
+    - La clave, por ejemplo 'textract-v1:9e107d9d372bb6826bd81d3542a419d6', o None si no hay identificador.
+    """
+    if not content_id:
+        return None
+    content_id = content_id.strip('"')
+    if not re.fullmatch(r'[0-9a-fA-F]+(-[0-9]+)?', content_id):
+        try:
+            content_id = base64.b64decode(content_id, validate=True).hex()
+        except (binascii.Error, ValueError):
+            content_id = hashlib.sha256(content_id.encode('utf-8')).hexdigest()
+    return f"{pipeline_version}:{content_id.lower()}"
@@ -0,0 +1,155 @@
+"""
+Manifiesto del tutorial: un único objeto JSON versionado con la estructura de pasos y subpasos.
+
+El manifiesto sustituye a las búsquedas de metadatos por subpaso (DynamoDB / Firestore) y a los
+diccionarios de pasos repetidos en los webhooks. Lo generan los scripts de carga de datos y lo
+publican en el bucket, junto a los ficheros del tutorial; los webhooks lo leen una sola vez por
+contenedor.
+
+Formato:
+    {
+        "format": 1,
+        "version": "<hash de la estructura y del contenido>",
+        "steps": {
+            "1": [{"substep": 1, "key": "Paso1_Subpaso1.txt", "sha256": "...", "text": "..."}],
+            ...
+        }
+    }
+
+El campo "text" es opcional: si está presente, el webhook no necesita descargar el fichero.
+
+Funciones:
+- substep_key: Nombre del fichero de un subpaso.
+- build_manifest: Genera el manifiesto a partir del número de subpasos de cada paso.
+- dump_manifest: Serializa el manifiesto a bytes JSON en UTF-8.
+- parse_manifest: Valida y carga un manifiesto serializado.
+- step_entries: Devuelve las entradas de los subpasos de un paso.
+"""
+import hashlib
+import json
+
+MANIFEST_FORMAT = 1
+MANIFEST_FILE = 'manifest.json'
+
+
+def substep_key(step, substep):
+    """
+    Devuelve el nombre del fichero de texto de un subpaso.
+
+    Parámetros:
+    - step: El paso del tutorial.
+    - substep: El subpaso dentro del paso.
+
+    Retorna:
+    - El nombre del fichero, por ejemplo 'Paso4_Subpaso2.txt'.
+    """
+    return f"Paso{step}_Subpaso{substep}.txt"
+
+
+def build_manifest(steps, read_text=None, inline_text=False):
+    """
+    Genera el manifiesto del tutorial.
+
+    Parámetros:
+    - steps: Diccionario paso -> número de subpasos.
+    - read_text: Función opcional que recibe el nombre de un fichero y devuelve su texto (o None si
+      no existe). Se usa para calcular el hash del contenido y, si se pide, incrustarlo.
+    - inline_text: Si es True, el texto de cada subpaso se incluye en el manifiesto.
+
+    Retorna:
+    - El manifiesto como diccionario.
+    """
+    manifest_steps = {}
+    for step, substeps in sorted(steps.items()):
+        entries = []
+        for substep in range(1, substeps + 1):
+            entry = {'substep': substep, 'key': substep_key(step, substep)}
+            text = read_text(entry['key']) if read_text is not None else None
+            if text is not None:
+                entry['sha256'] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                if inline_text:
+                    entry['text'] = text
+            entries.append(entry)
+        manifest_steps[str(step)] = entries
+
+    fingerprint = json.dumps(
+        {step: [(e['key'], e.get('sha256')) for e in entries] for step, entries in manifest_steps.items()},
+        sort_keys=True
+    )
+    return {
+        'format': MANIFEST_FORMAT,
+        'version': hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:16],
+        'steps': manifest_steps
+    }
+
+
+def dump_manifest(manifest):
+    """
+    Serializa el manifiesto.
+
+    Parámetros:
+    - manifest: El manifiesto como diccionario.
+
+    Retorna:
+    - Los bytes JSON en UTF-8.
+    """
+    return json.dumps(manifest, ensure_ascii=False).encode('utf-8')
+
+
+def parse_manifest(raw):
+    """
+    Carga y valida un manifiesto serializado.
+
+    Parámetros:
+    - raw: Bytes o texto JSON del manifiesto.
+
+    Retorna:
+    - El manifiesto con las claves de 'steps' convertidas a enteros.
+
+    Lanza:
+    - ValueError si no es JSON válido, si el formato no es compatible o si la estructura no es la esperada
+      (cualquier error de forma se notifica con ValueError, para que los webhooks lo traten como un
+      manifiesto no disponible).
+    """
+    manifest = json.loads(raw)
+    if not isinstance(manifest, dict):
+        raise ValueError("El manifiesto no es un objeto JSON")
+    if manifest.get('format') != MANIFEST_FORMAT:
+        raise ValueError(f"Formato de manifiesto no soportado: {manifest.get('format')}")
+    if not isinstance(manifest.get('version'), str):
+        raise ValueError("El manifiesto no tiene versión")
+    steps = manifest.get('steps')
+    if not isinstance(steps, dict):
+        raise ValueError("El manifiesto no tiene el diccionario 'steps'")
+
+    parsed_steps = {}
+    for step, entries in steps.items():
+        try:
+            step_number = int(step)
+        except ValueError:
+            raise ValueError(f"Paso no válido en el manifiesto: {step!r}") from None
+        if not isinstance(entries, list):
+            raise ValueError(f"Las entradas del paso {step} no son una lista")
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get('substep'), int) \
+                    or not isinstance(entry.get('key'), str):
+                raise ValueError(f"Entrada no válida en el paso {step}: {entry!r}")
+            if 'text' in entry and not isinstance(entry['text'], str):
+                raise ValueError(f"Texto no válido en el paso {step}, subpaso {entry['substep']}")
+        parsed_steps[step_number] = entries
+    manifest['steps'] = parsed_steps
+    return manifest
+
+
+def step_entries(manifest, step):
+    """
+    Devuelve las entradas de los subpasos de un paso, ordenadas por subpaso.
+
+    Parámetros:
+    - manifest: El manifiesto cargado con parse_manifest.
+    - step: El paso del tutorial.
+
+    Retorna:
+    - Lista de entradas, vacía si el paso no existe.
+    """
+    return sorted(manifest['steps'].get(step, []), key=lambda entry: entry['substep'])
@@ -0,0 +1,419 @@
+"""
+Motor de recuperación compartido por los webhooks de Lex y Dialogflow.
+
+Normaliza el texto en español (minúsculas, sin tildes, sin signos de puntuación, sin palabras vacías
+y con un lematizado ligero por sufijos) y construye en una sola pasada un índice invertido disperso
+con los pesos TF-IDF o BM25 de cada pregunta almacenada. Una consulta se puntúa como el producto
+escalar disperso entre su vector de términos y los vectores del índice, recorriendo solo las listas
+de los términos que aparecen en la consulta.
+
+Cuando no hay índice y las preguntas se leen de la base de datos en cada consulta, stream_top_k las
+puntúa a medida que llegan (similitud del coseno entre los recuentos de términos, que no necesita
+estadísticas de toda la colección) y solo conserva las k mejores en un montículo, de modo que la
+memoria no depende del número de preguntas. La lectura se detiene en cuanto aparece una pregunta con
+exactamente los mismos términos que la consulta.
+
+Para decidir si una respuesta es fiable, with_confidence añade a cada resultado esa misma similitud del
+coseno (entre 0 y 1, comparable sea cual sea la función de pesos del índice) y reordena los resultados por
+ella, de modo que is_confident compara el mejor resultado con el umbral y con el segundo usando la misma
+puntuación por la que están ordenados. choose_answer aplica esa regla en los dos webhooks: devuelve el
+documento con el que responder o, si no es fiable, el mensaje con las preguntas sugeridas.
+
+Funciones y clases:
+- normalize_text: Pasa el texto a minúsculas, elimina tildes y sustituye la puntuación por espacios.
+- stem: Recorta los sufijos más habituales de una palabra en español.
+- tokenize: Devuelve la lista de términos normalizados de un texto.
+- search_fields: Campos de búsqueda precalculados que se guardan con cada pregunta.
+- stored_tokens: Recupera los términos precalculados de un elemento si siguen siendo válidos.
+- RankingIndex: Índice disperso que ordena documentos por relevancia para una consulta.
+- stream_top_k: Puntúa documentos a medida que llegan y devuelve los k más similares a una consulta.
+- with_confidence: Añade a cada resultado la similitud del coseno con la consulta y los ordena por ella.
+- is_confident: Indica si el mejor resultado es lo bastante fiable para responder directamente.
+- candidate_count: Número de candidatos que hay que pedir para decidir y para sugerir.
+- suggestions_message: Construye el mensaje "¿Quizás quisiste decir...?" con las preguntas sugeridas.
+- choose_answer: Decide entre responder con el mejor resultado, sugerir preguntas o no responder.
+"""
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+
+# Se incrementa cada vez que cambia la normalización para poder invalidar términos precalculados.
+TOKENIZER_VERSION = 1
+
+# Campos con los términos precalculados que los scripts de carga guardan junto a cada pregunta.
+TOKENS_FIELD = 'Tokens'
+TOKEN_VERSION_FIELD = 'TokenVersion'
+
+# Valores por defecto de la confianza mínima (similitud del coseno, de 0 a 1) para responder directamente y del
+# número de preguntas que se sugieren cuando la respuesta no es fiable. Cada webhook puede cambiarlos con
+# las variables de entorno MIN_CONFIDENCE y SUGGESTION_COUNT.
+DEFAULT_MIN_CONFIDENCE = 0.4
+DEFAULT_SUGGESTION_COUNT = 3
+NO_ANSWER_MESSAGE = "Lo siento, no tengo la respuesta a esa pregunta en este momento."
+
+STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes como con contra cual cuales cuando de del
+desde donde durante e el ella ellas ellos en entre era es esa esas ese eso esos esta estan estas este
+esto estos fue ha hay la las le les lo los me mi mis mucho muy nada ni no nos o os otra otras otro
+otros para pero poco por porque que quien quienes se si sin sobre son su sus tambien te tu tus un
+una uno unos y ya yo
+""".split())
+
+# Ordenados de más largo a más corto para recortar siempre el sufijo más específico.
+SUFFIXES = (
+    'amientos', 'imientos', 'aciones', 'amiento', 'imiento', 'idades', 'mente', 'acion', 'iendo',
+    'ables', 'ibles', 'istas', 'ando', 'idad', 'able', 'ible', 'ista', 'ados', 'idos', 'adas', 'idas',
+    'ado', 'ido', 'ada', 'ida', 'ar', 'er', 'ir', 'an', 'en', 'es', 'os', 'as', 's'
+)
+
+_NON_WORD = re.compile(r'[^a-z0-9_]+')
+
+
+def normalize_text(text):
+    """
+    Pasa el texto a minúsculas, elimina las tildes y sustituye la puntuación por espacios.
+
+    Parámetros:
+    - text: El texto a normalizar.
+
+    Retorna:
+    - El texto normalizado.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', without_accents)
+
+
+def stem(word):
+    """
+    Recorta el sufijo más largo conocido de una palabra y su vocal final, conservando al menos tres letras.
+
+    Parámetros:
+    - word: La palabra ya normalizada.
+
+    Retorna:
+    - La raíz aproximada de la palabra.
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    if len(word) > 3 and word[-1] in 'aeo':
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """
+    Devuelve la lista de términos normalizados de un texto, sin palabras vacías.
+
+    Parámetros:
+    - text: El texto a procesar.
+
+    Retorna:
+    - Lista de términos en el orden en que aparecen en el texto.
+    """
+    return [stem(word) for word in normalize_text(text).split() if word not in STOPWORDS]
+
+
+def search_fields(question):
+    """
+    Calcula los campos de búsqueda que los scripts de carga guardan junto a cada pregunta.
+
+    Parámetros:
+    - question: El texto de la pregunta.
+
+    Retorna:
+    - Un diccionario con los términos normalizados y la versión del normalizador.
+    """
+    return {TOKENS_FIELD: tokenize(question), TOKEN_VERSION_FIELD: TOKENIZER_VERSION}
+
+
+def stored_tokens(item):
+    """
+    Devuelve los términos precalculados de un elemento si se generaron con la versión actual del normalizador.
+
+    Parámetros:
+    - item: El elemento leído de la base de datos.
+
+    Retorna:
+    - La lista de términos, o None si no existen o están desactualizados.
+    """
+    tokens = item.get(TOKENS_FIELD)
+    if tokens is None or item.get(TOKEN_VERSION_FIELD) != TOKENIZER_VERSION:
+        return None
+    return list(tokens)
+
+
+def bm25_weights(term_counts, lengths, document_frequency, k1=1.2, b=0.75):
+    """
+    Calcula los pesos BM25 de todos los términos de todos los documentos.
+
+    Parámetros:
+    - term_counts: Lista con un Counter de términos por documento.
+    - lengths: Lista con el número de términos de cada documento.
+    - document_frequency: Número de documentos en los que aparece cada término.
+    - k1, b: Parámetros de saturación y normalización por longitud de BM25.
+
+    Retorna:
+    - Lista con un diccionario término -> peso por documento.
+    """
+    total = len(term_counts)
+    average_length = (sum(lengths) / total) if total else 0.0
+    idf = {
+        term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+        for term, frequency in document_frequency.items()
+    }
+    weights = []
+    for counts, length in zip(term_counts, lengths):
+        norm = k1 * (1 - b + b * length / average_length) if average_length else k1
+        weights.append({
+            term: idf[term] * count * (k1 + 1) / (count + norm)
+            for term, count in counts.items()
+        })
+    return weights
+
+
+def tfidf_weights(term_counts, _lengths, document_frequency):
+    """
+    Calcula los pesos TF-IDF normalizados (norma L2) de todos los términos de todos los documentos.
+
+    Parámetros:
+    - term_counts: Lista con un Counter de términos por documento.
+    - _lengths: No se usa; se recibe para compartir la firma con bm25_weights.
+    - document_frequency: Número de documentos en los que aparece cada término.
+
+    Retorna:
+    - Lista con un diccionario término -> peso por documento.
+    """
+    total = len(term_counts)
+    idf = {
+        term: math.log((1 + total) / (1 + frequency)) + 1
+        for term, frequency in document_frequency.items()
+    }
+    weights = []
+    for counts in term_counts:
+        vector = {term: (1 + math.log(count)) * idf[term] for term, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+        weights.append({term: value / norm for term, value in vector.items()})
+    return weights
+
+
+SCORERS = {
+    'bm25': bm25_weights,
+    'tfidf': tfidf_weights,
+}
+
+
+class RankingIndex:
+    """
+    Índice invertido disperso sobre un conjunto de preguntas agrupadas por intención.
+
+    Cada documento es un diccionario con, al menos, las claves 'group' (la intención) y 'text'
+    (la pregunta). Si incluye 'tokens' se usan esos términos ya calculados en lugar de tokenizar
+    el texto. El resto de claves se conservan tal cual y se devuelven en los resultados.
+    """
+
+    def __init__(self, documents, scoring='bm25'):
+        """
+        Construye el índice en una única pasada sobre los documentos.
+
+        Parámetros:
+        - documents: Iterable de diccionarios con las claves 'group' y 'text'.
+        - scoring: Nombre de la función de pesos a utilizar ('bm25' o 'tfidf').
+        """
+        if scoring not in SCORERS:
+            raise ValueError(f"Función de pesos desconocida: {scoring}")
+        self.scoring = scoring
+        self.documents = list(documents)
+
+        term_counts = []
+        document_frequency = Counter()
+        for document in self.documents:
+            tokens = document.get('tokens')
+            counts = Counter(tokens if tokens is not None else tokenize(document['text']))
+            term_counts.append(counts)
+            document_frequency.update(counts.keys())
+
+        lengths = [sum(counts.values()) for counts in term_counts]
+        weights = SCORERS[scoring](term_counts, lengths, document_frequency)
+
+        self.postings = {}
+        for position, vector in enumerate(weights):
+            for term, weight in vector.items():
+                self.postings.setdefault(term, []).append((position, weight))
+
+    def __len__(self):
+        return len(self.documents)
+
+    def search(self, query, group=None, k=1):
+        """
+        Ordena los documentos por relevancia respecto a la consulta.
+
+        Parámetros:
+        - query: El texto de la consulta.
+        - group: Si se indica, solo se consideran los documentos de esa intención.
+        - k: Número máximo de resultados.
+
+        Retorna:
+        - Lista de tuplas (puntuación, documento) ordenada de mayor a menor puntuación. Los empates se
+          resuelven a favor del documento indexado antes. Solo aparecen documentos con algún término
+          en común con la consulta, y se seleccionan con un montículo sin ordenar todos los candidatos.
+        """
+        query_terms = Counter(tokenize(query))
+        scores = {}
+        for term, query_weight in query_terms.items():
+            for position, weight in self.postings.get(term, ()):
+                if group is not None and self.documents[position]['group'] != group:
+                    continue
+                scores[position] = scores.get(position, 0.0) + query_weight * weight
+
+        ranked = heapq.nsmallest(k, scores.items(), key=lambda entry: (-entry[1], entry[0]))
+        return [(score, self.documents[position]) for position, score in ranked]
+
+
+def _norm(counts):
+    return math.sqrt(sum(count * count for count in counts.values()))
+
+
+def _document_counts(document):
+    tokens = document.get('tokens')
+    return Counter(tokens if tokens is not None else tokenize(document['text']))
+
+
+def _cosine(query_counts, query_norm, counts):
+    overlap = sum(count * counts[term] for term, count in query_counts.items() if term in counts)
+    return overlap / (query_norm * _norm(counts)) if overlap else 0.0
+
+
+def stream_top_k(documents, query, k=1, stop_on_exact=True):
+    """
+    Puntúa los documentos a medida que llegan y conserva los k más similares a la consulta.
+
+    La puntuación es la similitud del coseno entre los recuentos de términos de la consulta y los del
+    documento. Solo entran en el montículo los documentos con algún término en común, y los empates se
+    resuelven a favor del documento leído antes. Con stop_on_exact, el recorrido termina en cuanto un
+    documento tiene exactamente los mismos términos que la consulta (similitud 1), sin pedir más
+    documentos al iterable. Si la consulta no tiene términos, no se lee ningún documento.
+
+    Parámetros:
+    - documents: Iterable (por ejemplo, un generador paginado) de diccionarios con la clave 'text' y,
+      opcionalmente, 'tokens'.
+    - query: El texto de la consulta.
+    - k: Número máximo de resultados.
+    - stop_on_exact: Si es True, deja de leer documentos al encontrar una coincidencia exacta.
+
+    Retorna:
+    - Lista de tuplas (puntuación, documento) de mayor a menor puntuación.
+    """
+    query_counts = Counter(tokenize(query))
+    if not query_counts:
+        return []
+    query_norm = _norm(query_counts)
+    heap = []
+    for position, document in enumerate(documents):
+        counts = _document_counts(document)
+        score = _cosine(query_counts, query_norm, counts)
+        if not score:
+            continue
+        # En el montículo de mínimos queda arriba el peor: menor puntuación y, a igualdad, el leído después.
+        entry = (score, -position, document)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+        if stop_on_exact and counts == query_counts:
+            break
+
+    ranked = sorted(heap, key=lambda entry: (-entry[0], -entry[1]))
+    return [(score, document) for score, _, document in ranked]
+
+
+def with_confidence(query, results):
+    """
+    Sustituye la puntuación de cada resultado por su similitud del coseno con la consulta y los reordena por ella.
+
+    El orden del índice (BM25 o TF-IDF) no tiene por qué coincidir con el de la similitud del coseno, así que
+    los candidatos se vuelven a ordenar para que la respuesta, la comprobación de is_confident y las
+    sugerencias usen todos la misma puntuación. A igual confianza se mantiene el orden del índice.
+
+    Parámetros:
+    - query: El texto de la consulta.
+    - results: Lista de tuplas (puntuación, documento), por ejemplo de RankingIndex.search.
+
+    Retorna:
+    - Lista de tuplas (confianza, documento) de mayor a menor confianza, con la confianza entre 0 y 1.
+    """
+    query_counts = Counter(tokenize(query))
+    query_norm = _norm(query_counts)
+    scored = [(_cosine(query_counts, query_norm, _document_counts(document)), document) for _, document in results]
+    return sorted(scored, key=lambda entry: -entry[0])
+
+
+def is_confident(results, min_confidence):
+    """
+    Indica si el mejor resultado es lo bastante fiable para responder con él directamente.
+
+    Parámetros:
+    - results: Lista de tuplas (confianza, documento) ordenada de mejor a peor.
+    - min_confidence: Confianza mínima del mejor resultado.
+
+    Retorna:
+    - True si el mejor resultado alcanza la confianza mínima y el segundo no tiene al menos su misma confianza.
+    """
+    if not results or results[0][0] < min_confidence:
+        return False
+    return len(results) == 1 or results[1][0] < results[0][0]
+
+
+def candidate_count(suggestion_count):
+    """
+    Devuelve cuántos resultados hay que pedir al buscar: los que se sugieren y, como mínimo, dos para
+    poder detectar un empate entre los dos mejores.
+
+    Parámetros:
+    - suggestion_count: Número de preguntas que se sugieren.
+
+    Retorna:
+    - El número de resultados a pedir.
+    """
+    return max(suggestion_count, 2)
+
+
+def suggestions_message(results):
+    """
+    Construye el mensaje con las preguntas sugeridas cuando la respuesta no es lo bastante fiable.
+
+    Parámetros:
+    - results: Lista de tuplas (confianza, documento) de las preguntas a sugerir.
+
+    Retorna:
+    - El texto del mensaje.
+    """
+    questions = "\n".join(f"- {document['text']}" for _, document in results)
+    return f"¿Quizás quisiste decir...?\n{questions}"
+
+
+def choose_answer(results, min_confidence=DEFAULT_MIN_CONFIDENCE, suggestion_count=DEFAULT_SUGGESTION_COUNT):
+    """
+    Decide cómo contestar a partir de los resultados de una búsqueda.
+
+    Parámetros:
+    - results: Lista de tuplas (confianza, documento) de mayor a menor confianza.
+    - min_confidence: Confianza mínima del mejor resultado para responder con él.
+    - suggestion_count: Número máximo de preguntas sugeridas.
+
+    Retorna:
+    - Tupla (documento, mensaje). Si el mejor resultado es fiable (is_confident), el documento con el que
+      responder y None; si no lo es, None y el mensaje con las sugerencias; si no hay resultados, None y
+      NO_ANSWER_MESSAGE.
+    """
+    if not results:
+        return None, NO_ANSWER_MESSAGE
+    if not is_confident(results, min_confidence):
+        return None, suggestions_message(results[:suggestion_count])
+    return results[0][1], None
@@ -0,0 +1,212 @@
+"""
+Utilidades para preparar textos largos antes de enviarlos a los servicios de idioma y traducción.
+
+Los servicios de traducción limitan el tamaño de cada petición, así que los documentos largos se
+dividen en fragmentos que respetan, por orden de preferencia, los párrafos, las líneas, las frases
+y las palabras. La concatenación de los fragmentos reproduce exactamente el texto original.
+
+Para no enviar documentos enteros a los servicios de detección de idioma, se trabaja con una muestra
+del texto, y guess_language permite resolver localmente los casos claros contando palabras vacías
+(artículos, preposiciones...) de cada idioma.
+
+El texto final de las extracciones (Textract y Document AI) se compone con assemble_text en una sola
+pasada sobre un io.StringIO: las piezas se unen con un espacio y la marca LINE_BREAK_MARKER, que los
+documentos usan para indicar un salto de línea, se sustituye en cada pieza, sin copias intermedias
+del documento completo. Para normalizar los espacios, las piezas grandes se recorren en tramos de
+NORMALIZE_SLICE_CHARS caracteres cortados en un espacio.
+
+Funciones:
+- split_text: Divide un texto en fragmentos de como mucho max_bytes bytes en UTF-8.
+- text_sample: Devuelve una muestra acotada del principio de un texto.
+- guess_language: Estima el idioma de un texto a partir de sus palabras vacías más frecuentes.
+- assemble_text: Une las piezas de texto de una extracción y convierte las marcas de salto de línea.
+"""
+import io
+import re
+from collections import Counter
+
+from common.retrieval import normalize_text
+
+# Fronteras de corte, de la más preferida a la menos. El corte se hace justo después de la frontera,
+# de modo que el separador queda al final del fragmento anterior.
+BOUNDARIES = (
+    re.compile(r'(?<=\n\n)'),
+    re.compile(r'(?<=\n)'),
+    re.compile(r'(?<=[.!?;:…]\s)'),
+    re.compile(r'(?<=\s)'),
+)
+
+
+def _utf8_len(text):
+    return len(text.encode('utf-8'))
+
+
+def _split_chars(text, max_bytes):
+    """Último recurso: corta por caracteres sin partir ningún carácter multibyte."""
+    chunks = []
+    start = 0
+    size = 0
+    for position, char in enumerate(text):
+        char_size = _utf8_len(char)
+        if size + char_size > max_bytes:
+            chunks.append(text[start:position])
+            start = position
+            size = 0
+        size += char_size
+    chunks.append(text[start:])
+    return chunks
+
+
+def split_text(text, max_bytes, _level=0):
+    """
+    Divide un texto en fragmentos que no superan max_bytes bytes en UTF-8.
+
+    Los fragmentos se llenan con tantos párrafos (o líneas, frases o palabras, si un párrafo no cabe
+    entero) como quepan, y ''.join(fragmentos) == text.
+
+    Parámetros:
+    - text: El texto a dividir.
+    - max_bytes: Tamaño máximo de cada fragmento en bytes UTF-8.
+
+    Retorna:
+    - Lista de fragmentos en el orden del texto original. Vacía si el texto está vacío.
+    """
+    if not text:
+        return []
+    if _utf8_len(text) <= max_bytes:
+        return [text]
+    if _level >= len(BOUNDARIES):
+        return _split_chars(text, max_bytes)
+
+    chunks = []
+    current = []
+    current_size = 0
+    for segment in BOUNDARIES[_level].split(text):
+        if not segment:
+            continue
+        size = _utf8_len(segment)
+        if current and current_size + size > max_bytes:
+            chunks.append(''.join(current))
+            current = []
+            current_size = 0
+        if size > max_bytes:
+            chunks.extend(split_text(segment, max_bytes, _level + 1))
+        else:
+            current.append(segment)
+            current_size += size
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def text_sample(text, max_chars):
+    """
+    Devuelve como mucho max_chars caracteres del principio del texto, cortando en un espacio si es posible.
+
+    Parámetros:
+    - text: El texto completo.
+    - max_chars: Longitud máxima de la muestra.
+
+    Retorna:
+    - La muestra del texto.
+    """
+    if len(text) <= max_chars:
+        return text
+    sample = text[:max_chars]
+    cut = sample.rfind(' ')
+    return sample[:cut] if cut > max_chars // 2 else sample
+
+
+# Palabras vacías más frecuentes de cada idioma, sin tildes (se comparan tras normalize_text).
+# Las que comparten varios idiomas cuentan para todos ellos; el criterio de proporción de
+# guess_language descarta los resultados dudosos.
+LANGUAGE_STOPWORDS = {
+    'es': frozenset('el la los las del al y que en por para con una un es se como pero mas esta este son su sus lo'.split()),
+    'en': frozenset('the and of to is in that for with on as are this be it by from or an which was'.split()),
+    'fr': frozenset('le les des et est dans pour sur pas que qui une au du avec ce sont cette il'.split()),
+    'de': frozenset('der die das und ist nicht mit sich auf den dem ein eine zu von im fur auch werden'.split()),
+    'it': frozenset('il di che della per con non sono nel alla gli le una questo anche delle dei'.split()),
+    'pt': frozenset('o os as do da dos das e que em para com uma um nao por se mais sao ao'.split()),
+}
+
+
+def guess_language(text, min_hits=5, min_ratio=2.0):
+    """
+    Estima el idioma de un texto contando las palabras vacías de cada idioma.
+
+    Parámetros:
+    - text: El texto (o una muestra) a analizar.
+    - min_hits: Número mínimo de palabras vacías del idioma ganador.
+    - min_ratio: Cuántas veces debe superar el ganador al segundo idioma.
+
+    Retorna:
+    - El código del idioma si el resultado es claro, o None si no lo es.
+    """
+    words = normalize_text(text).split()
+    hits = Counter()
+    for word in words:
+        for language_code, stopwords in LANGUAGE_STOPWORDS.items():
+            if word in stopwords:
+                hits[language_code] += 1
+    ranking = hits.most_common(2)
+    if not ranking or ranking[0][1] < min_hits:
+        return None
+    if len(ranking) > 1 and ranking[0][1] < min_ratio * ranking[1][1]:
+        return None
+    return ranking[0][0]
+
+
+# Marca que los documentos de origen usan para indicar un salto de línea en el texto extraído.
+LINE_BREAK_MARKER = '&&n'
+
+# Tamaño aproximado de los tramos en los que se normalizan los espacios de una pieza.
+NORMALIZE_SLICE_CHARS = 1 << 16
+
+_WHITESPACE = re.compile(r'\s')
+
+
+def _normalized_slices(text, max_chars=NORMALIZE_SLICE_CHARS):
+    """
+    Recorre el texto en tramos de unos max_chars caracteres, cortados justo antes de un espacio para no partir
+    ninguna palabra, y devuelve cada tramo con los espacios normalizados (" ".join(tramo.split())). Los tramos
+    sin palabras se omiten, de modo que " ".join(tramos) == " ".join(text.split()) sin crear la lista de
+    palabras del texto completo.
+    """
+    start = 0
+    while start < len(text):
+        end = start + max_chars
+        if end < len(text):
+            match = _WHITESPACE.search(text, end)
+            end = match.start() if match else len(text)
+        part = ' '.join(text[start:end].split())
+        if part:
+            yield part
+        start = end
+
+
+def assemble_text(pieces, normalize_whitespace=False, marker=LINE_BREAK_MARKER):
+    """
+    Une las piezas de texto de una extracción en una sola pasada.
+
+    El resultado es el mismo que " ".join(pieces).replace(marker, "\n") o, con normalize_whitespace,
+    que " ".join(" ".join(pieces).split()).replace(marker, "\n"), pero sin construir esas cadenas
+    intermedias: cada pieza (o tramo normalizado) se escribe directamente en el resultado. Como la marca no
+    contiene espacios, nunca queda repartida entre dos piezas y basta con sustituirla en cada una.
+
+    Parámetros:
+    - pieces: Iterable de textos, por ejemplo las líneas de cada página en orden de lectura.
+    - normalize_whitespace: Si es True, cualquier secuencia de espacios se reduce a un único espacio.
+    - marker: Marca que se convierte en salto de línea.
+
+    Retorna:
+    - El texto completo.
+    """
+    output = io.StringIO()
+    first = True
+    for piece in pieces:
+        for part in (_normalized_slices(piece) if normalize_whitespace else (piece,)):
+            if not first:
+                output.write(' ')
+            first = False
+            output.write(part.replace(marker, '\n') if marker in part else part)
+    return output.getvalue()